@@ -0,0 +1,457 @@
+"""
+Rollup cube dan fungsi agregasi untuk dashboard kemacetan lalu lintas
+Cube menyimpan ringkasan per (tanggal, lokasi, jam) sehingga setiap tab
+dashboard cukup meng-agregasi ulang sel cube, bukan memindai baris mentah
+Author: Data Science Team
+Date: February 2026
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from penyimpanan_kemacetan import (
+    CUBE_METRICS, CUBE_SCHEMA, DAY_ORDER, STATUS_LABELS, status_column, restore_text_columns,
+    DATA_PATH, CUBE_PATH, load_cube, load_dataset, dataset_manifest, manifest_version, refresh_frame,
+    shared_frame_path, open_shared_frame, share_frame
+)
+
+CUBE_KEYS = ['tanggal', 'lokasi', 'jam']
+
+def build_cube(df):
+    """
+    Bangun rollup cube dari data mentah pada grain (tanggal, lokasi, jam)
+    Setiap sel berisi jumlah baris, sum/min/max per metrik dan jumlah per status
+    Kunci sel di-factorize menjadi satu kunci integer lalu diagregasi dengan
+    np.*.reduceat setelah diurutkan, tanpa groupby pada kolom string
+    """
+    if df.empty:
+        return pd.DataFrame({
+            field.name: pd.Series(dtype=field.type.to_pandas_dtype()) for field in CUBE_SCHEMA
+        })
+    
+    key_codes, key_values = [], []
+    combined = np.zeros(len(df), dtype=np.int64)
+    for key in CUBE_KEYS:
+        codes, values = _category_codes(df[key])
+        combined = combined * len(values) + codes
+        key_codes.append(codes)
+        key_values.append(values)
+    
+    # Urutkan baris per kunci sel; awal setiap kelompok menjadi batas reduceat
+    order = np.argsort(combined, kind='stable')
+    sorted_keys = combined[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    first_rows = order[starts]
+    
+    cube = {
+        key: values.take(codes[first_rows])
+        for key, codes, values in zip(CUBE_KEYS, key_codes, key_values)
+    }
+    hari_codes, hari_values = _category_codes(df['hari'])
+    cube['hari'] = hari_values.take(hari_codes[first_rows])
+    for column in ('latitude', 'longitude'):
+        cube[column] = df[column].to_numpy()[first_rows]
+    cube['jumlah_data'] = np.diff(np.r_[starts, len(order)])
+    
+    for metric in CUBE_METRICS:
+        values = df[metric].to_numpy()[order]
+        cube[f'{metric}_sum'] = np.add.reduceat(values.astype(np.float64), starts)
+        cube[f'{metric}_min'] = np.minimum.reduceat(values, starts)
+        cube[f'{metric}_max'] = np.maximum.reduceat(values, starts)
+    
+    codes, values = _category_codes(df['status_kemacetan'])
+    status_codes = pd.Index(STATUS_LABELS).get_indexer(values)[codes][order]
+    for code, status in enumerate(STATUS_LABELS):
+        cube[status_column(status)] = np.add.reduceat((status_codes == code).astype(np.int64), starts)
+    
+    return pd.DataFrame({name: cube[name] for name in CUBE_SCHEMA.names}, copy=False)
+
+def build_filter_index(frame):
+    """
+    Bangun indeks filter untuk frame (data mentah atau cube) yang sudah urut
+    berdasarkan tanggal: tanggal per baris sebagai datetime64[D] untuk
+    binary search, serta kode integer untuk lokasi dan hari
+    Frame dengan skema ringkas (kolom datetime dan categorical) juga didukung
+    """
+    if 'tanggal' in frame:
+        date_codes, date_values = pd.factorize(frame['tanggal'], sort=True)
+        day_values = pd.to_datetime(date_values, format='%Y-%m-%d').to_numpy().astype('datetime64[D]')
+        dates = day_values[date_codes]
+    else:
+        dates = frame['datetime'].to_numpy().astype('datetime64[D]')
+    if len(dates) > 1 and (dates[1:] < dates[:-1]).any():
+        raise ValueError("Frame harus diurutkan berdasarkan tanggal sebelum diindeks")
+    
+    lokasi_codes, lokasi_categories = _category_codes(frame['lokasi'])
+    hari_codes, hari_categories = _category_codes(frame['hari'])
+    return {
+        'dates': dates,
+        'lokasi_codes': lokasi_codes.astype(np.int32),
+        'lokasi_categories': lokasi_categories,
+        'hari_codes': hari_codes.astype(np.int8),
+        'hari_categories': hari_categories
+    }
+
+def new_frame_store(shared_path=None):
+    """
+    State frame yang di-cache dan diperbarui di tempat oleh refresh_store:
+    manifest partisi, frame, indeks filter dan versinya
+    Dengan shared_path (prefix file), frame disimpan sebagai file Arrow per
+    versi lalu di-memory-map read-only sehingga dibagi antar proses di host
+    """
+    return {
+        'manifest': None, 'frame': None, 'index': None, 'version': None,
+        'shared_path': shared_path, 'lock': threading.Lock()
+    }
+
+def refresh_store(store, manifest, read_partitions, sort_keys):
+    """
+    Sinkronkan store dengan manifest dataset: hanya partisi baru/berubah yang
+    dibaca (refresh_frame), lalu indeks filter dibangun ulang
+    Mengembalikan (frame, indeks, versi) yang selalu konsisten satu sama lain
+    Trade-off mode bersama (shared_path): frame pandas butuh kolom yang
+    bersebelahan di memori, sehingga setiap versi baru ditulis ulang utuh
+    sebagai satu file Arrow. Pembacaan Parquet tetap hanya partisi baru, tetapi
+    penulisan file bersama sebanding dengan ukuran seluruh dataset (dibayar
+    sekali per versi per host oleh proses pertama yang melihatnya). Untuk
+    ingest yang sangat sering pada dataset besar, nonaktifkan mode bersama
+    """
+    with store['lock']:
+        if store['frame'] is None or store['manifest'] != manifest:
+            version = manifest_version(manifest)
+            frame = None
+            if store['shared_path']:
+                # Versi ini mungkin sudah ditulis proses lain: cukup di-memory-map.
+                # File bisa dihapus proses lain kapan saja (versi lebih baru)
+                try:
+                    frame = open_shared_frame(shared_frame_path(store['shared_path'], version))
+                except FileNotFoundError:
+                    pass
+            if frame is None:
+                frame = refresh_frame(store['frame'], store['manifest'], manifest, read_partitions, sort_keys)
+                if store['shared_path']:
+                    frame = share_frame(frame, store['shared_path'], version)
+            store.update(
+                frame=frame,
+                index=build_filter_index(frame),
+                manifest=manifest,
+                version=version
+            )
+        return store['frame'], store['index'], store['version']
+
+def cube_source(path=CUBE_PATH, data_path=DATA_PATH, columns=None):
+    """
+    Sumber rollup cube untuk refresh_store: (path sumber, manifest, read_partitions)
+    Bila cube belum ditulis, cube dibangun dari data mentah (juga per partisi)
+    """
+    if os.path.exists(path):
+        def read_partitions(partitions):
+            return load_cube(path, partitions=partitions).sort_values(CUBE_KEYS, kind='stable', ignore_index=True)
+        return path, dataset_manifest(path), read_partitions
+    
+    def read_partitions(partitions):
+        df = load_dataset(data_path, columns=columns, partitions=partitions)
+        return build_cube(df).sort_values(CUBE_KEYS, kind='stable', ignore_index=True)
+    return data_path, dataset_manifest(data_path), read_partitions
+
+def _category_codes(column):
+    """
+    Kode integer dan kategori sebuah kolom (categorical dipakai langsung)
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.cat.categories
+    return pd.factorize(column, sort=True)
+
+def _allowed_codes(categories, values):
+    """
+    Array boolean per kode kategori: True bila kategorinya dipilih
+    """
+    allowed = np.zeros(len(categories), dtype=bool)
+    positions = categories.get_indexer(list(values))
+    allowed[positions[positions >= 0]] = True
+    return allowed
+
+def filter_positions(index, start_date=None, end_date=None, locations=None, days=None):
+    """
+    Posisi baris yang lolos filter memakai indeks dari build_filter_index:
+    slice bila hanya rentang tanggal yang membatasi, selain itu array posisi
+    Rentang tanggal diselesaikan dengan searchsorted (binary search), lokasi
+    dan hari dengan lookup kode integer; hanya baris dalam rentang tanggal
+    yang diperiksa dan filter yang memilih semua kategori dilewati
+    """
+    dates = index['dates']
+    lo = 0 if start_date is None else dates.searchsorted(np.datetime64(start_date, 'D'), side='left')
+    hi = len(dates) if end_date is None else dates.searchsorted(np.datetime64(end_date, 'D'), side='right')
+    
+    mask = None
+    for values, codes, categories in (
+        (locations, index['lokasi_codes'], index['lokasi_categories']),
+        (days, index['hari_codes'], index['hari_categories'])
+    ):
+        if values is None:
+            continue
+        allowed = _allowed_codes(categories, values)
+        if allowed.all():
+            continue
+        selected = allowed[codes[lo:hi]]
+        mask = selected if mask is None else mask & selected
+    
+    if mask is None:
+        return slice(lo, hi)
+    return lo + np.flatnonzero(mask)
+
+def position_count(positions, n_rows):
+    """
+    Jumlah baris yang dipilih positions (None, slice, array posisi atau mask
+    boolean) dari frame berisi n_rows baris, tanpa membuat array posisi
+    """
+    if positions is None:
+        return n_rows
+    if isinstance(positions, slice):
+        return len(range(n_rows)[positions])
+    positions = np.asarray(positions)
+    return int(np.count_nonzero(positions)) if positions.dtype == bool else len(positions)
+
+def filter_indexed(frame, index, start_date=None, end_date=None, locations=None, days=None):
+    """
+    Filter frame memakai indeks dari build_filter_index
+    Filter rentang tanggal saja menghasilkan view (slice) tanpa menyalin baris
+    """
+    return frame.iloc[filter_positions(index, start_date, end_date, locations, days)]
+
+def aggregate_means(cube, by, metrics=CUBE_METRICS):
+    """
+    Rata-rata metrik per kelompok `by`, dihitung dari sum/jumlah_data cube
+    Hasilnya sama dengan groupby(by)[metrics].mean() pada data mentah
+    """
+    columns = [f'{metric}_sum' for metric in metrics] + ['jumlah_data']
+    sums = cube.groupby(by, sort=True, observed=True)[columns].sum()
+    means = pd.DataFrame(
+        {metric: sums[f'{metric}_sum'] / sums['jumlah_data'] for metric in metrics},
+        index=sums.index
+    )
+    return means.reset_index()
+
+def metric_means(cube):
+    """
+    Rata-rata keseluruhan setiap metrik (untuk kartu metrik dashboard)
+    """
+    count = cube['jumlah_data'].sum()
+    return {
+        metric: (cube[f'{metric}_sum'].sum() / count) if count else np.nan
+        for metric in CUBE_METRICS
+    }
+
+def daily_trend(cube):
+    """
+    Tren harian tingkat kemacetan dan kecepatan rata-rata
+    """
+    return aggregate_means(cube, 'tanggal', ['tingkat_kemacetan', 'kecepatan_rata_rata_kmh'])
+
+def day_average(cube):
+    """
+    Rata-rata tingkat kemacetan per hari dalam seminggu (urut Senin - Minggu)
+    """
+    day_avg = aggregate_means(cube, 'hari', ['tingkat_kemacetan'])
+    day_avg['hari'] = pd.Categorical(day_avg['hari'], categories=DAY_ORDER, ordered=True)
+    return day_avg.sort_values('hari')
+
+def heatmap_table(cube):
+    """
+    Tabel rata-rata tingkat kemacetan jam (baris) x hari (kolom)
+    Hanya hari yang ada di data yang ditampilkan
+    """
+    means = aggregate_means(cube, ['jam', 'hari'], ['tingkat_kemacetan'])
+    heatmap_data = means.pivot(index='jam', columns='hari', values='tingkat_kemacetan')
+    available_days = [day for day in DAY_ORDER if day in heatmap_data.columns]
+    return heatmap_data[available_days]
+
+def status_totals(cube):
+    """
+    Jumlah baris per status kemacetan dalam bentuk DataFrame (kolom = label status)
+    """
+    columns = [status_column(status) for status in STATUS_LABELS]
+    return cube[columns].set_axis(STATUS_LABELS, axis=1)
+
+def location_stats(cube):
+    """
+    Statistik per lokasi: rata-rata metrik dan status yang paling sering muncul
+    Lokasi di-factorize menjadi kode integer lalu setiap sum dan jumlah status
+    diakumulasi dengan np.bincount, tanpa groupby per lokasi
+    """
+    metrics = ['tingkat_kemacetan', 'kecepatan_rata_rata_kmh', 'volume_kendaraan_per_jam']
+    codes, lokasi = _category_codes(cube['lokasi'])
+    n_locations = len(lokasi)
+    present, first_rows = np.unique(codes, return_index=True)
+    
+    counts = np.bincount(codes, weights=cube['jumlah_data'].to_numpy(), minlength=n_locations)
+    stats = pd.DataFrame({
+        'lokasi': lokasi.take(present),
+        'latitude': cube['latitude'].to_numpy()[first_rows],
+        'longitude': cube['longitude'].to_numpy()[first_rows]
+    })
+    for metric in metrics:
+        sums = np.bincount(codes, weights=cube[f'{metric}_sum'].to_numpy(), minlength=n_locations)
+        stats[metric] = (sums / counts)[present]
+    
+    # Bila seri, pilih label terkecil secara alfabet seperti Series.mode()[0]
+    labels = sorted(STATUS_LABELS)
+    status_counts = np.column_stack([
+        np.bincount(codes, weights=cube[status_column(status)].to_numpy(), minlength=n_locations)
+        for status in labels
+    ])
+    stats['status_kemacetan'] = np.asarray(labels, dtype=object)[status_counts.argmax(axis=1)][present]
+    return stats
+
+def available_locations(cube):
+    """
+    Lokasi yang ada di cube (setelah filter)
+    """
+    return list(cube['lokasi'].unique())
+
+def hourly_profile(cube, lokasi=None):
+    """
+    Rata-rata kecepatan dan volume per jam (opsional untuk satu lokasi)
+    """
+    if lokasi is not None:
+        cube = cube[cube['lokasi'] == lokasi]
+    return aggregate_means(cube, 'jam', ['kecepatan_rata_rata_kmh', 'volume_kendaraan_per_jam'])
+
+def status_distribution(cube, lokasi=None):
+    """
+    Jumlah baris per status kemacetan, urut dari yang paling sering
+    """
+    if lokasi is not None:
+        cube = cube[cube['lokasi'] == lokasi]
+    totals = status_totals(cube).sum()
+    totals = totals[totals > 0].sort_values(ascending=False)
+    totals.index.name = 'status_kemacetan'
+    return totals
+
+def rush_hours(cube):
+    """
+    Rata-rata metrik per jam, diurutkan dari jam paling macet
+    """
+    hourly = aggregate_means(
+        cube, 'jam',
+        ['tingkat_kemacetan', 'kecepatan_rata_rata_kmh', 'volume_kendaraan_per_jam']
+    )
+    return hourly.sort_values('tingkat_kemacetan', ascending=False)
+
+def weekday_weekend(cube):
+    """
+    Rata-rata tingkat kemacetan per jam untuk weekday dan weekend
+    """
+    # Kunci weekend sebagai Series terpisah agar cube (bisa berupa view) tidak disalin
+    is_weekend = cube['hari'].isin(['Sabtu', 'Minggu']).rename('is_weekend')
+    comparison = aggregate_means(cube, ['jam', is_weekend], ['tingkat_kemacetan'])
+    comparison['Tipe Hari'] = comparison['is_weekend'].map({True: 'Weekend', False: 'Weekday'})
+    return comparison
+
+def table_view(df, sort_by, ascending=True, n_records=100, positions=None):
+    """
+    Baris mentah untuk tab Data Tabel: diurutkan lalu diambil n_records teratas
+    Frame dengan skema ringkas diurutkan berdasarkan datetime untuk 'tanggal'
+    positions (hasil filter_positions) membatasi baris tanpa menyalin frame:
+    hanya kolom pengurut yang diambil, lalu n_records baris hasilnya
+    """
+    if sort_by == 'tanggal' and 'tanggal' not in df:
+        sort_by = 'datetime'
+    if positions is None:
+        positions = slice(None)
+    rows = np.arange(len(df))[positions]
+    values = df[sort_by].to_numpy()[positions]
+    order = np.argsort(values if ascending else _descending_key(values), kind='stable')[:n_records]
+    return restore_text_columns(df.iloc[rows[order]])
+
+def _descending_key(values):
+    """
+    Kunci urut menurun yang tetap stabil untuk nilai yang sama
+    """
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype(np.int64)
+    if np.issubdtype(values.dtype, np.integer):
+        return -values.astype(np.int64)
+    return -values.astype(np.float64)
+
+def lttb_indices(x, y, n_out):
+    """
+    Posisi titik terpilih dengan Largest-Triangle-Three-Buckets (LTTB)
+    Titik pertama dan terakhir selalu dipertahankan; setiap bucket di antaranya
+    diwakili titik yang membentuk segitiga terbesar dengan titik terpilih
+    sebelumnya dan rata-rata bucket berikutnya, sehingga puncak tetap terlihat
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        raise ValueError("LTTB membutuhkan minimal 3 titik")
+    
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:stop] - y[prev])
+            - (x[prev] - x[start:stop]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        selected[i + 1] = prev
+    return selected
+
+def minmax_indices(y, n_out):
+    """
+    Posisi titik minimum dan maksimum setiap bucket (n_out // 2 bucket), urut naik
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    n_buckets = max(n_out // 2, 1)
+    buckets = np.arange(n) * n_buckets // n
+    order = np.lexsort((y, buckets))
+    starts = np.flatnonzero(np.r_[True, buckets[order][1:] != buckets[order][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.r_[order[starts], order[ends]])
+
+def downsample_frame(frame, x, y, max_points, method='lttb', by=None):
+    """
+    Kurangi jumlah baris deret waktu menjadi paling banyak max_points per trace
+    method='lttb' mempertahankan bentuk kurva, method='minmax' mempertahankan
+    nilai ekstrem setiap bucket; `by` memisahkan trace (misalnya kolom warna)
+    Kolom x non-numerik (tanggal/jam sebagai teks) diperlakukan berjarak sama
+    """
+    if by is not None:
+        groups = [
+            downsample_frame(group, x, y, max_points, method)
+            for _, group in frame.groupby(by, sort=False, observed=True)
+        ]
+        return pd.concat(groups) if groups else frame
+    if len(frame) <= max_points:
+        return frame
+    if not frame[x].is_monotonic_increasing:
+        frame = frame.sort_values(x, kind='stable')
+    
+    if method == 'minmax':
+        positions = minmax_indices(frame[y].to_numpy(), max_points)
+    elif method == 'lttb':
+        if pd.api.types.is_numeric_dtype(frame[x]):
+            x_values = frame[x].to_numpy(dtype=np.float64)
+        elif pd.api.types.is_datetime64_any_dtype(frame[x]):
+            x_values = frame[x].to_numpy().astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+        else:
+            x_values = np.arange(len(frame), dtype=np.float64)
+        positions = lttb_indices(x_values, frame[y].to_numpy(dtype=np.float64), max_points)
+    else:
+        raise ValueError(f"Metode downsampling tidak dikenal: {method}")
+    return frame.iloc[positions]
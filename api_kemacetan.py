@@ -0,0 +1,300 @@
+"""
+API HTTP/JSON lokal untuk agregat dashboard kemacetan lalu lintas
+Angka yang sama dengan dashboard (kartu metrik, ranking jam sibuk, statistik
+per lokasi, heatmap jam x hari, tren harian) dihitung dari rollup cube dengan
+fungsi analisis_kemacetan, dijalankan di pool worker dan disimpan di cache LRU
+Author: Data Science Team
+Date: February 2026
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import numpy as np
+from aiohttp import web
+
+from penyimpanan_kemacetan import DATA_PATH, CUBE_PATH
+import analisis_kemacetan as ak
+
+# Alamat default server (hanya lokal)
+API_HOST = '127.0.0.1'
+API_PORT = 8765
+
+# Jumlah thread worker untuk agregasi dan kapasitas cache hasil
+API_WORKERS = 4
+API_CACHE_ENTRIES = 256
+
+# Manifest cube diperiksa paling sering sekali per interval ini (detik)
+REFRESH_INTERVAL_S = 5.0
+
+class ResultCache:
+    """
+    Cache LRU thread-safe untuk body JSON hasil query, dengan metrik hit/miss
+    """
+    def __init__(self, capacity=API_CACHE_ENTRIES):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            body = self.entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        with self.lock:
+            self.entries[key] = body
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
+
+def _number(value):
+    """
+    Angka numpy/NaN menjadi nilai JSON (NaN menjadi null)
+    """
+    value = float(value)
+    return None if np.isnan(value) else value
+
+def _records(frame):
+    """
+    DataFrame menjadi list record JSON (NaN menjadi null)
+    """
+    return json.loads(frame.to_json(orient='records'))
+
+def metrics_payload(cube, filtered):
+    """
+    Kartu metrik dashboard: rata-rata terfilter, rata-rata keseluruhan dan selisihnya
+    """
+    current = ak.metric_means(filtered)
+    overall = ak.metric_means(cube)
+    return {
+        'jumlah_data': int(filtered['jumlah_data'].sum()),
+        'rata_rata': {metric: _number(value) for metric, value in current.items()},
+        'keseluruhan': {metric: _number(value) for metric, value in overall.items()},
+        'selisih': {metric: _number(current[metric] - overall[metric]) for metric in current}
+    }
+
+def rush_hours_payload(cube, filtered):
+    """
+    Ranking jam dari yang paling macet (tab Pola Jam Sibuk)
+    """
+    ranking = ak.rush_hours(filtered).reset_index(drop=True)
+    ranking.insert(0, 'peringkat', range(1, len(ranking) + 1))
+    return _records(ranking)
+
+def locations_payload(cube, filtered):
+    """
+    Statistik per lokasi (tab Peta Kemacetan)
+    """
+    return _records(ak.location_stats(filtered))
+
+def heatmap_payload(cube, filtered):
+    """
+    Heatmap rata-rata tingkat kemacetan jam x hari (tab Analisis Temporal)
+    """
+    heatmap = ak.heatmap_table(filtered)
+    return {
+        'jam': list(heatmap.index),
+        'hari': list(heatmap.columns),
+        'tingkat_kemacetan': [[_number(value) for value in row] for row in heatmap.to_numpy()]
+    }
+
+def daily_trend_payload(cube, filtered):
+    """
+    Tren harian tingkat kemacetan dan kecepatan (tab Analisis Temporal)
+    """
+    return _records(ak.daily_trend(filtered))
+
+# Endpoint agregat: path -> fungsi (cube, cube_terfilter) -> objek JSON
+ENDPOINTS = {
+    'metrics': metrics_payload,
+    'rush-hours': rush_hours_payload,
+    'locations': locations_payload,
+    'heatmap': heatmap_payload,
+    'daily-trend': daily_trend_payload
+}
+
+def parse_filters(query):
+    """
+    Filter dari query string: start, end (YYYY-MM-DD), lokasi dan hari (boleh
+    diulang atau dipisah koma). Dinormalisasi (terurut, tanpa duplikat) agar
+    filter yang sama selalu menghasilkan kunci cache yang sama
+    """
+    def dates(name):
+        value = query.get(name)
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Parameter {name} harus berformat YYYY-MM-DD: {value!r}")
+
+    def values(name):
+        items = {item.strip() for raw in query.getall(name, []) for item in raw.split(',') if item.strip()}
+        return tuple(sorted(items)) if items else None
+
+    start, end = dates('start'), dates('end')
+    if start is not None and end is not None and start > end:
+        raise ValueError("Parameter start harus <= end")
+    return (start, end, values('lokasi'), values('hari'))
+
+def new_service(cube_path=CUBE_PATH, data_path=DATA_PATH, cache_entries=API_CACHE_ENTRIES):
+    """
+    State service: sumber cube, store cube (dibagi antar worker), cache hasil
+    dan jumlah request per endpoint
+    """
+    return {
+        'cube_path': cube_path,
+        'data_path': data_path,
+        'store': ak.new_frame_store(),
+        'checked_at': None,
+        'refresh_lock': threading.Lock(),
+        'cache': ResultCache(cache_entries),
+        'requests': dict.fromkeys(ENDPOINTS, 0),
+        'started_at': time.time()
+    }
+
+def current_cube(service):
+    """
+    Cube, indeks dan versi terbaru; manifest hanya diperiksa ulang setiap
+    REFRESH_INTERVAL_S sehingga partisi baru dari scraper ikut terbaca
+    """
+    store = service['store']
+    with service['refresh_lock']:
+        now = time.monotonic()
+        if store['frame'] is None or now - service['checked_at'] >= REFRESH_INTERVAL_S:
+            source, manifest, read_partitions = ak.cube_source(service['cube_path'], service['data_path'])
+            ak.refresh_store(store, manifest, read_partitions, ak.CUBE_KEYS)
+            service['checked_at'] = now
+    with store['lock']:
+        return store['frame'], store['index'], store['version']
+
+def query(service, endpoint, filters):
+    """
+    Body JSON untuk satu endpoint dan filter; dari cache LRU bila ada
+    Kunci cache memakai versi cube sehingga hasil lama tidak terpakai setelah
+    data berubah. Dijalankan di thread worker
+    """
+    cube, index, version = current_cube(service)
+    key = (version, endpoint, filters)
+    body = service['cache'].get(key)
+    if body is None:
+        filtered = ak.filter_indexed(cube, index, *filters)
+        payload = {
+            'filter': {
+                'start': filters[0], 'end': filters[1], 'lokasi': filters[2], 'hari': filters[3]
+            },
+            'versi': version,
+            'data': ENDPOINTS[endpoint](cube, filtered)
+        }
+        body = json.dumps(payload, default=str, ensure_ascii=False).encode('utf-8')
+        service['cache'].put(key, body)
+    return body
+
+def create_app(service, workers=API_WORKERS):
+    """
+    Aplikasi aiohttp: GET /<endpoint> untuk setiap ENDPOINTS, /stats untuk
+    metrik cache dan /health. Agregasi dijalankan di pool thread `workers`
+    """
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api-kemacetan')
+
+    def handler(endpoint):
+        async def handle(request):
+            try:
+                filters = parse_filters(request.query)
+            except ValueError as e:
+                return web.json_response({'error': str(e)}, status=400)
+            service['requests'][endpoint] += 1
+            loop = asyncio.get_running_loop()
+            body = await loop.run_in_executor(executor, query, service, endpoint, filters)
+            return web.Response(body=body, content_type='application/json', charset='utf-8')
+        return handle
+
+    async def stats(request):
+        return web.json_response({
+            'cache': service['cache'].stats(),
+            'requests': service['requests'],
+            'versi': service['store']['version'],
+            'workers': workers,
+            'uptime_s': round(time.time() - service['started_at'], 1)
+        })
+
+    async def health(request):
+        return web.json_response({'status': 'ok'})
+
+    async def shutdown(app):
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    app = web.Application()
+    app.router.add_get('/health', health)
+    app.router.add_get('/stats', stats)
+    for endpoint in ENDPOINTS:
+        app.router.add_get(f'/{endpoint}', handler(endpoint))
+    app.on_cleanup.append(shutdown)
+    return app
+
+def main(host=API_HOST, port=API_PORT, workers=API_WORKERS, cache_entries=API_CACHE_ENTRIES,
+         cube_path=CUBE_PATH, data_path=DATA_PATH):
+    """
+    Jalankan server API; cube dimuat sekali di awal lalu diperbarui bertahap
+    """
+    service = new_service(cube_path, data_path, cache_entries)
+    cube, _, version = current_cube(service)
+    print("=" * 60)
+    print("API AGREGAT KEMACETAN LALU LINTAS")
+    print("=" * 60)
+    print(f"Cube: {len(cube)} sel (versi {version})")
+    print(f"Endpoint: {', '.join('/' + endpoint for endpoint in ENDPOINTS)}, /stats, /health")
+    print(f"Contoh: http://{host}:{port}/metrics?start=2026-02-01&end=2026-02-07&hari=Senin,Selasa\n")
+    web.run_app(create_app(service, workers), host=host, port=port)
+
+def parse_args(argv=None):
+    """
+    Argumen command line untuk server API
+    """
+    parser = argparse.ArgumentParser(description="API HTTP/JSON agregat kemacetan lalu lintas")
+    parser.add_argument('--host', default=API_HOST)
+    parser.add_argument('--port', type=int, default=API_PORT)
+    parser.add_argument('--workers', type=int, default=API_WORKERS, help="Jumlah thread worker agregasi")
+    parser.add_argument('--cache-entries', type=int, default=API_CACHE_ENTRIES, help="Kapasitas cache LRU hasil")
+    parser.add_argument('--cube', default=CUBE_PATH, help="Direktori rollup cube Parquet")
+    parser.add_argument('--data', default=DATA_PATH, help="Dataset mentah (bila cube belum ada)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        cache_entries=args.cache_entries,
+        cube_path=args.cube,
+        data_path=args.data
+    )
@@ -11,6 +11,28 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import numpy as np
+import functools
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import time
+
+from penyimpanan_kemacetan import (
+    DATA_PATH, CUBE_PATH, SKETCH_PATH, load_traffic_frame, compact_frame,
+    memory_report, export_frame, dataset_manifest, manifest_version,
+    remove_quietly
+)
+import analisis_kemacetan as ak
+import sql_kemacetan as sk
+import statistik_kemacetan as stk
+import kuantil_kemacetan as kq
+from lokasi_kemacetan import build_spatial_index, query_bbox, nearest, viewport_bounds, cluster_points
+from profiling_kemacetan import (
+    PROFILE_LOG_PATH, start_profile, profile_stage, profile_call, finish_profile
+)
+from precompute_kemacetan import PRECOMPUTE_PATH, load_precomputed
 
 # Konfigurasi halaman
 st.set_page_config(
@@ -51,176 +73,394 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
-def load_data():
-    """Load data dari file Excel"""
+# Kolom yang dibutuhkan dashboard (column projection saat membaca Parquet)
+DASHBOARD_COLUMNS = [
+    'tanggal', 'hari', 'jam', 'lokasi', 'latitude', 'longitude', 'tipe_jalan',
+    'kecepatan_rata_rata_kmh', 'volume_kendaraan_per_jam', 'tingkat_kemacetan',
+    'indeks_waktu_tempuh', 'status_kemacetan'
+]
+
+# Skema ringkas di memori (categorical, int8/int32, float32, satu kolom datetime)
+COMPACT_SCHEMA = True
+
+# Frame disimpan sebagai file Arrow per versi dan di-memory-map read-only:
+# semua sesi dan proses dashboard di host yang sama berbagi satu salinan fisik
+SHARED_DATASET = True
+SHARED_DIR = os.path.join(tempfile.gettempdir(), 'kemacetan_shared')
+
+@st.cache_resource
+def frame_store(path, kind):
+    """Frame yang di-cache beserta manifest partisi, indeks filter dan versinya;
+    dibagi antar sesi dan diperbarui di tempat oleh ak.refresh_store"""
+    if not SHARED_DATASET:
+        return ak.new_frame_store()
+    source = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]
+    return ak.new_frame_store(os.path.join(SHARED_DIR, f'{kind}-{source}'))
+
+def load_data(path=DATA_PATH, compact=COMPACT_SCHEMA):
+    """Load data dari dataset Parquet (hanya kolom yang dibutuhkan) beserta indeks
+    filter dan versinya: (frame, indeks, versi)
+    Cache mengikuti manifest partisi (nama file, ukuran, mtime), sehingga output
+    scraper baru terbaca tanpa restart dan hanya partisi barunya yang di-parse.
+    Data diurutkan berdasarkan datetime dan lokasi agar dapat difilter dengan indeks;
+    dengan compact=True kolom tanggal + jam diganti satu kolom datetime"""
     try:
-        df = pd.read_excel('kemacetan.xlsx')
-        df['datetime'] = pd.to_datetime(df['tanggal'] + ' ' + df['jam'])
-        return df
+        return ak.refresh_store(
+            frame_store(path, 'data-compact' if compact else 'data'),
+            dataset_manifest(path),
+            lambda partitions: load_traffic_frame(path, DASHBOARD_COLUMNS, compact=compact, partitions=partitions),
+            ['datetime', 'lokasi']
+        )
     except Exception as e:
         st.error(f"Error loading data: {e}")
+        return None, None, None
+
+def load_cube_data(path=CUBE_PATH, data_path=DATA_PATH):
+    """Load rollup cube beserta indeks filter dan versinya: (cube, indeks, versi)
+    Bila cube belum tersedia, cube dibangun dari data mentah (juga per partisi)"""
+    try:
+        source, manifest, read_partitions = ak.cube_source(path, data_path, DASHBOARD_COLUMNS)
+        return ak.refresh_store(frame_store(source, 'cube'), manifest, read_partitions, ak.CUBE_KEYS)
+    except Exception as e:
+        st.error(f"Error loading cube: {e}")
+        return None, None, None
+
+def load_sketch_data(path=SKETCH_PATH, data_path=DATA_PATH):
+    """Load sketsa kuantil per sel beserta indeks filter dan versinya: (sketsa, indeks, versi)
+    Bila sketsa belum tersedia, sketsa dibangun dari data mentah (juga per partisi)"""
+    try:
+        source, manifest, read_partitions = kq.sketch_source(path, data_path)
+        return ak.refresh_store(frame_store(source, 'sketch'), manifest, read_partitions, kq.SKETCH_KEYS)
+    except Exception as e:
+        st.error(f"Error loading sketsa kuantil: {e}")
+        return None, None, None
+
+# Kartu metrik dan baseline lokasi dibaca dari statistik streaming (Welford)
+# yang diperbarui per partisi baru, tanpa memindai baris data
+STREAMING_STATS = True
+
+@st.cache_resource
+def stats_store(stats_path):
+    """State statistik streaming yang dibagi antar sesi dan diperbarui di tempat"""
+    return stk.new_stats_store()
+
+def load_stats(path=DATA_PATH, stats_path=stk.STATS_PATH):
+    """State statistik total yang sinkron dengan manifest dataset, atau None bila gagal
+    Hanya partisi/file baru yang dibaca; state disimpan ke stats_path untuk run berikutnya"""
+    try:
+        return stk.refresh_stats(stats_store(stats_path), path, stats_path)[0]
+    except Exception:
         return None
 
-def main():
-    # Header
-    st.markdown('<div class="main-header">🚗 Dashboard Analisis Kemacetan Lalu Lintas<br>Kota Bandung</div>', 
-                unsafe_allow_html=True)
-    
-    # Load data
-    df = load_data()
-    
-    if df is None:
-        st.error("Gagal memuat data. Pastikan file 'curah_hujan_bandung.xlsx' ada di direktori yang sama.")
-        return
-    
-    # Sidebar - Filter
-    st.sidebar.header("🔍 Filter Data")
+def stats_summaries(stats, key, options):
+    """Ringkasan statistik (keseluruhan, terfilter) untuk kartu metrik, atau None
+    bila filter tidak dapat dijawab dari state: rentang tanggal harus penuh dan
+    hanya salah satu dari filter lokasi atau hari yang membatasi data"""
+    (min_date, max_date), location_options, day_options = options
+    overall = stk.summarize(stats)
+    filters = key[1]
+    if filters is None:
+        return overall, overall
+    start_date, end_date, locations, days = filters
+    if (start_date, end_date) != (min_date, max_date):
+        return None
+    all_locations = set(locations) >= set(location_options)
+    all_days = set(days) >= set(day_options)
+    if all_locations and all_days:
+        return overall, overall
+    if all_days:
+        return overall, stk.summarize(stats, 'lokasi', locations)
+    if all_locations:
+        return overall, stk.summarize(stats, 'hari', days)
+    return None
+
+def metric_help(summaries, metric, digits=1):
+    """Teks bantuan kartu metrik: sebaran nilai terfilter dari statistik streaming"""
+    if summaries is None or not summaries[1].loc[metric, 'jumlah']:
+        return None
+    row = summaries[1].loc[metric]
+    return (f"Std {row['std']:.{digits}f} · min {row['min']:.{digits}f} · "
+            f"max {row['max']:.{digits}f} ({int(row['jumlah']):,} data)")
+
+@st.cache_data(max_entries=2)
+def load_memory_report(path=DATA_PATH, version=None):
+    """Laporan memori per kolom: skema biasa vs skema ringkas (per versi dataset)"""
+    df = load_data(path, compact=False)[0]
+    return memory_report(df, compact_frame(df)) if df is not None else None
+
+# Profiling hot-path: bila aktif, durasi dan jumlah baris per tahap dicatat ke log
+# JSON-lines (dirotasi pada PROFILE_LOG_MAX_BYTES); panel performa selalu
+# mengukur rerun-nya sendiri dan melacak alokasi memori (tracemalloc) selama ditampilkan
+PROFILING = False
+
+# Direktori file ekspor yang di-memoize per signature filter
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), 'kemacetan_export')
+
+# Batas direktori ekspor: file yang tidak dipakai lebih dari EXPORT_MAX_AGE_S
+# dihapus, lalu file yang paling lama tidak dipakai dihapus sampai total ukuran
+# di bawah EXPORT_MAX_BYTES (file dari versi dataset lama ikut terbuang)
+EXPORT_MAX_AGE_S = 24 * 3600
+EXPORT_MAX_BYTES = 2 * 1024 ** 3
+
+# Format unduhan: ekstensi file dan MIME type
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet')
+}
+
+def export_signature(path, version, date_range, locations, days, fmt, compress):
+    """Signature ekspor: versi dataset (manifest partisi) + filter yang dinormalisasi + format"""
+    key = json.dumps({
+        'path': path,
+        'version': version,
+        'date_range': [str(d) for d in date_range],
+        'locations': sorted(locations),
+        'days': sorted(days),
+        'format': fmt,
+        'compress': compress
+    }, sort_keys=True)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+def prune_exports(directory=EXPORT_DIR, max_age_s=EXPORT_MAX_AGE_S, max_bytes=EXPORT_MAX_BYTES):
+    """Bersihkan direktori ekspor berdasarkan umur dan total ukuran (waktu pakai
+    terakhir = mtime). File sementara penulis lain hanya dihapus bila sudah
+    melewati batas umur (penulisnya dianggap gagal)"""
+    entries = []
+    for entry in os.scandir(directory):
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
     
-    # Filter tanggal
-    date_range = st.sidebar.date_input(
-        "Pilih Rentang Tanggal",
-        value=(df['datetime'].min().date(), df['datetime'].max().date()),
-        min_value=df['datetime'].min().date(),
-        max_value=df['datetime'].max().date()
-    )
+    now = time.time()
+    total = 0
+    for mtime, size, path in sorted(entries, reverse=True):
+        expired = now - mtime > max_age_s
+        if path.endswith('.tmp'):
+            if expired:
+                remove_quietly(path)
+            continue
+        total += size
+        if expired or total > max_bytes:
+            remove_quietly(path)
+
+def lazy_export(filtered_df, signature, fmt, compress, columns, positions=None):
+    """Callable untuk st.download_button: file ekspor baru dibangun saat tombol
+    diklik, ditulis bertahap, lalu dipakai ulang untuk signature yang sama
+    Dengan backend SQL, filtered_df berupa (koneksi, sumber, filter) dan file
+    ditulis DuckDB langsung dari Parquet; selain itu positions (posisi baris
+    hasil filter) dipakai agar frame terfilter tidak perlu disalin"""
+    extension = EXPORT_FORMATS[fmt][0] + ('.gz' if compress else '')
+    export_path = os.path.join(EXPORT_DIR, f'{signature}.{extension}')
     
-    # Filter lokasi
-    selected_locations = st.sidebar.multiselect(
-        "Pilih Lokasi",
-        options=df['lokasi'].unique(),
-        default=df['lokasi'].unique()
-    )
+    def build():
+        try:
+            with open(export_path, 'rb') as handle:
+                # Tandai sebagai baru dipakai agar tidak dibuang prune_exports
+                os.utime(handle.fileno())
+                return handle.read()
+        except FileNotFoundError:
+            pass
+        
+        # Sesi lain dengan signature yang sama boleh menulis bersamaan: setiap
+        # penulis memakai file sementara sendiri dan hasilnya identik
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        profile = start_profile(PROFILING, trace_memory=False)
+        with profile_stage(profile, 'tab5.export') as stage:
+            if isinstance(filtered_df, tuple):
+                stage['rows'] = sk.export_rows(*filtered_df, export_path, EXPORT_FORMATS[fmt][0], compress)
+            else:
+                stage['rows'] = ak.position_count(positions, len(filtered_df))
+                export_frame(filtered_df, export_path, EXPORT_FORMATS[fmt][0], compress, columns,
+                             positions=positions)
+        finish_profile(profile, PROFILE_LOG_PATH if PROFILING else None)
+        with open(export_path, 'rb') as handle:
+            data = handle.read()
+        prune_exports(EXPORT_DIR)
+        return data
     
-    # Filter hari
-    selected_days = st.sidebar.multiselect(
-        "Pilih Hari",
-        options=df['hari'].unique(),
-        default=df['hari'].unique()
+    return build
+
+# Render lazy: hanya tampilan yang dipilih yang menghitung agregat dan figure-nya
+# (False = st.tabs biasa, kelima tab dihitung setiap rerun)
+LAZY_VIEWS = True
+
+# Jumlah kombinasi filter yang disimpan di cache setiap tampilan
+VIEW_CACHE_ENTRIES = 32
+
+# Baca hasil tampilan dari cache disk precompute_kemacetan.py sebelum menghitung
+PRECOMPUTED_VIEWS = True
+
+VIEW_LABELS = [
+    "📊 Analisis Temporal",
+    "🗺️ Peta Kemacetan",
+    "📈 Analisis Lokasi",
+    "⏰ Pola Jam Sibuk",
+    "📋 Data Tabel"
+]
+
+# Peta: ukuran viewport (piksel) untuk menghitung bounding box yang terlihat
+MAP_WIDTH_PX = 1200
+MAP_HEIGHT_PX = 600
+MAP_MIN_ZOOM, MAP_MAX_ZOOM, DEFAULT_MAP_ZOOM = 8, 16, 11
+MAP_DEFAULT_CENTER = (-6.9175, 107.6191)
+MAP_ALL_LOCATIONS = "Semua lokasi"
+MAP_METRICS = ['tingkat_kemacetan', 'kecepatan_rata_rata_kmh', 'volume_kendaraan_per_jam']
+
+# Clustering server-side: aktif di bawah zoom ini bila titik di viewport lebih dari batasnya
+CLUSTER_MAX_ZOOM = 14
+CLUSTER_MIN_POINTS = 200
+
+# Jumlah lokasi terdekat yang ditampilkan untuk lokasi pusat peta
+NEAREST_LOCATIONS = 5
+
+# Data Tabel: pilihan urutan dan pilihan default (kolom, ascending, jumlah baris)
+TABLE_SORT_OPTIONS = ['tanggal', 'tingkat_kemacetan', 'kecepatan_rata_rata_kmh', 'volume_kendaraan_per_jam']
+DEFAULT_TABLE_VIEW = (TABLE_SORT_OPTIONS[0], True, 100)
+
+# Downsampling deret waktu: titik maksimum per trace dan metodenya ('lttb' atau 'minmax')
+MAX_POINTS_PER_TRACE = 1000
+DOWNSAMPLE_METHOD = 'lttb'
+
+def downsample_series(profile, name, frame, x, y, by=None):
+    """Batasi setiap trace deret waktu pada MAX_POINTS_PER_TRACE titik sebelum dikirim ke Plotly"""
+    return profile_call(
+        profile, name, ak.downsample_frame, frame, x, y, MAX_POINTS_PER_TRACE, DOWNSAMPLE_METHOD, by
     )
+
+def precomputed_view(func):
+    """Dekorator fungsi tampilan: hasil dibaca dulu dari cache disk precompute
+    dengan kunci nama fungsi + argumen tanpa awalan _ (sama seperti st.cache_data)"""
+    signature = inspect.signature(func)
     
-    # Apply filters
-    if len(date_range) == 2:
-        mask = (
-            (df['datetime'].dt.date >= date_range[0]) &
-            (df['datetime'].dt.date <= date_range[1]) &
-            (df['lokasi'].isin(selected_locations)) &
-            (df['hari'].isin(selected_days))
-        )
-        filtered_df = df[mask]
-    else:
-        filtered_df = df
-    
-    # Metrics Row
-    col1, col2, col3, col4 = st.columns(4)
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if PRECOMPUTED_VIEWS:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            hashed = tuple(value for name, value in bound.arguments.items() if not name.startswith('_'))
+            with profile_stage(bound.arguments.get('_profile'), f'{func.__name__}.precomputed') as stage:
+                result = load_precomputed(PRECOMPUTE_PATH, hashed[0][0], func.__name__, hashed)
+                stage['rows'] = int(result is not None)
+            if result is not None:
+                return result
+        return func(*args, **kwargs)
     
-    with col1:
-        avg_speed = filtered_df['kecepatan_rata_rata_kmh'].mean()
-        st.metric(
-            "Kecepatan Rata-rata",
-            f"{avg_speed:.1f} km/jam",
-            delta=f"{avg_speed - df['kecepatan_rata_rata_kmh'].mean():.1f}",
-            delta_color="normal"
-        )
-    
-    with col2:
-        avg_congestion = filtered_df['tingkat_kemacetan'].mean()
-        st.metric(
-            "Tingkat Kemacetan Rata-rata",
-            f"{avg_congestion:.1f}/10",
-            delta=f"{avg_congestion - df['tingkat_kemacetan'].mean():.1f}",
-            delta_color="inverse"
-        )
+    return wrapper
+
+def default_filters(data_index):
+    """Pilihan filter default sidebar: (rentang tanggal penuh, semua lokasi, semua hari)"""
+    date_range = (data_index['dates'][0].item(), data_index['dates'][-1].item())
+    locations = list(data_index['lokasi_categories'])
+    days = [day for day in ak.DAY_ORDER if day in data_index['hari_categories']]
+    return date_range, locations, days
+
+def filter_key(date_range, locations, days, version=None):
+    """Kunci filter yang dinormalisasi (hashable) untuk cache per tampilan:
+    (versi data, filter); filter None bila rentang tanggal belum lengkap (tanpa filter).
+    Versi data membuat hasil tampilan dihitung ulang setelah dataset berubah"""
+    if len(date_range) != 2:
+        return (version, None)
+    return (version, (date_range[0], date_range[1], tuple(sorted(locations)), tuple(sorted(days))))
+
+def apply_filter(frame, index, key):
+    """Terapkan kunci filter ke frame memakai indeks filternya"""
+    filters = key[1]
+    if filters is None:
+        return frame
+    return ak.filter_indexed(frame, index, *filters)
+
+# Backend SQL (DuckDB): filter dan agregasi dijalankan langsung di atas file
+# Parquet tanpa memuat data ke memori (untuk histori yang tidak muat di RAM)
+SQL_BACKEND = False
+
+@st.cache_resource
+def sql_engine():
+    """Koneksi DuckDB tertanam yang dibagi antar sesi (setiap query memakai cursor sendiri)"""
+    return sk.connect()
+
+def sql_source():
+    """Scan Parquet cube dan data mentah untuk backend SQL"""
+    return sk.source(CUBE_PATH, DATA_PATH)
+
+def sql_versions(path=CUBE_PATH, data_path=DATA_PATH):
+    """Versi data dan cube dari manifest partisi (hanya metadata file, tanpa membaca data)"""
+    data_version = manifest_version(dataset_manifest(data_path))
+    cube_version = manifest_version(dataset_manifest(path)) if os.path.exists(path) else data_version
+    return data_version, cube_version
+
+@st.cache_data(max_entries=2)
+def sql_filter_options(version):
+    """Pilihan filter sidebar dari backend SQL (per versi data)"""
+    return sk.filter_options(sql_engine(), sql_source())
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+def sql_metric_means(key):
+    """Rata-rata metrik keseluruhan dan terfilter untuk kartu metrik (backend SQL)"""
+    engine, source = sql_engine(), sql_source()
+    return sk.metric_means(engine, source, None), sk.metric_means(engine, source, key[1])
+
+def filtered_cube_for(key):
+    """Cube hasil filter untuk satu kunci filter (cube dan indeks dari cache)
+    Dengan backend SQL: (koneksi, sumber, filter) yang diteruskan ke aggregate"""
+    if SQL_BACKEND:
+        return sql_engine(), sql_source(), key[1]
+    cube, cube_index, _ = load_cube_data()
+    return apply_filter(cube, cube_index, key)
+
+def aggregate(filtered_cube, name, *args):
+    """Jalankan agregasi `name` dari analisis_kemacetan pada cube hasil filter,
+    atau fungsi padanannya di sql_kemacetan bila backend SQL aktif"""
+    if SQL_BACKEND:
+        return getattr(sk, name)(*filtered_cube, *args)
+    return getattr(ak, name)(filtered_cube, *args)
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+@precomputed_view
+def temporal_view(key, _profile=None):
+    """Figure tab Analisis Temporal: tren harian, rata-rata per hari dan heatmap"""
+    filtered_cube = filtered_cube_for(key)
     
-    with col3:
-        avg_volume = filtered_df['volume_kendaraan_per_jam'].mean()
-        st.metric(
-            "Volume Kendaraan",
-            f"{int(avg_volume):,} /jam",
-            delta=f"{int(avg_volume - df['volume_kendaraan_per_jam'].mean()):,}"
+    # Grafik tren harian
+    daily_trend = profile_call(_profile, 'tab1.daily_trend', aggregate, filtered_cube, 'daily_trend')
+    daily_trend = downsample_series(
+        _profile, 'tab1.daily_trend_downsample', daily_trend, 'tanggal', 'tingkat_kemacetan'
+    )
+    with profile_stage(_profile, 'tab1.daily_trend_figure', len(daily_trend)):
+        trend_fig = go.Figure()
+        trend_fig.add_trace(go.Scatter(
+            x=daily_trend['tanggal'],
+            y=daily_trend['tingkat_kemacetan'],
+            mode='lines+markers',
+            name='Tingkat Kemacetan',
+            line=dict(color='#e74c3c', width=2)
+        ))
+        trend_fig.update_layout(
+            title='Tren Tingkat Kemacetan Harian',
+            xaxis_title='Tanggal',
+            yaxis_title='Tingkat Kemacetan (1-10)',
+            hovermode='x unified',
+            template='plotly_white'
         )
     
-    with col4:
-        avg_travel_time = filtered_df['indeks_waktu_tempuh'].mean()
-        st.metric(
-            "Indeks Waktu Tempuh",
-            f"{avg_travel_time:.2f}x",
-            delta=f"{avg_travel_time - df['indeks_waktu_tempuh'].mean():.2f}",
-            delta_color="inverse"
+    # Grafik per hari dalam seminggu
+    day_avg = profile_call(_profile, 'tab1.day_average', aggregate, filtered_cube, 'day_average')
+    with profile_stage(_profile, 'tab1.day_average_figure', len(day_avg)):
+        day_fig = px.bar(
+            day_avg,
+            x='hari',
+            y='tingkat_kemacetan',
+            title='Rata-rata Kemacetan per Hari',
+            color='tingkat_kemacetan',
+            color_continuous_scale='Reds',
+            labels={'tingkat_kemacetan': 'Tingkat Kemacetan'}
         )
     
-    # Tabs untuk berbagai visualisasi
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "📊 Analisis Temporal", 
-        "🗺️ Peta Kemacetan", 
-        "📈 Analisis Lokasi",
-        "⏰ Pola Jam Sibuk",
-        "📋 Data Tabel"
-    ])
-    
-    with tab1:
-        st.header("Analisis Pola Kemacetan Berdasarkan Waktu")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Grafik tren harian
-            daily_trend = filtered_df.groupby('tanggal').agg({
-                'tingkat_kemacetan': 'mean',
-                'kecepatan_rata_rata_kmh': 'mean'
-            }).reset_index()
-            
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=daily_trend['tanggal'],
-                y=daily_trend['tingkat_kemacetan'],
-                mode='lines+markers',
-                name='Tingkat Kemacetan',
-                line=dict(color='#e74c3c', width=2)
-            ))
-            fig.update_layout(
-                title='Tren Tingkat Kemacetan Harian',
-                xaxis_title='Tanggal',
-                yaxis_title='Tingkat Kemacetan (1-10)',
-                hovermode='x unified',
-                template='plotly_white'
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            # Grafik per hari dalam seminggu
-            day_avg = filtered_df.groupby('hari')['tingkat_kemacetan'].mean().reset_index()
-            day_order = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu']
-            day_avg['hari'] = pd.Categorical(day_avg['hari'], categories=day_order, ordered=True)
-            day_avg = day_avg.sort_values('hari')
-            
-            fig = px.bar(
-                day_avg,
-                x='hari',
-                y='tingkat_kemacetan',
-                title='Rata-rata Kemacetan per Hari',
-                color='tingkat_kemacetan',
-                color_continuous_scale='Reds',
-                labels={'tingkat_kemacetan': 'Tingkat Kemacetan'}
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        # Heatmap jam vs hari
-        st.subheader("Heatmap Kemacetan: Jam vs Hari")
-        
-        heatmap_data = filtered_df.pivot_table(
-            values='tingkat_kemacetan',
-            index='jam',
-            columns='hari',
-            aggfunc='mean'
-        )
-        
-        # Reorder columns - hanya gunakan hari yang ada di data
-        day_order = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu']
-        available_days = [day for day in day_order if day in heatmap_data.columns]
-        heatmap_data = heatmap_data[available_days]
-        
-        fig = px.imshow(
+    # Heatmap jam vs hari (kolom hanya berisi hari yang ada di data, urut Senin - Minggu)
+    heatmap_data = profile_call(_profile, 'tab1.heatmap', aggregate, filtered_cube, 'heatmap_table')
+    with profile_stage(_profile, 'tab1.heatmap_figure', heatmap_data.size):
+        heatmap_fig = px.imshow(
             heatmap_data,
             labels=dict(x="Hari", y="Jam", color="Tingkat Kemacetan"),
             x=heatmap_data.columns,
@@ -228,25 +468,47 @@ def main():
             color_continuous_scale='RdYlGn_r',
             aspect="auto"
         )
-        fig.update_layout(title='Pola Kemacetan Berdasarkan Jam dan Hari')
-        st.plotly_chart(fig, use_container_width=True)
+        heatmap_fig.update_layout(title='Pola Kemacetan Berdasarkan Jam dan Hari')
     
-    with tab2:
-        st.header("Peta Sebaran Kemacetan di Kota Bandung")
-        
-        # Aggregate data per lokasi
-        location_stats = filtered_df.groupby(['lokasi', 'latitude', 'longitude']).agg({
-            'tingkat_kemacetan': 'mean',
-            'kecepatan_rata_rata_kmh': 'mean',
-            'volume_kendaraan_per_jam': 'mean',
-            'status_kemacetan': lambda x: x.mode()[0]
-        }).reset_index()
-        
-        location_stats['size'] = location_stats['tingkat_kemacetan'] * 5
-        
-        # Peta scatter
-        fig = px.scatter_mapbox(
-            location_stats,
+    return trend_fig, day_fig, heatmap_fig
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+@precomputed_view
+def map_locations(key, _profile=None):
+    """Statistik per lokasi dan indeks spasial (grid) koordinatnya untuk satu kunci filter"""
+    filtered_cube = filtered_cube_for(key)
+    
+    # Aggregate data per lokasi
+    location_stats = profile_call(_profile, 'tab2.location_stats', aggregate, filtered_cube, 'location_stats')
+    spatial_index = profile_call(
+        _profile, 'tab2.spatial_index', build_spatial_index,
+        location_stats['latitude'], location_stats['longitude'], rows=len(location_stats)
+    )
+    return location_stats, spatial_index
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+@precomputed_view
+def map_view(key, center, zoom, _profile=None):
+    """Figure peta dan tabel detail tab Peta Kemacetan untuk satu viewport (pusat + zoom)
+    Hanya lokasi di dalam viewport yang dikirim ke browser; pada zoom jauh
+    dengan banyak titik, lokasi digabung menjadi cluster di server"""
+    location_stats, spatial_index = map_locations(key, _profile)
+    
+    with profile_stage(_profile, 'tab2.viewport_query') as stage:
+        bounds = viewport_bounds(center[0], center[1], zoom, MAP_WIDTH_PX, MAP_HEIGHT_PX)
+        visible = location_stats.iloc[query_bbox(spatial_index, *bounds)]
+        stage['rows'] = len(visible)
+    
+    points = visible.assign(jumlah_lokasi=1)
+    if zoom < CLUSTER_MAX_ZOOM and len(visible) > CLUSTER_MIN_POINTS:
+        points = profile_call(_profile, 'tab2.cluster', cluster_points, visible, zoom, MAP_METRICS)
+    
+    points['size'] = points['tingkat_kemacetan'] * 5
+    
+    # Peta scatter
+    with profile_stage(_profile, 'tab2.map_figure', len(points)):
+        map_fig = px.scatter_mapbox(
+            points,
             lat='latitude',
             lon='longitude',
             size='size',
@@ -257,90 +519,97 @@ def main():
                 'kecepatan_rata_rata_kmh': ':.1f',
                 'volume_kendaraan_per_jam': ':,.0f',
                 'status_kemacetan': True,
+                'jumlah_lokasi': len(points) < len(visible),
                 'latitude': False,
                 'longitude': False,
                 'size': False
             },
             color_continuous_scale='RdYlGn_r',
             size_max=30,
-            zoom=11,
+            center=dict(lat=center[0], lon=center[1]),
+            zoom=zoom,
             mapbox_style='open-street-map',
             title='Peta Tingkat Kemacetan per Lokasi'
         )
-        fig.update_layout(height=600)
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Tabel detail lokasi
-        st.subheader("Detail Statistik per Lokasi")
-        location_display = location_stats.copy()
-        location_display = location_display.rename(columns={
-            'lokasi': 'Lokasi',
-            'tingkat_kemacetan': 'Tingkat Kemacetan',
-            'kecepatan_rata_rata_kmh': 'Kecepatan Rata-rata (km/jam)',
-            'volume_kendaraan_per_jam': 'Volume Kendaraan (per jam)',
-            'status_kemacetan': 'Status'
-        })
-        location_display = location_display[['Lokasi', 'Tingkat Kemacetan', 
-                                             'Kecepatan Rata-rata (km/jam)', 
-                                             'Volume Kendaraan (per jam)', 'Status']]
-        location_display['Tingkat Kemacetan'] = location_display['Tingkat Kemacetan'].round(1)
-        location_display['Kecepatan Rata-rata (km/jam)'] = location_display['Kecepatan Rata-rata (km/jam)'].round(1)
-        location_display = location_display.sort_values('Tingkat Kemacetan', ascending=False)
-        
-        st.dataframe(location_display, hide_index=True, use_container_width=True)
+        map_fig.update_layout(height=MAP_HEIGHT_PX)
     
-    with tab3:
-        st.header("Analisis Detail per Lokasi")
-        
-        # Pilih lokasi untuk analisis detail
-        selected_location = st.selectbox(
-            "Pilih Lokasi untuk Analisis Detail",
-            options=filtered_df['lokasi'].unique()
+    # Tabel detail lokasi (lokasi di dalam viewport)
+    location_display = visible.copy()
+    location_display = location_display.rename(columns={
+        'lokasi': 'Lokasi',
+        'tingkat_kemacetan': 'Tingkat Kemacetan',
+        'kecepatan_rata_rata_kmh': 'Kecepatan Rata-rata (km/jam)',
+        'volume_kendaraan_per_jam': 'Volume Kendaraan (per jam)',
+        'status_kemacetan': 'Status'
+    })
+    location_display = location_display[['Lokasi', 'Tingkat Kemacetan', 
+                                         'Kecepatan Rata-rata (km/jam)', 
+                                         'Volume Kendaraan (per jam)', 'Status']]
+    location_display['Tingkat Kemacetan'] = location_display['Tingkat Kemacetan'].round(1)
+    location_display['Kecepatan Rata-rata (km/jam)'] = location_display['Kecepatan Rata-rata (km/jam)'].round(1)
+    location_display = location_display.sort_values('Tingkat Kemacetan', ascending=False)
+    
+    return map_fig, location_display, len(points) < len(visible), len(points)
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+@precomputed_view
+def available_locations(key):
+    """Pilihan lokasi untuk tab Analisis Lokasi (lokasi yang ada setelah filter)"""
+    return aggregate(filtered_cube_for(key), 'available_locations')
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+@precomputed_view
+def location_view(key, selected_location, _profile=None):
+    """Figure tab Analisis Lokasi untuk satu lokasi: kecepatan, status dan volume per jam"""
+    filtered_cube = filtered_cube_for(key)
+    hourly_location = profile_call(
+        _profile, 'tab3.hourly_profile', aggregate, filtered_cube, 'hourly_profile', selected_location
+    )
+    
+    # Tren kecepatan
+    with profile_stage(_profile, 'tab3.speed_figure', len(hourly_location)):
+        hourly_speed = downsample_series(
+            _profile, 'tab3.speed_downsample', hourly_location[['jam', 'kecepatan_rata_rata_kmh']],
+            'jam', 'kecepatan_rata_rata_kmh'
         )
         
-        location_data = filtered_df[filtered_df['lokasi'] == selected_location]
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Tren kecepatan
-            hourly_speed = location_data.groupby('jam')['kecepatan_rata_rata_kmh'].mean().reset_index()
-            
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=hourly_speed['jam'],
-                y=hourly_speed['kecepatan_rata_rata_kmh'],
-                mode='lines+markers',
-                fill='tozeroy',
-                name='Kecepatan',
-                line=dict(color='#3498db', width=2)
-            ))
-            fig.update_layout(
-                title=f'Pola Kecepatan Harian - {selected_location}',
-                xaxis_title='Jam',
-                yaxis_title='Kecepatan (km/jam)',
-                hovermode='x unified',
-                template='plotly_white'
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            # Distribusi status kemacetan
-            status_dist = location_data['status_kemacetan'].value_counts()
-            
-            fig = px.pie(
-                values=status_dist.values,
-                names=status_dist.index,
-                title=f'Distribusi Status Kemacetan - {selected_location}',
-                color_discrete_sequence=px.colors.sequential.RdBu
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        # Volume kendaraan per jam
-        st.subheader("Volume Kendaraan Sepanjang Hari")
-        hourly_volume = location_data.groupby('jam')['volume_kendaraan_per_jam'].mean().reset_index()
+        speed_fig = go.Figure()
+        speed_fig.add_trace(go.Scatter(
+            x=hourly_speed['jam'],
+            y=hourly_speed['kecepatan_rata_rata_kmh'],
+            mode='lines+markers',
+            fill='tozeroy',
+            name='Kecepatan',
+            line=dict(color='#3498db', width=2)
+        ))
+        speed_fig.update_layout(
+            title=f'Pola Kecepatan Harian - {selected_location}',
+            xaxis_title='Jam',
+            yaxis_title='Kecepatan (km/jam)',
+            hovermode='x unified',
+            template='plotly_white'
+        )
+    
+    # Distribusi status kemacetan
+    status_dist = profile_call(
+        _profile, 'tab3.status_distribution', aggregate, filtered_cube, 'status_distribution', selected_location
+    )
+    with profile_stage(_profile, 'tab3.status_figure', len(status_dist)):
+        status_fig = px.pie(
+            values=status_dist.values,
+            names=status_dist.index,
+            title=f'Distribusi Status Kemacetan - {selected_location}',
+            color_discrete_sequence=px.colors.sequential.RdBu
+        )
+    
+    # Volume kendaraan per jam
+    with profile_stage(_profile, 'tab3.volume_figure', len(hourly_location)):
+        hourly_volume = downsample_series(
+            _profile, 'tab3.volume_downsample', hourly_location[['jam', 'volume_kendaraan_per_jam']],
+            'jam', 'volume_kendaraan_per_jam'
+        )
         
-        fig = px.bar(
+        volume_fig = px.bar(
             hourly_volume,
             x='jam',
             y='volume_kendaraan_per_jam',
@@ -349,57 +618,52 @@ def main():
             color_continuous_scale='Blues',
             labels={'volume_kendaraan_per_jam': 'Volume (kendaraan/jam)'}
         )
-        st.plotly_chart(fig, use_container_width=True)
     
-    with tab4:
-        st.header("Analisis Jam Sibuk (Rush Hour)")
-        
-        # Identifikasi jam tersibuk
-        rush_hours = filtered_df.groupby('jam').agg({
-            'tingkat_kemacetan': 'mean',
-            'kecepatan_rata_rata_kmh': 'mean',
-            'volume_kendaraan_per_jam': 'mean'
-        }).reset_index().sort_values('tingkat_kemacetan', ascending=False)
-        
-        col1, col2 = st.columns([2, 1])
-        
-        with col1:
-            # Grafik tingkat kemacetan per jam
-            fig = go.Figure()
-            
-            fig.add_trace(go.Bar(
-                x=rush_hours['jam'],
-                y=rush_hours['tingkat_kemacetan'],
-                name='Tingkat Kemacetan',
-                marker_color='crimson'
-            ))
-            
-            fig.update_layout(
-                title='Tingkat Kemacetan Rata-rata per Jam',
-                xaxis_title='Jam',
-                yaxis_title='Tingkat Kemacetan (1-10)',
-                template='plotly_white',
-                showlegend=False
-            )
-            st.plotly_chart(fig, use_container_width=True)
-        
-        with col2:
-            st.subheader("Top 5 Jam Tersibuk")
-            top_5_rush = rush_hours.head(5)[['jam', 'tingkat_kemacetan']].copy()
-            top_5_rush.columns = ['Jam', 'Tingkat Kemacetan']
-            top_5_rush['Tingkat Kemacetan'] = top_5_rush['Tingkat Kemacetan'].round(2)
-            top_5_rush.index = range(1, 6)
-            st.dataframe(top_5_rush, use_container_width=True)
-        
-        # Perbandingan weekday vs weekend
-        st.subheader("Perbandingan Weekday vs Weekend")
-        
-        filtered_df['is_weekend'] = filtered_df['hari'].isin(['Sabtu', 'Minggu'])
+    return speed_fig, status_fig, volume_fig
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+@precomputed_view
+def rush_hour_view(key, _profile=None):
+    """Figure dan tabel tab Pola Jam Sibuk"""
+    filtered_cube = filtered_cube_for(key)
+    
+    # Identifikasi jam tersibuk
+    rush_hours = profile_call(_profile, 'tab4.rush_hours', aggregate, filtered_cube, 'rush_hours')
+    
+    # Grafik tingkat kemacetan per jam (tetap diurutkan dari jam paling macet)
+    rush_series = downsample_series(
+        _profile, 'tab4.rush_hours_downsample', rush_hours, 'jam', 'tingkat_kemacetan'
+    ).sort_values('tingkat_kemacetan', ascending=False)
+    with profile_stage(_profile, 'tab4.rush_hours_figure', len(rush_series)):
+        rush_fig = go.Figure()
         
-        comparison = filtered_df.groupby(['jam', 'is_weekend'])['tingkat_kemacetan'].mean().reset_index()
-        comparison['Tipe Hari'] = comparison['is_weekend'].map({True: 'Weekend', False: 'Weekday'})
+        rush_fig.add_trace(go.Bar(
+            x=rush_series['jam'],
+            y=rush_series['tingkat_kemacetan'],
+            name='Tingkat Kemacetan',
+            marker_color='crimson'
+        ))
         
-        fig = px.line(
+        rush_fig.update_layout(
+            title='Tingkat Kemacetan Rata-rata per Jam',
+            xaxis_title='Jam',
+            yaxis_title='Tingkat Kemacetan (1-10)',
+            template='plotly_white',
+            showlegend=False
+        )
+    
+    top_5_rush = rush_hours.head(5)[['jam', 'tingkat_kemacetan']].copy()
+    top_5_rush.columns = ['Jam', 'Tingkat Kemacetan']
+    top_5_rush['Tingkat Kemacetan'] = top_5_rush['Tingkat Kemacetan'].round(2)
+    top_5_rush.index = range(1, len(top_5_rush) + 1)
+    
+    # Perbandingan weekday vs weekend
+    comparison = profile_call(_profile, 'tab4.weekday_weekend', aggregate, filtered_cube, 'weekday_weekend')
+    comparison = downsample_series(
+        _profile, 'tab4.weekday_weekend_downsample', comparison, 'jam', 'tingkat_kemacetan', by='Tipe Hari'
+    )
+    with profile_stage(_profile, 'tab4.weekday_weekend_figure', len(comparison)):
+        comparison_fig = px.line(
             comparison,
             x='jam',
             y='tingkat_kemacetan',
@@ -408,53 +672,490 @@ def main():
             labels={'tingkat_kemacetan': 'Tingkat Kemacetan', 'jam': 'Jam'},
             color_discrete_map={'Weekday': '#e74c3c', 'Weekend': '#3498db'}
         )
-        st.plotly_chart(fig, use_container_width=True)
     
-    with tab5:
-        st.header("Data Mentah")
+    return rush_fig, top_5_rush, comparison_fig
+
+# Grafik persentil (p50/p90/p95/p99) dari sketsa kuantil di tab Analisis Lokasi
+# dan Pola Jam Sibuk
+PERCENTILE_CHARTS = True
+PERCENTILE_METRICS = {
+    'indeks_waktu_tempuh': 'Indeks Waktu Tempuh',
+    'kecepatan_rata_rata_kmh': 'Kecepatan (km/jam)'
+}
+
+def sketch_version(path=SKETCH_PATH):
+    """Versi sketsa tersimpan (hanya metadata file) untuk kunci cache tampilan persentil;
+    sketsa yang dibangun dari data mentah sudah tercakup versi data"""
+    return manifest_version(dataset_manifest(path)) if os.path.isdir(path) else None
+
+def filtered_sketch_for(key):
+    """Baris sketsa kuantil hasil filter untuk satu kunci filter
+    Dengan backend SQL: (koneksi, sumber, filter) yang diteruskan ke percentile_table"""
+    if SQL_BACKEND:
+        return sql_engine(), sql_source(), key[1]
+    sketch, sketch_index, _ = load_sketch_data()
+    return apply_filter(sketch, sketch_index, key)
+
+def percentile_table(filtered_sketch, metric, by, lokasi=None):
+    """Persentil satu metrik per kelompok `by` dari sketsa hasil filter (pandas atau SQL)"""
+    if SQL_BACKEND:
+        return sk.percentile_table(*filtered_sketch, metric, by, lokasi=lokasi)
+    return kq.percentile_table(filtered_sketch, metric, by, lokasi=lokasi)
+
+def percentile_long(table, by):
+    """Tabel persentil (kolom p50, p90, ...) ke format panjang untuk px.line"""
+    columns = [f'p{percentile}' for percentile in kq.PERCENTILES]
+    return table.melt(id_vars=list(by), value_vars=columns, var_name='Persentil', value_name='nilai')
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+@precomputed_view
+def location_percentile_view(key, selected_location, metric, version, _profile=None):
+    """Figure persentil per jam satu metrik untuk satu lokasi (tab Analisis Lokasi)"""
+    filtered_sketch = filtered_sketch_for(key)
+    hourly = profile_call(
+        _profile, 'tab3.percentiles', percentile_table, filtered_sketch, metric, ['jam'], selected_location
+    )
+    with profile_stage(_profile, 'tab3.percentile_figure', len(hourly)):
+        percentile_fig = px.line(
+            percentile_long(hourly, ['jam']),
+            x='jam',
+            y='nilai',
+            color='Persentil',
+            markers=True,
+            title=f'Persentil {PERCENTILE_METRICS[metric]} per Jam - {selected_location}',
+            labels={'nilai': PERCENTILE_METRICS[metric], 'jam': 'Jam'},
+            template='plotly_white'
+        )
+    return percentile_fig
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+@precomputed_view
+def rush_hour_percentile_view(key, version, _profile=None):
+    """Figure persentil indeks waktu tempuh per jam (weekday vs weekend) dan
+    tabel persentil SLA per tipe hari untuk tab Pola Jam Sibuk"""
+    filtered_sketch = filtered_sketch_for(key)
+    hourly = profile_call(
+        _profile, 'tab4.percentiles', percentile_table,
+        filtered_sketch, 'indeks_waktu_tempuh', ['jam', kq.DAY_TYPE]
+    )
+    with profile_stage(_profile, 'tab4.percentile_figure', len(hourly)):
+        percentile_fig = px.line(
+            percentile_long(hourly, ['jam', kq.DAY_TYPE]),
+            x='jam',
+            y='nilai',
+            color='Persentil',
+            line_dash=kq.DAY_TYPE,
+            title='Persentil Indeks Waktu Tempuh per Jam: Weekday vs Weekend',
+            labels={'nilai': 'Indeks Waktu Tempuh', 'jam': 'Jam', kq.DAY_TYPE: 'Tipe Hari'},
+            template='plotly_white'
+        )
+    
+    sla_tables = []
+    for metric, label in PERCENTILE_METRICS.items():
+        table = profile_call(
+            _profile, 'tab4.sla_percentiles', percentile_table, filtered_sketch, metric, [kq.DAY_TYPE]
+        )
+        sla_tables.append(table.assign(Metrik=label))
+    sla = pd.concat(sla_tables, ignore_index=True).rename(columns={kq.DAY_TYPE: 'Tipe Hari', 'jumlah': 'Jumlah Data'})
+    sla = sla[['Metrik', 'Tipe Hari', 'Jumlah Data'] + [f'p{percentile}' for percentile in kq.PERCENTILES]].round(2)
+    return percentile_fig, sla
+
+def filter_positions(index, key):
+    """Posisi baris untuk kunci filter (None bila tanpa filter)"""
+    filters = key[1]
+    if filters is None:
+        return None
+    return ak.filter_positions(index, *filters)
+
+def filtered_data_for(key, profile=None):
+    """Data mentah dan posisi baris hasil filter untuk satu kunci filter (hanya
+    dipakai tab Data Tabel): (frame, posisi). Frame tidak disalin; tabel dan
+    ekspor hanya mengambil baris pada posisi tersebut"""
+    df, data_index, _ = load_data()
+    return df, profile_call(profile, 'filter_data', filter_positions, data_index, key)
+
+@st.cache_data(max_entries=VIEW_CACHE_ENTRIES)
+@precomputed_view
+def table_view_data(key, sort_by, ascending, n_records, _profile=None):
+    """Baris yang ditampilkan di tab Data Tabel untuk kunci filter dan urutan tertentu"""
+    if SQL_BACKEND:
+        return profile_call(
+            _profile, 'tab5.table_view', sk.table_view,
+            sql_engine(), sql_source(), key[1], sort_by, ascending, n_records
+        )
+    df, positions = filtered_data_for(key, _profile)
+    return profile_call(_profile, 'tab5.table_view', ak.table_view, df, sort_by, ascending, n_records, positions)
+
+def render_temporal(key, profile):
+    st.header("Analisis Pola Kemacetan Berdasarkan Waktu")
+    trend_fig, day_fig, heatmap_fig = temporal_view(key, profile)
+    
+    with profile_stage(profile, 'tab1.render'):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.plotly_chart(trend_fig, use_container_width=True)
+        
+        with col2:
+            st.plotly_chart(day_fig, use_container_width=True)
+        
+        # Heatmap jam vs hari
+        st.subheader("Heatmap Kemacetan: Jam vs Hari")
+        st.plotly_chart(heatmap_fig, use_container_width=True)
+
+def map_center(location_stats, center_name):
+    """Pusat peta (lat, lon): tengah seluruh lokasi atau koordinat satu lokasi"""
+    if location_stats.empty:
+        return MAP_DEFAULT_CENTER
+    if center_name == MAP_ALL_LOCATIONS:
+        return (
+            float((location_stats['latitude'].min() + location_stats['latitude'].max()) / 2),
+            float((location_stats['longitude'].min() + location_stats['longitude'].max()) / 2)
+        )
+    selected = location_stats[location_stats['lokasi'] == center_name].iloc[0]
+    return (float(selected['latitude']), float(selected['longitude']))
+
+def render_map(key, profile):
+    st.header("Peta Sebaran Kemacetan di Kota Bandung")
+    location_stats, spatial_index = map_locations(key, profile)
+    
+    # Viewport peta: pusat (seluruh lokasi atau satu lokasi) dan zoom
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        center_name = st.selectbox(
+            "Pusat peta",
+            options=[MAP_ALL_LOCATIONS] + sorted(location_stats['lokasi'])
+        )
+    with col2:
+        zoom = st.slider("Zoom", min_value=MAP_MIN_ZOOM, max_value=MAP_MAX_ZOOM, value=DEFAULT_MAP_ZOOM)
+    
+    center = map_center(location_stats, center_name)
+    map_fig, location_display, clustered, n_points = map_view(key, center, zoom, profile)
+    
+    with profile_stage(profile, 'tab2.render', n_points):
+        st.plotly_chart(map_fig, use_container_width=True)
+        caption = f"{len(location_display):,} dari {len(location_stats):,} lokasi berada di dalam viewport"
+        if clustered:
+            caption += f", ditampilkan sebagai {n_points:,} cluster (perbesar zoom untuk melihat lokasi individual)"
+        st.caption(caption)
         
-        # Filter dan sort options
-        col1, col2, col3 = st.columns(3)
+        # Lokasi terdekat dari lokasi pusat peta
+        if center_name != MAP_ALL_LOCATIONS and not location_stats.empty:
+            st.subheader(f"Lokasi Terdekat dari {center_name}")
+            positions, distances = nearest(spatial_index, center[0], center[1], k=NEAREST_LOCATIONS + 1)
+            neighbours = location_stats.iloc[positions][['lokasi', 'tingkat_kemacetan', 'status_kemacetan']]
+            neighbours = neighbours.assign(jarak_km=distances.round(2))
+            neighbours = neighbours[neighbours['lokasi'] != center_name].head(NEAREST_LOCATIONS)
+            neighbours.columns = ['Lokasi', 'Tingkat Kemacetan', 'Status', 'Jarak (km)']
+            neighbours['Tingkat Kemacetan'] = neighbours['Tingkat Kemacetan'].round(1)
+            st.dataframe(neighbours, hide_index=True, use_container_width=True)
+        
+        # Tabel detail lokasi
+        st.subheader("Detail Statistik per Lokasi")
+        st.dataframe(location_display, hide_index=True, use_container_width=True)
+
+def render_location(key, profile):
+    st.header("Analisis Detail per Lokasi")
+    
+    # Pilih lokasi untuk analisis detail
+    selected_location = st.selectbox(
+        "Pilih Lokasi untuk Analisis Detail",
+        options=available_locations(key)
+    )
+    if selected_location is None:
+        st.info("Tidak ada lokasi yang sesuai dengan filter.")
+        return
+    
+    speed_fig, status_fig, volume_fig = location_view(key, selected_location, profile)
+    
+    with profile_stage(profile, 'tab3.render'):
+        col1, col2 = st.columns(2)
         
         with col1:
-            sort_by = st.selectbox(
-                "Urutkan berdasarkan",
-                options=['tanggal', 'tingkat_kemacetan', 'kecepatan_rata_rata_kmh', 'volume_kendaraan_per_jam']
-            )
+            st.plotly_chart(speed_fig, use_container_width=True)
         
         with col2:
-            sort_order = st.radio("Urutan", options=['Ascending', 'Descending'])
+            st.plotly_chart(status_fig, use_container_width=True)
         
-        with col3:
-            n_records = st.number_input("Tampilkan jumlah baris", min_value=10, max_value=1000, value=100, step=10)
+        # Volume kendaraan per jam
+        st.subheader("Volume Kendaraan Sepanjang Hari")
+        st.plotly_chart(volume_fig, use_container_width=True)
+    
+    # Persentil per jam dari sketsa kuantil (galat relatif <= kq.SKETCH_ACCURACY)
+    if PERCENTILE_CHARTS:
+        st.subheader("Persentil per Jam")
+        metric = st.radio(
+            "Metrik persentil", options=list(PERCENTILE_METRICS),
+            format_func=PERCENTILE_METRICS.get, horizontal=True, key='metrik_persentil'
+        )
+        percentile_fig = location_percentile_view(key, selected_location, metric, sketch_version(), profile)
+        with profile_stage(profile, 'tab3.percentile_render'):
+            st.plotly_chart(percentile_fig, use_container_width=True)
+            st.caption(f"Persentil dari sketsa kuantil per sel, galat relatif maksimum {kq.SKETCH_ACCURACY:.0%}")
+    
+    # Baseline lokasi dari statistik streaming (seluruh data, tanpa filter)
+    stats = load_stats() if STREAMING_STATS else None
+    if stats is not None:
+        with st.expander(f"Baseline {selected_location} (seluruh data)"):
+            st.dataframe(stk.summarize(stats, 'lokasi', [selected_location]).round(2), use_container_width=True)
+
+def render_rush_hours(key, profile):
+    st.header("Analisis Jam Sibuk (Rush Hour)")
+    rush_fig, top_5_rush, comparison_fig = rush_hour_view(key, profile)
+    
+    with profile_stage(profile, 'tab4.render'):
+        col1, col2 = st.columns([2, 1])
         
-        # Display data
-        display_df = filtered_df.sort_values(
-            sort_by, 
-            ascending=(sort_order == 'Ascending')
-        ).head(n_records)
+        with col1:
+            st.plotly_chart(rush_fig, use_container_width=True)
         
-        display_columns = [
-            'tanggal', 'hari', 'jam', 'lokasi', 'tipe_jalan',
-            'kecepatan_rata_rata_kmh', 'volume_kendaraan_per_jam',
-            'tingkat_kemacetan', 'status_kemacetan', 'indeks_waktu_tempuh'
-        ]
+        with col2:
+            st.subheader("Top 5 Jam Tersibuk")
+            st.dataframe(top_5_rush, use_container_width=True)
         
+        # Perbandingan weekday vs weekend
+        st.subheader("Perbandingan Weekday vs Weekend")
+        st.plotly_chart(comparison_fig, use_container_width=True)
+    
+    if PERCENTILE_CHARTS:
+        percentile_fig, sla = rush_hour_percentile_view(key, sketch_version(), profile)
+        with profile_stage(profile, 'tab4.percentile_render'):
+            st.subheader("Persentil Waktu Tempuh (SLA)")
+            st.plotly_chart(percentile_fig, use_container_width=True)
+            st.dataframe(sla, use_container_width=True, hide_index=True)
+            st.caption(f"Persentil dari sketsa kuantil per sel, galat relatif maksimum {kq.SKETCH_ACCURACY:.0%}")
+
+def render_table(key, profile):
+    st.header("Data Mentah")
+    
+    # Filter dan sort options
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        sort_by = st.selectbox(
+            "Urutkan berdasarkan",
+            options=TABLE_SORT_OPTIONS,
+            index=TABLE_SORT_OPTIONS.index(DEFAULT_TABLE_VIEW[0])
+        )
+    
+    with col2:
+        sort_order = st.radio("Urutan", options=['Ascending', 'Descending'], index=0 if DEFAULT_TABLE_VIEW[1] else 1)
+    
+    with col3:
+        n_records = st.number_input(
+            "Tampilkan jumlah baris", min_value=10, max_value=1000, value=DEFAULT_TABLE_VIEW[2], step=10
+        )
+    
+    # Display data
+    display_df = table_view_data(key, sort_by, sort_order == 'Ascending', n_records, profile)
+    
+    display_columns = [
+        'tanggal', 'hari', 'jam', 'lokasi', 'tipe_jalan',
+        'kecepatan_rata_rata_kmh', 'volume_kendaraan_per_jam',
+        'tingkat_kemacetan', 'status_kemacetan', 'indeks_waktu_tempuh'
+    ]
+    
+    with profile_stage(profile, 'tab5.table_render', len(display_df)):
         st.dataframe(
             display_df[display_columns],
             hide_index=True,
             use_container_width=True
         )
+    
+    # Download button (file dibangun hanya saat tombol diklik)
+    col1, col2 = st.columns(2)
+    with col1:
+        export_format = st.radio("Format unduhan", options=list(EXPORT_FORMATS), horizontal=True)
+    with col2:
+        compress = export_format == 'CSV' and st.checkbox("Kompres gzip", value=False)
+    
+    extension, mime = EXPORT_FORMATS[export_format]
+    if compress:
+        extension, mime = f"{extension}.gz", "application/gzip"
+    version, filters = key
+    signature = export_signature(
+        DATA_PATH,
+        version,
+        filters[:2] if filters else (),
+        filters[2] if filters else [],
+        filters[3] if filters else [],
+        export_format,
+        compress
+    )
+    if SQL_BACKEND:
+        export_source, positions = filtered_cube_for(key), None
+    else:
+        export_source, positions = filtered_data_for(key, profile)
+    st.download_button(
+        label=f"📥 Download Data ({export_format})",
+        data=lazy_export(export_source, signature, export_format, compress,
+                         DASHBOARD_COLUMNS + ['datetime'], positions),
+        file_name=f"data_kemacetan_bandung_{datetime.now().strftime('%Y%m%d')}.{extension}",
+        mime=mime
+    )
+
+def main():
+    # Header
+    st.markdown('<div class="main-header">🚗 Dashboard Analisis Kemacetan Lalu Lintas<br>Kota Bandung</div>',
+                unsafe_allow_html=True)
+    
+    # Profiling per tahap; panel performa di sidebar juga menyalakan pelacakan memori
+    show_performance = st.session_state.get('panel_performa', False)
+    profile = start_profile(PROFILING or show_performance, trace_memory=show_performance)
+    
+    if SQL_BACKEND:
+        # Backend SQL: hanya manifest partisi dan pilihan filter yang dibaca di sini;
+        # setiap agregasi dijalankan DuckDB di atas file Parquet
+        with profile_stage(profile, 'load_sql') as stage:
+            try:
+                data_version, cube_version = sql_versions()
+                options = sql_filter_options((data_version, cube_version))
+            except Exception as e:
+                st.error(f"Gagal memuat data lewat backend SQL: {e}")
+                finish_profile(profile, PROFILE_LOG_PATH if PROFILING else None)
+                return
+            stage['rows'] = len(options[1])
+    else:
+        # Load data (baris mentah untuk tab Data Tabel, cube untuk agregasi)
+        # Setiap rerun hanya memeriksa manifest partisi; partisi baru dibaca dan ditambahkan
+        with profile_stage(profile, 'load_data') as stage:
+            df, data_index, data_version = load_data()
+            stage['rows'] = len(df) if df is not None else 0
+        with profile_stage(profile, 'load_cube') as stage:
+            cube, cube_index, cube_version = load_cube_data()
+            stage['rows'] = len(cube) if cube is not None else 0
         
-        # Download button
-        csv = filtered_df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download Data (CSV)",
-            data=csv,
-            file_name=f"data_kemacetan_bandung_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv"
+        if df is None or cube is None or data_index is None or cube_index is None:
+            st.error(f"Gagal memuat data. Pastikan dataset '{DATA_PATH}' ada di direktori yang sama.")
+            finish_profile(profile, PROFILE_LOG_PATH if PROFILING else None)
+            return
+        options = default_filters(data_index)
+    
+    # Sidebar - Filter
+    st.sidebar.header("🔍 Filter Data")
+    
+    # Pilihan default (sama dengan filter default precompute_kemacetan.py)
+    (min_date, max_date), location_options, day_options = options
+    
+    # Filter tanggal (data sudah urut, batas tanggal diambil dari indeks)
+    date_range = st.sidebar.date_input(
+        "Pilih Rentang Tanggal",
+        value=(min_date, max_date),
+        min_value=min_date,
+        max_value=max_date
+    )
+    
+    # Filter lokasi
+    selected_locations = st.sidebar.multiselect(
+        "Pilih Lokasi",
+        options=location_options,
+        default=location_options
+    )
+    
+    # Filter hari
+    selected_days = st.sidebar.multiselect(
+        "Pilih Hari",
+        options=day_options,
+        default=day_options
+    )
+    
+    # Apply filters (binary search tanggal + lookup kode lokasi/hari); data mentah
+    # baru difilter di tab Data Tabel
+    key = filter_key(date_range, selected_locations, selected_days, (data_version, cube_version))
+    
+    # Metrics Row: dari statistik streaming bila filter dapat dijawab dari state,
+    # selain itu dari rollup cube
+    summaries = None
+    if STREAMING_STATS:
+        with profile_stage(profile, 'load_stats') as stage:
+            stats = load_stats()
+            stage['rows'] = int(stats['total']['count'].sum()) if stats is not None else 0
+        if stats is not None:
+            summaries = stats_summaries(stats, key, options)
+    if summaries is not None:
+        overall, current = (summary['rata_rata'].to_dict() for summary in summaries)
+    elif SQL_BACKEND:
+        with profile_stage(profile, 'metrics'):
+            overall, current = sql_metric_means(key)
+    else:
+        filtered_cube = profile_call(profile, 'filter_cube', apply_filter, cube, cube_index, key)
+        with profile_stage(profile, 'metrics', len(filtered_cube)):
+            overall = ak.metric_means(cube)
+            current = ak.metric_means(filtered_cube)
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        avg_speed = current['kecepatan_rata_rata_kmh']
+        st.metric(
+            "Kecepatan Rata-rata",
+            f"{avg_speed:.1f} km/jam",
+            delta=f"{avg_speed - overall['kecepatan_rata_rata_kmh']:.1f}",
+            delta_color="normal",
+            help=metric_help(summaries, 'kecepatan_rata_rata_kmh')
+        )
+    
+    with col2:
+        avg_congestion = current['tingkat_kemacetan']
+        st.metric(
+            "Tingkat Kemacetan Rata-rata",
+            f"{avg_congestion:.1f}/10",
+            delta=f"{avg_congestion - overall['tingkat_kemacetan']:.1f}",
+            delta_color="inverse",
+            help=metric_help(summaries, 'tingkat_kemacetan')
         )
     
+    with col3:
+        avg_volume = current['volume_kendaraan_per_jam']
+        st.metric(
+            "Volume Kendaraan",
+            f"{int(avg_volume):,} /jam",
+            delta=f"{int(avg_volume - overall['volume_kendaraan_per_jam']):,}",
+            help=metric_help(summaries, 'volume_kendaraan_per_jam', digits=0)
+        )
+    
+    with col4:
+        avg_travel_time = current['indeks_waktu_tempuh']
+        st.metric(
+            "Indeks Waktu Tempuh",
+            f"{avg_travel_time:.2f}x",
+            delta=f"{avg_travel_time - overall['indeks_waktu_tempuh']:.2f}",
+            delta_color="inverse",
+            help=metric_help(summaries, 'indeks_waktu_tempuh', digits=2)
+        )
+    
+    # Laporan memori skema data (opsional)
+    if not SQL_BACKEND and st.sidebar.checkbox("Tampilkan laporan memori data", value=False):
+        report = load_memory_report(DATA_PATH, data_version)
+        if report is not None:
+            st.sidebar.caption("Bytes per kolom: skema biasa vs skema ringkas")
+            st.sidebar.dataframe(report, use_container_width=True)
+    
+    # Panel performa (diisi setelah seluruh tab selesai dirender)
+    st.sidebar.checkbox("Tampilkan panel performa", value=False, key='panel_performa')
+    performance_panel = st.sidebar.empty()
+    
+    # Tampilan untuk berbagai visualisasi
+    views = {
+        VIEW_LABELS[0]: render_temporal,
+        VIEW_LABELS[1]: render_map,
+        VIEW_LABELS[2]: render_location,
+        VIEW_LABELS[3]: render_rush_hours,
+        VIEW_LABELS[4]: render_table
+    }
+    if LAZY_VIEWS:
+        active_view = st.radio(
+            "Tampilan",
+            options=VIEW_LABELS,
+            horizontal=True,
+            key='tampilan_aktif',
+            label_visibility='collapsed'
+        )
+        views[active_view](key, profile)
+    else:
+        for tab, label in zip(st.tabs(VIEW_LABELS), VIEW_LABELS):
+            with tab:
+                views[label](key, profile)
+    
     # Footer
     st.markdown("---")
     st.markdown("""
@@ -463,6 +1164,15 @@ def main():
         <p>Data Science Team | February 2026</p>
     </div>
     """, unsafe_allow_html=True)
+    
+    # Tutup sesi profiling: tulis log dan tampilkan ringkasan di panel performa
+    summary = finish_profile(profile, PROFILE_LOG_PATH if PROFILING else None)
+    if show_performance and summary is not None:
+        with performance_panel.container():
+            st.caption(f"Durasi per tahap (total {summary['ms'].sum():,.0f} ms). Alokasi dan puncak memori "
+                       "diukur untuk seluruh proses, termasuk sesi lain yang berjalan bersamaan; puncak "
+                       "kosong bila sesi lain juga sedang diprofil")
+            st.dataframe(summary, hide_index=True, use_container_width=True)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,267 @@
+"""
+Benchmark pipeline generate data dan agregasi dashboard kemacetan
+Mengukur waktu dan memori puncak per tahap pada skala 1x - 1000x dataset
+standar (30 hari x 10 lokasi), lalu membandingkannya dengan baseline
+Author: Data Science Team
+Date: February 2026
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import analisis_kemacetan as ak
+from penyimpanan_kemacetan import CUBE_SCHEMA, clear_dataset, load_cube, load_traffic_frame, write_partitions
+from scraping_kemacetan_ex import LOKASI_KEMACETAN, generate_traffic_data, generate_traffic_data_vectorized
+
+# Skala standar: kelipatan dari dataset 30 hari x 10 lokasi
+DEFAULT_SCALES = [1, 10, 100, 1000]
+BASE_DAYS = 30
+BASELINE_PATH = 'benchmark_baseline.json'
+RESULTS_PATH = 'benchmark_results.json'
+
+# Engine python (baris per baris) hanya diukur sampai skala ini
+PYTHON_ENGINE_MAX_SCALE = 10
+
+def scaled_locations(factor):
+    """
+    Daftar lokasi sintetis sebanyak factor x LOKASI_KEMACETAN
+    Salinan diberi nama unik dan koordinat sedikit bergeser
+    """
+    locations = []
+    for copy in range(factor):
+        for lokasi in LOKASI_KEMACETAN:
+            locations.append(dict(
+                lokasi,
+                nama=lokasi['nama'] if copy == 0 else f"{lokasi['nama']} #{copy + 1}",
+                latitude=lokasi['latitude'] + 0.001 * copy,
+                longitude=lokasi['longitude'] + 0.001 * copy
+            ))
+    return locations
+
+def scale_plan(scale):
+    """
+    Bagi skala menjadi faktor lokasi dan faktor hari (kira-kira akar skala)
+    """
+    location_factor = max(1, int(round(math.sqrt(scale))))
+    days = max(1, int(round(BASE_DAYS * scale / location_factor)))
+    return location_factor, days
+
+def measure(func, repeat=1, memory=True):
+    """
+    Jalankan func dan kembalikan (hasil, detik terbaik, byte memori puncak)
+    Memori puncak diukur lebih dulu pada run terpisah (hasilnya dibuang),
+    lalu waktu diukur tanpa tracemalloc
+    """
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    seconds = float('inf')
+    result = None
+    for _ in range(repeat):
+        result = None
+        start = time.perf_counter()
+        result = func()
+        seconds = min(seconds, time.perf_counter() - start)
+    return result, seconds, peak
+
+def dashboard_stages(df, data_index, cube, cube_index):
+    """
+    Tahap-tahap dashboard sebagai fungsi tanpa argumen (headless, tanpa Streamlit)
+    Filter memakai pilihan sidebar yang umum: setengah rentang tanggal,
+    setengah lokasi dan hari kerja saja
+    """
+    dates = data_index['dates']
+    start_date = dates[len(dates) // 4].item()
+    end_date = dates[(3 * len(dates)) // 4].item()
+    locations = list(data_index['lokasi_categories'][::2])
+    days = ak.DAY_ORDER[:5]
+    filtered_df = ak.filter_indexed(df, data_index, start_date, end_date, locations, days)
+    filtered_cube = ak.filter_indexed(cube, cube_index, start_date, end_date, locations, days)
+    lokasi = locations[0]
+    return [
+        ('filter_raw', lambda: ak.filter_indexed(df, data_index, start_date, end_date, locations, days)),
+        ('filter_cube', lambda: ak.filter_indexed(cube, cube_index, start_date, end_date, locations, days)),
+        ('metric_cards', lambda: (ak.metric_means(cube), ak.metric_means(filtered_cube))),
+        ('tab1_daily_trend', lambda: ak.daily_trend(filtered_cube)),
+        ('tab1_day_average', lambda: ak.day_average(filtered_cube)),
+        ('tab1_heatmap', lambda: ak.heatmap_table(filtered_cube)),
+        ('tab2_location_stats', lambda: ak.location_stats(filtered_cube)),
+        ('tab3_hourly_profile', lambda: ak.hourly_profile(filtered_cube, lokasi)),
+        ('tab3_status_distribution', lambda: ak.status_distribution(filtered_cube, lokasi)),
+        ('tab4_rush_hours', lambda: ak.rush_hours(filtered_cube)),
+        ('tab4_weekday_weekend', lambda: ak.weekday_weekend(filtered_cube)),
+        ('tab5_table_view', lambda: ak.table_view(filtered_df, 'tingkat_kemacetan', False, 100))
+    ]
+
+def run_scale(scale, workdir, repeat=3, memory=True, seed=42):
+    """
+    Jalankan seluruh tahap benchmark untuk satu skala
+    """
+    location_factor, days = scale_plan(scale)
+    locations = scaled_locations(location_factor)
+    start_date = datetime(2026, 1, 1)
+    end_date = start_date + timedelta(days=days - 1)
+    data_path = os.path.join(workdir, f'data_{scale}')
+    cube_path = os.path.join(workdir, f'cube_{scale}')
+    results = []
+
+    def record(stage, func, stage_repeat=repeat):
+        value, seconds, peak = measure(func, stage_repeat, memory)
+        results.append({'stage': stage, 'seconds': seconds, 'peak_bytes': peak})
+        print(f"  {stage:<28} {seconds * 1000:>12.2f} ms"
+              + (f" {peak / 2**20:>10.1f} MiB" if peak is not None else ""))
+        return value
+
+    print(f"\nSkala {scale}x: {days} hari x {len(locations)} lokasi")
+
+    raw = record('generate_numpy', lambda: generate_traffic_data_vectorized(
+        start_date, end_date, seed=seed, lokasi_list=locations), 1)
+    if scale <= PYTHON_ENGINE_MAX_SCALE and location_factor == 1:
+        record('generate_python', lambda: generate_traffic_data(start_date, end_date, engine='python', seed=seed), 1)
+
+    def write_dataset():
+        clear_dataset(data_path)
+        write_partitions(raw, data_path)
+    record('write_dataset', write_dataset, 1)
+
+    cube = record('build_cube', lambda: ak.build_cube(raw), 1)
+
+    def write_cube():
+        clear_dataset(cube_path)
+        write_partitions(cube, cube_path, schema=CUBE_SCHEMA)
+    record('write_cube', write_cube, 1)
+    del raw
+
+    df = record('load_data', lambda: load_traffic_frame(data_path, compact=True), 1)
+    cube = record('load_cube', lambda: load_cube(cube_path).sort_values(
+        ak.CUBE_KEYS, kind='stable', ignore_index=True), 1)
+    data_index = record('build_data_index', lambda: ak.build_filter_index(df), 1)
+    cube_index = record('build_cube_index', lambda: ak.build_filter_index(cube), 1)
+
+    for stage, func in dashboard_stages(df, data_index, cube, cube_index):
+        record(stage, func)
+
+    for result in results:
+        result.update({'scale': scale, 'rows': len(df)})
+    return results
+
+def compare_with_baseline(results, baseline, tolerance=0.25, min_seconds=0.005):
+    """
+    Bandingkan hasil dengan baseline; tahap dianggap regresi bila lebih lambat
+    dari baseline x (1 + tolerance) dan selisihnya melebihi min_seconds
+    """
+    reference = {(item['scale'], item['stage']): item for item in baseline['results']}
+    comparison = []
+    for item in results:
+        base = reference.get((item['scale'], item['stage']))
+        if base is None:
+            continue
+        ratio = item['seconds'] / base['seconds'] if base['seconds'] > 0 else float('inf')
+        regression = (
+            item['seconds'] > base['seconds'] * (1 + tolerance)
+            and item['seconds'] - base['seconds'] > min_seconds
+        )
+        comparison.append({
+            'scale': item['scale'],
+            'stage': item['stage'],
+            'baseline_seconds': base['seconds'],
+            'seconds': item['seconds'],
+            'ratio': ratio,
+            'regression': regression
+        })
+    return comparison
+
+def environment_info():
+    """
+    Informasi lingkungan untuk disimpan bersama hasil
+    """
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__
+    }
+
+def parse_args(argv=None):
+    """
+    Argumen command line benchmark
+    """
+    parser = argparse.ArgumentParser(description="Benchmark pipeline kemacetan lalu lintas")
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help="Kelipatan dataset 30 hari x 10 lokasi")
+    parser.add_argument('--repeat', type=int, default=3, help="Pengulangan tahap dashboard (diambil tercepat)")
+    parser.add_argument('--no-memory', action='store_true', help="Lewati pengukuran memori puncak")
+    parser.add_argument('--output', default=RESULTS_PATH, help="File JSON hasil benchmark")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="File JSON baseline pembanding")
+    parser.add_argument('--save-baseline', action='store_true', help="Simpan hasil sebagai baseline baru")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Toleransi perlambatan relatif")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """
+    Jalankan benchmark, simpan hasil JSON dan bandingkan dengan baseline
+    Exit code 1 bila ada tahap yang mengalami regresi
+    """
+    args = parse_args(argv)
+    print("=" * 60)
+    print("BENCHMARK PIPELINE KEMACETAN")
+    print("=" * 60)
+
+    workdir = tempfile.mkdtemp(prefix='kemacetan_bench_')
+    results = []
+    try:
+        for scale in args.scales:
+            results.extend(run_scale(scale, workdir, args.repeat, not args.no_memory))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {'environment': environment_info(), 'results': results}
+    with open(args.output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\n✓ Hasil disimpan ke: {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as handle:
+            json.dump(report, handle, indent=2)
+        print(f"✓ Baseline disimpan ke: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Baseline '{args.baseline}' belum ada, perbandingan dilewati")
+        return 0
+
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    comparison = compare_with_baseline(results, baseline, args.tolerance)
+    regressions = [item for item in comparison if item['regression']]
+
+    print("\n" + "=" * 60)
+    print("PERBANDINGAN DENGAN BASELINE")
+    print("=" * 60)
+    for item in comparison:
+        flag = "REGRESI" if item['regression'] else "ok"
+        print(f"  {item['scale']:>5}x {item['stage']:<28} {item['ratio']:>6.2f}x  {flag}")
+    print(f"\n{len(regressions)} regresi dari {len(comparison)} tahap yang dibandingkan")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,414 @@
+"""
+Kolektor data kemacetan lalu lintas dari sumber HTTP
+Semua lokasi diambil bersamaan dengan asyncio melalui satu pool koneksi
+aiohttp, dengan rate limit per host, retry dengan backoff dan timeout.
+Hasilnya dinormalisasi ke skema baris dataset (penyimpanan_kemacetan.SCHEMA)
+Author: Data Science Team
+Date: February 2026
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp import web
+import numpy as np
+import pandas as pd
+
+from penyimpanan_kemacetan import (
+    DATA_PATH, CUBE_PATH, CUBE_SCHEMA, SCHEMA, SKETCH_PATH, SKETCH_SCHEMA, append_partitions,
+    read_hour_locations
+)
+from analisis_kemacetan import build_cube
+from kuantil_kemacetan import build_sketches
+from statistik_kemacetan import STATS_PATH, new_stats_store, refresh_stats
+from lokasi_kemacetan import load_registry
+from model_kemacetan import DEFAULT_MODEL, load_model, calculate_travel_time_index, get_status, get_day_name
+
+# Batas koneksi pool HTTP (total dan per host)
+POOL_SIZE = 200
+POOL_SIZE_PER_HOST = 100
+
+# Rate limit per host (token bucket): request per detik dan kapasitas burst
+RATE_PER_HOST = 100.0
+BURST_PER_HOST = 200
+
+# Timeout per request (detik), jumlah retry dan backoff awal (detik, dilipatgandakan)
+TIMEOUT_S = 10.0
+RETRIES = 3
+BACKOFF_S = 0.5
+
+# Status HTTP yang layak dicoba ulang
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TrafficSource:
+    """
+    Antarmuka sumber data lalu lintas
+    build_request(lokasi) mengembalikan dict request (method, url, params, headers);
+    parse(lokasi, payload) mengubah respons JSON menjadi dict pengukuran dengan
+    kunci kecepatan_kmh (wajib), volume_per_jam dan tingkat_kemacetan (opsional)
+    """
+    name = 'base'
+    
+    def build_request(self, lokasi):
+        raise NotImplementedError
+    
+    def parse(self, lokasi, payload):
+        raise NotImplementedError
+
+class JsonApiSource(TrafficSource):
+    """
+    Sumber HTTP JSON generik: GET {base_url}/{path}?lat=..&lon=..&nama=..
+    field_map memetakan kunci pengukuran ke nama field pada respons
+    """
+    name = 'json_api'
+    
+    DEFAULT_FIELDS = {
+        'kecepatan_kmh': 'speed_kmh',
+        'volume_per_jam': 'volume_per_hour',
+        'tingkat_kemacetan': 'congestion_level'
+    }
+    
+    def __init__(self, base_url, path='traffic', api_key=None, field_map=None):
+        self.base_url = base_url.rstrip('/')
+        self.path = path.lstrip('/')
+        self.api_key = api_key
+        self.field_map = dict(self.DEFAULT_FIELDS, **(field_map or {}))
+    
+    def build_request(self, lokasi):
+        headers = {'Authorization': f"Bearer {self.api_key}"} if self.api_key else {}
+        return {
+            'method': 'GET',
+            'url': f"{self.base_url}/{self.path}",
+            'params': {'lat': lokasi['latitude'], 'lon': lokasi['longitude'], 'nama': lokasi['nama']},
+            'headers': headers
+        }
+    
+    def parse(self, lokasi, payload):
+        return {key: payload.get(field) for key, field in self.field_map.items()}
+
+# Sumber yang dapat dipilih dari command line
+SOURCES = {
+    JsonApiSource.name: JsonApiSource
+}
+
+class HostRateLimiter:
+    """
+    Token bucket per host: setiap request mengambil satu token; bila token
+    habis, request menunggu sampai gilirannya tanpa memblokir host lain
+    """
+    
+    def __init__(self, rate=RATE_PER_HOST, burst=BURST_PER_HOST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+    
+    async def wait(self, host):
+        if not self.rate:
+            return
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(host, (self.burst, now))
+        # Token negatif berarti antrean; waktu tunggu sebanding dengan panjang antrean
+        tokens = min(self.burst, tokens + (now - updated) * self.rate) - 1
+        self._buckets[host] = (tokens, now)
+        if tokens < 0:
+            await asyncio.sleep(-tokens / self.rate)
+
+def validate_measurement(measurement):
+    """
+    Periksa dan konversi pengukuran hasil parse: kecepatan_kmh wajib berupa
+    angka positif, volume_per_jam dan tingkat_kemacetan (opsional) menjadi int
+    Pengukuran yang tidak valid menghasilkan ValueError
+    """
+    speed = measurement.get('kecepatan_kmh')
+    if speed is None:
+        raise ValueError("Pengukuran tanpa kecepatan_kmh")
+    speed = float(speed)
+    if not np.isfinite(speed) or speed <= 0:
+        raise ValueError(f"kecepatan_kmh tidak valid: {speed}")
+    validated = {'kecepatan_kmh': speed}
+    for key in ('volume_per_jam', 'tingkat_kemacetan'):
+        value = measurement.get(key)
+        validated[key] = int(value) if value is not None else None
+    level = validated['tingkat_kemacetan']
+    if level is not None and not 1 <= level <= 10:
+        raise ValueError(f"tingkat_kemacetan di luar 1-10: {level}")
+    return validated
+
+class RetryableStatus(Exception):
+    """Respons HTTP dengan status yang layak dicoba ulang"""
+    
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+async def fetch_location(session, source, lokasi, limiter, retries=RETRIES, backoff=BACKOFF_S,
+                         timeout=TIMEOUT_S):
+    """
+    Ambil pengukuran satu lokasi; kembalikan (pengukuran, None) atau (None, error)
+    Timeout, error koneksi dan status RETRY_STATUSES dicoba ulang dengan
+    backoff eksponensial (dengan jitter, atau Retry-After bila diberikan);
+    payload yang gagal di-parse atau divalidasi langsung menjadi error
+    """
+    request = source.build_request(lokasi)
+    host = urlsplit(request['url']).netloc
+    error = None
+    for attempt in range(retries + 1):
+        await limiter.wait(host)
+        delay = backoff * 2 ** attempt * (1 + random.random())
+        try:
+            async with session.request(
+                request.get('method', 'GET'), request['url'],
+                params=request.get('params'), headers=request.get('headers'),
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                if response.status in RETRY_STATUSES:
+                    raise RetryableStatus(response.status, response.headers.get('Retry-After'))
+                response.raise_for_status()
+                payload = await response.json(content_type=None)
+            break
+        except RetryableStatus as exc:
+            error = exc
+            if exc.retry_after and exc.retry_after.isdigit():
+                delay = float(exc.retry_after)
+        except aiohttp.ClientResponseError as exc:
+            # Status 4xx lain tidak akan berubah bila dicoba ulang
+            return None, exc
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as exc:
+            error = exc
+        if attempt < retries:
+            await asyncio.sleep(delay)
+    else:
+        return None, error
+    
+    # Payload yang tidak sesuai tidak akan berubah bila dicoba ulang: hanya
+    # lokasi ini yang dihitung gagal
+    try:
+        return validate_measurement(source.parse(lokasi, payload)), None
+    except (AttributeError, TypeError, ValueError) as exc:
+        return None, exc
+
+async def collect_async(source, lokasi_list, fetched_at=None, rate=RATE_PER_HOST, burst=BURST_PER_HOST,
+                        retries=RETRIES, backoff=BACKOFF_S, timeout=TIMEOUT_S, model=None):
+    """
+    Ambil semua lokasi secara bersamaan melalui satu sesi HTTP (pool koneksi)
+    Mengembalikan (DataFrame ternormalisasi, daftar (nama lokasi, error));
+    model dipakai untuk menurunkan nilai yang tidak diberikan sumber
+    """
+    fetched_at = fetched_at or datetime.now()
+    limiter = HostRateLimiter(rate, burst)
+    connector = aiohttp.TCPConnector(limit=POOL_SIZE, limit_per_host=POOL_SIZE_PER_HOST)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        results = await asyncio.gather(*(
+            fetch_location(session, source, lokasi, limiter, retries, backoff, timeout)
+            for lokasi in lokasi_list
+        ))
+    
+    measurements, failures = [], []
+    for lokasi, (measurement, error) in zip(lokasi_list, results):
+        if error is not None:
+            failures.append((lokasi['nama'], error))
+        else:
+            measurements.append((lokasi, measurement))
+    return normalize_measurements(measurements, fetched_at, model), failures
+
+def collect(source, lokasi_list, fetched_at=None, **kwargs):
+    """
+    Versi sinkron collect_async (untuk script dan cron)
+    """
+    return asyncio.run(collect_async(source, lokasi_list, fetched_at, **kwargs))
+
+def level_from_speed(speed, base_speed, model=None):
+    """
+    Perkirakan tingkat kemacetan (1-10) dari rasio kecepatan terhadap kecepatan dasar
+    Kebalikan model: kecepatan = base_speed * (1 - tingkat / 10 * max_speed_reduction)
+    """
+    reduction_per_level = (model or DEFAULT_MODEL)['config']['max_speed_reduction'] / 10
+    level = np.rint((1 - np.asarray(speed, dtype=np.float64) / base_speed) / reduction_per_level)
+    return np.clip(level, 1, 10).astype(np.int64)
+
+def normalize_measurements(measurements, fetched_at, model=None):
+    """
+    Ubah pasangan (lokasi, pengukuran tervalidasi dari validate_measurement)
+    menjadi DataFrame dengan kolom dan tipe skema dataset; jam dibulatkan ke
+    bawah ke jam penuh. Tingkat kemacetan dan volume yang tidak diberikan
+    sumber diturunkan dari kecepatan dengan parameter model (default: DEFAULT_MODEL)
+    """
+    model = model or DEFAULT_MODEL
+    rows = []
+    for lokasi, measurement in measurements:
+        speed = measurement['kecepatan_kmh']
+        level = measurement['tingkat_kemacetan']
+        if level is None:
+            level = int(level_from_speed(speed, lokasi['base_speed'], model))
+        volume = measurement['volume_per_jam']
+        if volume is None:
+            volume = level * model['config']['volume_per_level']
+        rows.append({
+            'tanggal': fetched_at.strftime('%Y-%m-%d'),
+            'hari': get_day_name(fetched_at.weekday(), model),
+            'jam': f"{fetched_at.hour:02d}:00",
+            'lokasi': lokasi['nama'],
+            'latitude': lokasi['latitude'],
+            'longitude': lokasi['longitude'],
+            'tipe_jalan': lokasi['tipe'],
+            'kecepatan_rata_rata_kmh': round(speed, 1),
+            'volume_kendaraan_per_jam': volume,
+            'tingkat_kemacetan': level,
+            'indeks_waktu_tempuh': round(calculate_travel_time_index(max(speed, 1.0), lokasi['base_speed']), 2),
+            'status_kemacetan': get_status(level, model)
+        })
+    return pd.DataFrame(rows, columns=SCHEMA.names)
+
+def create_mock_app(latency=0.05, failure_rate=0.0, seed=None):
+    """
+    Server HTTP tiruan untuk pengujian lokal: GET /traffic?lat=..&lon=..&nama=..
+    membalas kecepatan dan volume acak setelah `latency` detik; sebagian
+    request (failure_rate) dibalas 503 agar jalur retry ikut teruji
+    """
+    rng = random.Random(seed)
+    
+    async def traffic(request):
+        await asyncio.sleep(latency)
+        if rng.random() < failure_rate:
+            return web.json_response({'error': 'unavailable'}, status=503)
+        level = rng.randint(1, 10)
+        return web.json_response({
+            'nama': request.query.get('nama'),
+            'speed_kmh': round(max(5.0, 35 * (1 - level * 0.07) * rng.uniform(0.9, 1.1)), 1),
+            'volume_per_hour': max(100, level * 300 + rng.randint(-100, 100)),
+            'congestion_level': level
+        })
+    
+    app = web.Application()
+    app.router.add_get('/traffic', traffic)
+    return app
+
+async def start_mock_server(app, host='127.0.0.1', port=0):
+    """
+    Jalankan server tiruan di event loop yang sedang berjalan
+    Mengembalikan (runner, base_url); panggil runner.cleanup() untuk berhenti
+    """
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner, f"http://{host}:{runner.addresses[0][1]}"
+
+async def collect_from_mock(lokasi_list, latency=0.05, failure_rate=0.0, seed=None, **kwargs):
+    """
+    Jalankan server tiruan lalu kumpulkan semua lokasi darinya
+    """
+    runner, base_url = await start_mock_server(create_mock_app(latency, failure_rate, seed))
+    try:
+        return await collect_async(JsonApiSource(base_url), lokasi_list, **kwargs)
+    finally:
+        await runner.cleanup()
+
+def main(source_name='json_api', base_url=None, api_key=None, registry=None, output_file=DATA_PATH,
+         cube_file=CUBE_PATH, mock=False, mock_latency=0.05, mock_failure_rate=0.0, stats_file=STATS_PATH,
+         sketch_file=SKETCH_PATH, model_config=None):
+    """
+    Kumpulkan satu putaran pengukuran untuk lokasi registry yang belum memiliki
+    data jam saat ini lalu tambahkan ke dataset (dan rollup cube serta sketsa
+    kuantil); statistik streaming di-merge dengan file yang baru ditambahkan saja
+    Lokasi yang gagal tidak ditulis, sehingga run berikutnya di jam yang sama
+    hanya mengambil ulang lokasi tersebut. model_config (JSON) menimpa parameter
+    model kemacetan seperti pada scraping_kemacetan_ex
+    """
+    print("=" * 60)
+    print("KOLEKTOR DATA KEMACETAN LALU LINTAS")
+    print("=" * 60)
+    
+    lokasi_list = load_registry(registry)
+    model = load_model(model_config) if model_config else DEFAULT_MODEL
+    fetched_at = datetime.now()
+    hour_stamp = fetched_at.replace(minute=0, second=0, microsecond=0)
+    print(f"\nJumlah Lokasi: {len(lokasi_list)}")
+    print(f"Sumber: {'server tiruan lokal' if mock else f'{source_name} ({base_url})'}")
+    if model_config:
+        print(f"Model Kemacetan: {model_config}")
+    
+    # Lokasi yang sudah ada untuk jam ini tidak diambil maupun ditulis ulang
+    existing = read_hour_locations(output_file, hour_stamp)
+    lokasi_list = [lokasi for lokasi in lokasi_list if lokasi['nama'] not in existing]
+    if not lokasi_list:
+        print(f"Jam {hour_stamp.strftime('%Y-%m-%d %H:%M')} sudah lengkap di dataset, data tidak ditulis")
+        return {'rows': 0, 'failures': 0, 'seconds': 0.0}
+    if existing:
+        print(f"{len(existing)} lokasi sudah ada untuk jam ini, {len(lokasi_list)} lokasi diambil")
+    
+    start = time.perf_counter()
+    if mock:
+        df, failures = asyncio.run(collect_from_mock(
+            lokasi_list, mock_latency, mock_failure_rate, fetched_at=fetched_at, model=model
+        ))
+    else:
+        if base_url is None:
+            raise ValueError("--base-url wajib diisi kecuali memakai --mock")
+        source = SOURCES[source_name](base_url, api_key=api_key)
+        df, failures = collect(source, lokasi_list, fetched_at, model=model)
+    elapsed = time.perf_counter() - start
+    
+    print(f"\n✓ {len(df)} lokasi berhasil dikumpulkan dalam {elapsed:.2f} detik")
+    for nama, error in failures:
+        print(f"  ✗ {nama}: {error}")
+    
+    if not df.empty:
+        append_partitions(df, output_file)
+        if cube_file:
+            append_partitions(build_cube(df), cube_file, schema=CUBE_SCHEMA)
+        if sketch_file:
+            append_partitions(build_sketches(df), sketch_file, schema=SKETCH_SCHEMA)
+        if stats_file:
+            refresh_stats(new_stats_store(), output_file, stats_file)
+        print(f"✓ Data ditambahkan ke: {output_file}")
+    if failures:
+        print(f"✗ {len(failures)} lokasi gagal; jalankan ulang pada jam yang sama untuk melengkapinya")
+    
+    return {'rows': len(df), 'failures': len(failures), 'seconds': elapsed}
+
+def parse_args(argv=None):
+    """
+    Argumen command line kolektor
+    """
+    parser = argparse.ArgumentParser(description="Kolektor data kemacetan lalu lintas dari sumber HTTP")
+    parser.add_argument('--source', choices=sorted(SOURCES), default=JsonApiSource.name)
+    parser.add_argument('--base-url', default=None, help="URL dasar API sumber data")
+    parser.add_argument('--api-key', default=None, help="API key (dikirim sebagai Bearer token)")
+    parser.add_argument('--registry', default=None, help="Registry lokasi (CSV atau GeoJSON)")
+    parser.add_argument('--output', default=DATA_PATH, help="Direktori dataset Parquet")
+    parser.add_argument('--cube-output', default=CUBE_PATH, help="Direktori rollup cube Parquet")
+    parser.add_argument('--stats-output', default=STATS_PATH, help="Direktori state statistik streaming")
+    parser.add_argument('--sketch-output', default=SKETCH_PATH, help="Direktori sketsa kuantil Parquet")
+    parser.add_argument('--mock', action='store_true', help="Kumpulkan dari server tiruan lokal")
+    parser.add_argument('--mock-latency', type=float, default=0.05, help="Latensi server tiruan (detik)")
+    parser.add_argument('--mock-failure-rate', type=float, default=0.0,
+                        help="Proporsi request server tiruan yang dibalas 503")
+    parser.add_argument('--model-config', default=None,
+                        help="File JSON parameter model kemacetan (rentang jam, ambang status, dll.)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    result = main(
+        source_name=args.source,
+        base_url=args.base_url,
+        api_key=args.api_key,
+        registry=args.registry,
+        output_file=args.output,
+        cube_file=args.cube_output,
+        mock=args.mock,
+        mock_latency=args.mock_latency,
+        mock_failure_rate=args.mock_failure_rate,
+        stats_file=args.stats_output,
+        sketch_file=args.sketch_output,
+        model_config=args.model_config
+    )
+    # Status keluar bukan nol bila ada lokasi yang gagal (agar terdeteksi cron)
+    raise SystemExit(1 if result['failures'] else 0)
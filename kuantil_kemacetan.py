@@ -0,0 +1,199 @@
+"""
+Sketsa kuantil untuk persentil waktu tempuh dan kecepatan lalu lintas
+Setiap sel (tanggal, lokasi, jam) menyimpan jumlah nilai per bucket logaritmik
+(DDSketch): bucket i mencakup (gamma^(i-1), gamma^i] sehingga persentil dari
+bucket mana pun memiliki galat relatif <= SKETCH_ACCURACY. Sketsa digabung
+cukup dengan menjumlahkan bucket, sehingga kombinasi filter apa pun dijawab
+dari sel yang lolos filter tanpa membaca baris mentah
+Author: Data Science Team
+Date: February 2026
+"""
+
+import argparse
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from penyimpanan_kemacetan import (
+    DATA_PATH, SKETCH_PATH, SKETCH_SCHEMA, list_partitions, load_dataset, load_sketch,
+    dataset_manifest, write_partitions
+)
+
+# Metrik yang disketsa
+SKETCH_METRICS = ['indeks_waktu_tempuh', 'kecepatan_rata_rata_kmh']
+
+# Galat relatif maksimum nilai persentil (1%)
+SKETCH_ACCURACY = 0.01
+SKETCH_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+
+# Nilai <= batas ini masuk ke bucket terendah (metrik selalu positif)
+SKETCH_MIN_VALUE = 1e-3
+
+# Persentil yang dilaporkan (SLA)
+PERCENTILES = [50, 90, 95, 99]
+
+# Kunci sel sketsa (sama dengan grain rollup cube)
+SKETCH_KEYS = ['tanggal', 'lokasi', 'jam']
+
+# Dimensi turunan: Weekday/Weekend dari kolom hari
+DAY_TYPE = 'tipe_hari'
+WEEKEND_DAYS = ['Sabtu', 'Minggu']
+
+# Jumlah partisi yang dibaca sekaligus saat sketsa dibangun dari dataset
+SKETCH_BATCH_PARTITIONS = 31
+
+def sketch_bucket(values):
+    """
+    Indeks bucket logaritmik untuk setiap nilai: ceil(log_gamma(x))
+    """
+    values = np.maximum(np.asarray(values, dtype=np.float64), SKETCH_MIN_VALUE)
+    return np.ceil(np.log(values) / np.log(SKETCH_GAMMA)).astype(np.int16)
+
+def bucket_value(buckets):
+    """
+    Nilai representatif bucket: 2 * gamma^i / (gamma + 1), galat relatif
+    <= SKETCH_ACCURACY terhadap setiap nilai di dalam bucket
+    """
+    return 2 * np.power(SKETCH_GAMMA, np.asarray(buckets, dtype=np.float64)) / (SKETCH_GAMMA + 1)
+
+def build_sketches(df, metrics=SKETCH_METRICS):
+    """
+    Sketsa kuantil per sel (tanggal, lokasi, jam) dari data mentah
+    Kunci (sel, metrik, bucket) digabung menjadi satu kunci integer lalu
+    dihitung dengan np.unique; hasil terurut per sel seperti rollup cube
+    """
+    if df.empty:
+        return pd.DataFrame({
+            field.name: pd.Series(dtype=field.type.to_pandas_dtype()) for field in SKETCH_SCHEMA
+        })
+    
+    cell = np.zeros(len(df), dtype=np.int64)
+    key_codes, key_values = [], []
+    for key in SKETCH_KEYS:
+        codes, values = pd.factorize(df[key], sort=True)
+        cell = cell * len(values) + codes
+        key_codes.append(codes)
+        key_values.append(values)
+    
+    buckets = np.concatenate([sketch_bucket(df[metric].to_numpy()) for metric in metrics]).astype(np.int64)
+    low, span = buckets.min(), int(buckets.max() - buckets.min()) + 1
+    rows = np.tile(np.arange(len(df)), len(metrics))
+    metric_codes = np.repeat(np.arange(len(metrics)), len(df))
+    combined = (np.tile(cell, len(metrics)) * len(metrics) + metric_codes) * span + (buckets - low)
+    
+    unique, first, counts = np.unique(combined, return_index=True, return_counts=True)
+    first_rows = rows[first]
+    sketch = {
+        key: values.take(codes[first_rows])
+        for key, codes, values in zip(SKETCH_KEYS, key_codes, key_values)
+    }
+    sketch['hari'] = df['hari'].to_numpy()[first_rows]
+    sketch['metrik'] = np.asarray(metrics, dtype=object)[(unique // span) % len(metrics)]
+    sketch['bucket'] = (unique % span + low).astype(np.int16)
+    sketch['jumlah'] = counts.astype(np.int64)
+    return pd.DataFrame({name: sketch[name] for name in SKETCH_SCHEMA.names})
+
+def _group_keys(sketch, by):
+    """
+    Kunci group-by untuk dimensi `by`; DAY_TYPE diturunkan dari kolom hari
+    bila belum ada sebagai kolom
+    """
+    keys = []
+    for dimension in by:
+        if dimension == DAY_TYPE and DAY_TYPE not in sketch:
+            is_weekend = sketch['hari'].isin(WEEKEND_DAYS).to_numpy()
+            keys.append(pd.Series(np.where(is_weekend, 'Weekend', 'Weekday'), index=sketch.index, name=DAY_TYPE))
+        else:
+            keys.append(dimension)
+    return keys
+
+def quantiles(sketch, by=(), percentiles=PERCENTILES, lokasi=None):
+    """
+    Persentil setiap metrik per kelompok `by` dari baris sketsa (opsional
+    untuk satu lokasi): kolom by, metrik, jumlah dan p<persentil>
+    Bucket sel yang sama dijumlahkan (merge), lalu persentil q diambil dari
+    bucket pertama yang jumlah kumulatifnya melewati rank q * (n - 1)
+    """
+    if lokasi is not None:
+        sketch = sketch[(sketch['lokasi'] == lokasi).to_numpy()]
+    levels = list(by) + ['metrik']
+    counts = sketch.groupby(_group_keys(sketch, by) + ['metrik', 'bucket'], observed=True, sort=True)['jumlah'].sum()
+    counts = counts[counts > 0]
+    groups = counts.groupby(level=levels, observed=True, sort=False)
+    cumulative = groups.cumsum()
+    total = groups.transform('sum')
+    
+    result = pd.DataFrame({'jumlah': total.groupby(level=levels, observed=True).first()})
+    for percentile in percentiles:
+        rank = percentile / 100 * (total - 1)
+        first = cumulative[cumulative > rank].groupby(level=levels, observed=True, sort=False).head(1)
+        values = bucket_value(first.index.get_level_values('bucket'))
+        result[f'p{percentile}'] = pd.Series(values, index=first.index.droplevel('bucket'))
+    return result.reset_index()
+
+def percentile_table(sketch, metric, by=(), percentiles=PERCENTILES, lokasi=None):
+    """
+    Persentil satu metrik per kelompok `by` (baris terurut berdasarkan by)
+    """
+    table = quantiles(sketch, by, percentiles, lokasi)
+    table = table[table['metrik'] == metric].drop(columns='metrik')
+    return table.sort_values(list(by), ignore_index=True) if by else table.reset_index(drop=True)
+
+def sketch_source(path=SKETCH_PATH, data_path=DATA_PATH):
+    """
+    Sumber sketsa untuk analisis_kemacetan.refresh_store: (path, manifest, read_partitions)
+    Bila sketsa belum ditulis, sketsa dibangun dari data mentah (juga per partisi)
+    """
+    columns = SKETCH_KEYS + ['hari'] + SKETCH_METRICS
+    if list_partitions(path):
+        def read_partitions(partitions):
+            return load_sketch(path, partitions=partitions).sort_values(SKETCH_KEYS, kind='stable', ignore_index=True)
+        return path, dataset_manifest(path), read_partitions
+    
+    def read_partitions(partitions):
+        return build_sketches(load_dataset(data_path, columns=columns, partitions=partitions))
+    return data_path, dataset_manifest(data_path), read_partitions
+
+def rebuild_sketches(data_path=DATA_PATH, sketch_path=SKETCH_PATH, batch_partitions=SKETCH_BATCH_PARTITIONS):
+    """
+    Bangun ulang seluruh sketsa dari dataset mentah, per kelompok partisi
+    Mengembalikan jumlah baris sketsa yang ditulis
+    """
+    shutil.rmtree(sketch_path, ignore_errors=True)
+    partitions = list_partitions(data_path)
+    columns = SKETCH_KEYS + ['hari'] + SKETCH_METRICS
+    n_rows = 0
+    for start in range(0, len(partitions), batch_partitions):
+        batch = partitions[start:start + batch_partitions]
+        sketch = build_sketches(load_dataset(data_path, columns=columns, partitions=batch))
+        write_partitions(sketch, sketch_path, schema=SKETCH_SCHEMA)
+        n_rows += len(sketch)
+    return n_rows
+
+def main(data_path=DATA_PATH, sketch_path=SKETCH_PATH):
+    """
+    Bangun ulang sketsa kuantil dari dataset lalu tampilkan persentil keseluruhan
+    (untuk dataset lama; scraper dan kolektor menulis sketsa saat ingest)
+    """
+    n_rows = rebuild_sketches(data_path, sketch_path)
+    print("=" * 60)
+    print("SKETSA KUANTIL KEMACETAN")
+    print("=" * 60)
+    print(f"Galat relatif: {SKETCH_ACCURACY:.0%}, {n_rows} baris bucket")
+    print(quantiles(load_sketch(sketch_path)).round(3).to_string(index=False))
+    print(f"\n✓ Sketsa kuantil disimpan ke: {sketch_path}")
+    return n_rows
+
+def parse_args(argv=None):
+    """
+    Argumen command line untuk membangun sketsa kuantil
+    """
+    parser = argparse.ArgumentParser(description="Bangun ulang sketsa kuantil dataset kemacetan")
+    parser.add_argument('--data', default=DATA_PATH, help="Dataset Parquet terpartisi")
+    parser.add_argument('--output', default=SKETCH_PATH, help="Direktori sketsa kuantil")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(data_path=args.data, sketch_path=args.output)
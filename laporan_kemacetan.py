@@ -0,0 +1,270 @@
+"""
+Laporan grafik kemacetan lalu lintas per lokasi (PNG/PDF/SVG) tanpa browser
+Figure dibangun dengan fungsi tampilan dashboard yang sama, lalu dirender oleh
+kaleido di pool proses: setiap worker memakai satu engine kaleido (Chrome)
+untuk semua figure-nya, dan figure yang inputnya tidak berubah dilewati
+Author: Data Science Team
+Date: February 2026
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from precompute_kemacetan import dashboard_app, dashboard_options, preset_filters
+
+# Lokasi default paket laporan (satu subdirektori per lokasi)
+REPORT_PATH = 'kemacetan_laporan'
+
+# File berisi digest setiap figure yang sudah dirender (untuk melewati figure
+# yang tidak berubah pada run berikutnya)
+REPORT_MANIFEST = 'laporan.json'
+
+REPORT_FORMATS = ['png', 'pdf', 'svg']
+REPORT_WIDTH = 1200
+REPORT_HEIGHT = 600
+
+# Jumlah proses render; setiap proses menjalankan satu engine kaleido
+REPORT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# Batas waktu render satu figure (detik)
+RENDER_TIMEOUT_S = 90
+
+# Grafik per lokasi: nama file -> (fungsi tampilan dashboard, urutan figure di hasilnya)
+# Tampilan dipanggil dengan filter yang dibatasi pada lokasi tersebut
+REPORT_CHARTS = {
+    'kecepatan': ('location_view', 0),
+    'status': ('location_view', 1),
+    'volume': ('location_view', 2),
+    'jam_sibuk': ('rush_hour_view', 0),
+    'heatmap': ('temporal_view', 2)
+}
+
+class UnknownLocationError(ValueError):
+    """Nama lokasi yang diminta tidak ada di data"""
+
+def location_slug(lokasi):
+    """
+    Nama direktori lokasi: huruf kecil, karakter selain huruf/angka menjadi '-'
+    """
+    return re.sub(r'[^a-z0-9]+', '-', lokasi.lower()).strip('-')
+
+def figure_digest(fig_json, fmt, width, height):
+    """
+    Digest input render satu figure: JSON figure (data + layout) dan opsi render
+    """
+    payload = json.dumps([fmt, width, height]) + fig_json
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+def load_report_manifest(output_dir):
+    """
+    Digest figure yang sudah dirender: {path relatif: digest}
+    """
+    try:
+        with open(os.path.join(output_dir, REPORT_MANIFEST), encoding='utf-8') as handle:
+            return json.load(handle)['figures']
+    except (OSError, ValueError, KeyError):
+        return {}
+
+def save_report_manifest(output_dir, figures, version, date_range):
+    """
+    Simpan digest figure beserta versi data dan rentang tanggal laporan
+    """
+    path = os.path.join(output_dir, REPORT_MANIFEST)
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as handle:
+        json.dump({
+            'versi': version,
+            'tanggal': [str(value) for value in date_range],
+            'figures': dict(sorted(figures.items()))
+        }, handle, indent=2)
+    os.replace(f'{path}.tmp', path)
+
+def location_figures(app, version, date_range, days, lokasi):
+    """
+    Figure laporan untuk satu lokasi: {nama grafik: figure}
+    Setiap tampilan dihitung sekali dengan filter lokasi tersebut
+    """
+    key = app.filter_key(date_range, [lokasi], days, version)
+    views = {}
+    figures = {}
+    for chart, (view, position) in REPORT_CHARTS.items():
+        if view not in views:
+            args = (lokasi,) if view == 'location_view' else ()
+            views[view] = getattr(app, view)(key, *args)
+        figures[chart] = views[view][position]
+    return figures
+
+# Engine kaleido milik proses worker ini: event loop (di thread sendiri) dan engine-nya
+_engine = {}
+
+def start_engine(timeout=RENDER_TIMEOUT_S):
+    """
+    Initializer worker: jalankan satu engine kaleido (Chrome) yang dipakai
+    ulang untuk setiap figure di proses ini
+    Kegagalan start (misalnya Chrome tidak terpasang) langsung menggagalkan
+    pool, bukan menggantung render
+    """
+    import kaleido
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    engine = kaleido.Kaleido(n=1, timeout=timeout)
+    asyncio.run_coroutine_threadsafe(engine.__aenter__(), loop).result()
+    _engine.update(loop=loop, kaleido=engine)
+    # Engine ditutup saat worker selesai (finalizer dijalankan multiprocessing)
+    multiprocessing.util.Finalize(None, stop_engine, exitpriority=10)
+
+def stop_engine():
+    """
+    Tutup engine kaleido worker beserta proses Chrome-nya
+    """
+    engine, loop = _engine.pop('kaleido', None), _engine.pop('loop', None)
+    if engine is not None:
+        asyncio.run_coroutine_threadsafe(engine.__aexit__(None, None, None), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+def render_figure(fig_json, path, fmt, width, height):
+    """
+    Render satu figure (JSON Plotly) ke file lewat engine kaleido worker
+    File sementara dipindahkan setelah selesai agar tidak pernah setengah jadi
+    """
+    render = _engine['kaleido'].calc_fig(json.loads(fig_json), opts={'format': fmt, 'width': width, 'height': height})
+    image = asyncio.run_coroutine_threadsafe(render, _engine['loop']).result()
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as handle:
+        handle.write(image)
+    os.replace(tmp_path, path)
+    return path
+
+def main(output_dir=REPORT_PATH, fmt='png', workers=REPORT_WORKERS, locations=None, last_days=None,
+         width=REPORT_WIDTH, height=REPORT_HEIGHT, force=False, sql_backend=False):
+    """
+    Bangun paket laporan: setiap grafik REPORT_CHARTS untuk setiap lokasi
+    Figure dibangun di proses utama dan langsung dikirim ke pool render, sehingga
+    pembangunan dan render berjalan bersamaan. Figure dengan digest yang sama
+    dengan run sebelumnya (dan file-nya masih ada) dilewati kecuali force=True
+    """
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Format laporan tidak dikenal: {fmt}")
+    app = dashboard_app(sql_backend, precomputed_views=True)
+    
+    print("=" * 60)
+    print("LAPORAN GRAFIK KEMACETAN LALU LINTAS")
+    print("=" * 60)
+    
+    version, (default_range, default_locations, default_days) = dashboard_options(app)
+    preset = {} if last_days is None else {'hari_terakhir': last_days}
+    date_range, _, days = preset_filters(preset, default_range, default_locations, default_days)
+    if locations is None:
+        locations = app.available_locations(app.filter_key(date_range, default_locations, days, version))
+    else:
+        unknown = [lokasi for lokasi in locations if lokasi not in default_locations]
+        if unknown:
+            raise UnknownLocationError(f"Lokasi tidak dikenal: {', '.join(unknown)} "
+                             f"(tersedia: {', '.join(default_locations)})")
+    print(f"Versi Data: {version[0]} (cube {version[1]})")
+    print(f"Periode: {date_range[0]} s/d {date_range[1]}, {len(locations)} lokasi, format {fmt}")
+    
+    os.makedirs(output_dir, exist_ok=True)
+    # Entri lokasi/format lain dari run sebelumnya tetap disimpan di manifest
+    figures = load_report_manifest(output_dir)
+    previous = {} if force else dict(figures)
+    rendered, skipped, failed = 0, 0, []
+    start = time.perf_counter()
+    
+    # spawn: worker tidak mewarisi state dashboard (thread, memory map) dari proses utama
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=start_engine, initargs=(RENDER_TIMEOUT_S,)) as executor:
+        pending = {}
+        for lokasi in locations:
+            directory = os.path.join(output_dir, location_slug(lokasi))
+            os.makedirs(directory, exist_ok=True)
+            for chart, fig in location_figures(app, version, date_range, days, lokasi).items():
+                name = f'{location_slug(lokasi)}/{chart}.{fmt}'
+                fig_json = fig.to_json()
+                digest = figure_digest(fig_json, fmt, width, height)
+                path = os.path.join(output_dir, name)
+                if previous.get(name) == digest and os.path.exists(path):
+                    skipped += 1
+                    continue
+                try:
+                    future = executor.submit(render_figure, fig_json, path, fmt, width, height)
+                except BrokenProcessPool as e:
+                    # Worker gagal start (engine kaleido): figure sisanya tidak dirender
+                    figures.pop(name, None)
+                    failed.append((name, e))
+                    continue
+                pending[future] = (name, digest)
+        
+        for future in as_completed(pending):
+            name, digest = pending[future]
+            try:
+                future.result()
+                figures[name] = digest
+                rendered += 1
+            except Exception as e:
+                figures.pop(name, None)
+                failed.append((name, e))
+    
+    save_report_manifest(output_dir, figures, version, date_range)
+    print(f"\n✓ {rendered} figure dirender, {skipped} tidak berubah (dilewati) "
+          f"dalam {time.perf_counter() - start:.2f} detik")
+    print(f"✓ Laporan disimpan di: {output_dir}")
+    if failed:
+        name, e = failed[0]
+        print(f"✗ {len(failed)} figure gagal dirender (pertama: {name}: {e!r})")
+    return {'rendered': rendered, 'skipped': skipped, 'failed': len(failed), 'output_dir': output_dir}
+
+def build_parser():
+    """
+    Parser argumen command line untuk generator laporan
+    """
+    parser = argparse.ArgumentParser(description="Laporan grafik kemacetan per lokasi (kaleido)")
+    parser.add_argument('--output', default=REPORT_PATH, help="Direktori paket laporan")
+    parser.add_argument('--format', default='png', choices=REPORT_FORMATS)
+    parser.add_argument('--workers', type=int, default=REPORT_WORKERS, help="Jumlah proses render")
+    parser.add_argument('--lokasi', nargs='+', default=None, help="Lokasi yang dilaporkan (default: semua)")
+    parser.add_argument('--hari-terakhir', type=int, default=None,
+                        help="Hanya N hari terakhir data (default: seluruh rentang)")
+    parser.add_argument('--width', type=int, default=REPORT_WIDTH)
+    parser.add_argument('--height', type=int, default=REPORT_HEIGHT)
+    parser.add_argument('--force', action='store_true', help="Render ulang semua figure")
+    parser.add_argument('--sql-backend', action='store_true',
+                        help="Hitung agregat dengan DuckDB langsung dari Parquet (membutuhkan duckdb)")
+    return parser
+
+def parse_args(argv=None):
+    """
+    Argumen command line untuk generator laporan
+    """
+    return build_parser().parse_args(argv)
+
+if __name__ == "__main__":
+    parser = build_parser()
+    args = parser.parse_args()
+    try:
+        result = main(
+            output_dir=args.output,
+            fmt=args.format,
+            workers=args.workers,
+            locations=args.lokasi,
+            last_days=args.hari_terakhir,
+            width=args.width,
+            height=args.height,
+            force=args.force,
+            sql_backend=args.sql_backend
+        )
+    except UnknownLocationError as e:
+        parser.error(str(e))
+    # Status keluar bukan nol bila ada figure yang gagal dirender (agar terdeteksi job terjadwal)
+    sys.exit(1 if result['failed'] else 0)
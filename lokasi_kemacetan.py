@@ -0,0 +1,325 @@
+"""
+Registry lokasi pemantauan kemacetan dan indeks spasialnya
+Lokasi dapat dimuat dari file CSV/GeoJSON; indeks grid mendukung query
+bounding box dan tetangga terdekat, serta clustering titik untuk peta
+Author: Data Science Team
+Date: February 2026
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from penyimpanan_kemacetan import STATUS_LABELS
+
+# Lokasi-lokasi strategis di Bandung yang sering macet
+LOKASI_KEMACETAN = [
+    {
+        "nama": "Jalan Pasteur",
+        "latitude": -6.9019,
+        "longitude": 107.5876,
+        "tipe": "Jalan Utama",
+        "base_speed": 30
+    },
+    {
+        "nama": "Jalan Soekarno-Hatta",
+        "latitude": -6.9389,
+        "longitude": 107.6317,
+        "tipe": "Jalan Utama",
+        "base_speed": 35
+    },
+    {
+        "nama": "Jalan Dago",
+        "latitude": -6.8705,
+        "longitude": 107.6142,
+        "tipe": "Jalan Wisata",
+        "base_speed": 25
+    },
+    {
+        "nama": "Jalan Buah Batu",
+        "latitude": -6.9515,
+        "longitude": 107.6349,
+        "tipe": "Jalan Utama",
+        "base_speed": 32
+    },
+    {
+        "nama": "Jalan Cibiru",
+        "latitude": -6.9258,
+        "longitude": 107.7105,
+        "tipe": "Jalan Pinggiran",
+        "base_speed": 40
+    },
+    {
+        "nama": "Jalan Kopo",
+        "latitude": -6.9667,
+        "longitude": 107.5667,
+        "tipe": "Jalan Utama",
+        "base_speed": 28
+    },
+    {
+        "nama": "Jalan Cihampelas",
+        "latitude": -6.8961,
+        "longitude": 107.5983,
+        "tipe": "Jalan Wisata",
+        "base_speed": 22
+    },
+    {
+        "nama": "Jalan Sukajadi",
+        "latitude": -6.8894,
+        "longitude": 107.5944,
+        "tipe": "Jalan Utama",
+        "base_speed": 30
+    },
+    {
+        "nama": "Jalan Ahmad Yani",
+        "latitude": -6.9147,
+        "longitude": 107.6192,
+        "tipe": "Jalan Utama",
+        "base_speed": 35
+    },
+    {
+        "nama": "Jalan Riau",
+        "latitude": -6.9053,
+        "longitude": 107.6147,
+        "tipe": "Jalan Pusat Kota",
+        "base_speed": 20
+    }
+]
+
+# Nilai default untuk registry yang tidak menyertakan tipe jalan atau kecepatan dasar
+DEFAULT_TIPE = 'Jalan Utama'
+DEFAULT_BASE_SPEED = 30
+
+# Ukuran sel grid indeks spasial dalam derajat (~1,1 km)
+GRID_CELL_DEG = 0.01
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.19
+
+# Peta Mapbox: lebar dunia pada zoom z adalah TILE_SIZE_PX * 2^z piksel
+TILE_SIZE_PX = 512
+
+# Radius cluster di layar; titik dalam satu sel selebar ini digabung
+CLUSTER_RADIUS_PX = 40
+
+def load_registry(path=None):
+    """
+    Muat registry lokasi dari file CSV atau GeoJSON
+    Tanpa path, dipakai daftar bawaan LOKASI_KEMACETAN
+    Setiap lokasi berupa dict dengan kunci nama, latitude, longitude, tipe, base_speed
+    """
+    if path is None:
+        return list(LOKASI_KEMACETAN)
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.geojson', '.json'):
+        registry = read_geojson_registry(path)
+    elif extension == '.csv':
+        registry = read_csv_registry(path)
+    else:
+        raise ValueError(f"Format registry tidak dikenal: {path}")
+    
+    names = [lokasi['nama'] for lokasi in registry]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Nama lokasi pada registry '{path}' harus unik")
+    return registry
+
+def read_csv_registry(path):
+    """
+    Registry dari CSV dengan kolom nama, latitude, longitude
+    (opsional: tipe, base_speed)
+    """
+    df = pd.read_csv(path)
+    missing = {'nama', 'latitude', 'longitude'} - set(df.columns)
+    if missing:
+        raise ValueError(f"Kolom registry tidak ditemukan: {sorted(missing)}")
+    if 'tipe' not in df:
+        df['tipe'] = DEFAULT_TIPE
+    if 'base_speed' not in df:
+        df['base_speed'] = DEFAULT_BASE_SPEED
+    df['tipe'] = df['tipe'].fillna(DEFAULT_TIPE)
+    df['base_speed'] = df['base_speed'].fillna(DEFAULT_BASE_SPEED)
+    return [
+        {
+            'nama': str(row.nama),
+            'latitude': float(row.latitude),
+            'longitude': float(row.longitude),
+            'tipe': str(row.tipe),
+            'base_speed': float(row.base_speed)
+        }
+        for row in df.itertuples(index=False)
+    ]
+
+def read_geojson_registry(path):
+    """
+    Registry dari FeatureCollection GeoJSON
+    Point dipakai langsung; LineString/MultiLineString (ruas jalan) diwakili
+    rata-rata titik-titiknya. Nama diambil dari properti 'nama' atau 'name'
+    """
+    with open(path, encoding='utf-8') as handle:
+        collection = json.load(handle)
+    
+    registry = []
+    for feature in collection.get('features', []):
+        geometry = feature.get('geometry') or {}
+        properties = feature.get('properties') or {}
+        if geometry.get('type') == 'Point':
+            lon, lat = geometry['coordinates'][:2]
+        elif geometry.get('type') in ('LineString', 'MultiLineString'):
+            lines = geometry['coordinates']
+            if geometry['type'] == 'LineString':
+                lines = [lines]
+            points = np.array([point[:2] for line in lines for point in line], dtype=np.float64)
+            lon, lat = points.mean(axis=0)
+        else:
+            continue
+        nama = properties.get('nama', properties.get('name'))
+        if nama is None:
+            raise ValueError("Setiap feature registry harus memiliki properti 'nama'")
+        registry.append({
+            'nama': str(nama),
+            'latitude': float(lat),
+            'longitude': float(lon),
+            'tipe': properties.get('tipe', DEFAULT_TIPE),
+            'base_speed': float(properties.get('base_speed', DEFAULT_BASE_SPEED))
+        })
+    return registry
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Jarak great-circle dalam km (mendukung array numpy)
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def build_spatial_index(latitudes, longitudes, cell_size=GRID_CELL_DEG):
+    """
+    Bangun indeks grid untuk titik-titik lokasi
+    Setiap titik diberi sel (kolom = bujur, baris = lintang); titik diurutkan
+    berdasarkan kunci sel sehingga satu kolom grid adalah potongan kontigu
+    dan rentang baris di dalamnya dapat dicari dengan searchsorted
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    rows = np.floor(latitudes / cell_size).astype(np.int64)
+    cols = np.floor(longitudes / cell_size).astype(np.int64)
+    row_min = rows.min() if len(rows) else 0
+    n_rows = (rows.max() - row_min + 1) if len(rows) else 1
+    keys = cols * n_rows + (rows - row_min)
+    order = np.argsort(keys, kind='stable')
+    return {
+        'latitude': latitudes,
+        'longitude': longitudes,
+        'cell_size': cell_size,
+        'row_min': row_min,
+        'n_rows': n_rows,
+        'order': order,
+        'keys': keys[order],
+        'cols': cols[order]
+    }
+
+def query_bbox(index, south, west, north, east):
+    """
+    Posisi titik (urut naik) di dalam bounding box
+    Hanya sel grid yang beririsan dengan box yang diperiksa
+    """
+    cell = index['cell_size']
+    col_lo, col_hi = int(np.floor(west / cell)), int(np.floor(east / cell))
+    row_lo = max(int(np.floor(south / cell)) - index['row_min'], 0)
+    row_hi = min(int(np.floor(north / cell)) - index['row_min'], index['n_rows'] - 1)
+    if row_lo > row_hi:
+        return np.array([], dtype=np.int64)
+    
+    # Kolom grid yang berisi titik dalam rentang bujur
+    cols = index['cols']
+    start, stop = cols.searchsorted(col_lo, 'left'), cols.searchsorted(col_hi, 'right')
+    present_cols = np.unique(cols[start:stop])
+    
+    # Di dalam setiap kolom, titik urut berdasarkan baris
+    keys = index['keys']
+    lo = keys.searchsorted(present_cols * index['n_rows'] + row_lo, 'left')
+    hi = keys.searchsorted(present_cols * index['n_rows'] + row_hi, 'right')
+    lengths = hi - lo
+    if lengths.sum() == 0:
+        return np.array([], dtype=np.int64)
+    offsets = np.repeat(lo - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+    candidates = index['order'][offsets + np.arange(lengths.sum())]
+    
+    # Sel di tepi box hanya sebagian berada di dalam box
+    lat = index['latitude'][candidates]
+    lon = index['longitude'][candidates]
+    inside = (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+    return np.sort(candidates[inside])
+
+def nearest(index, latitude, longitude, k=1):
+    """
+    k titik terdekat dari (latitude, longitude): (posisi, jarak km), urut dari terdekat
+    Box pencarian di sekitar titik diperbesar dua kali lipat sampai k titik
+    ditemukan di dalam lingkaran yang seluruhnya tercakup box
+    """
+    n_points = len(index['order'])
+    k = min(k, n_points)
+    if k == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+    
+    cos_lat = max(np.cos(np.radians(latitude)), 1e-6)
+    half_width = index['cell_size']
+    while True:
+        candidates = query_bbox(
+            index,
+            latitude - half_width, longitude - half_width / cos_lat,
+            latitude + half_width, longitude + half_width / cos_lat
+        )
+        distances = haversine_km(
+            latitude, longitude, index['latitude'][candidates], index['longitude'][candidates]
+        )
+        if len(candidates) >= k:
+            best = np.argsort(distances, kind='stable')[:k]
+            # Titik di luar box berjarak minimal ~half_width derajat lintang
+            if distances[best[-1]] <= 0.99 * half_width * KM_PER_DEGREE or len(candidates) == n_points:
+                return candidates[best], distances[best]
+        elif len(candidates) == n_points:
+            return candidates, distances
+        half_width *= 2
+
+def viewport_bounds(center_lat, center_lon, zoom, width_px=1200, height_px=600):
+    """
+    Bounding box (south, west, north, east) yang terlihat pada peta Mapbox
+    dengan pusat dan zoom tertentu
+    """
+    degrees_per_px = 360.0 / (TILE_SIZE_PX * 2 ** zoom)
+    half_lon = width_px / 2 * degrees_per_px
+    half_lat = height_px / 2 * degrees_per_px * np.cos(np.radians(center_lat))
+    return (center_lat - half_lat, center_lon - half_lon, center_lat + half_lat, center_lon + half_lon)
+
+def cluster_points(points, zoom, metrics, radius_px=CLUSTER_RADIUS_PX):
+    """
+    Gabungkan titik per lokasi (kolom lokasi, latitude, longitude, metrics dan
+    status_kemacetan) menjadi cluster grid sesuai zoom
+    Setiap cluster berisi jumlah lokasi, titik tengah, rata-rata metrik dan
+    status dominan; cluster dengan satu lokasi tetap memakai nama lokasinya
+    """
+    cell = radius_px * 360.0 / (TILE_SIZE_PX * 2 ** zoom)
+    rows = np.floor(points['latitude'].to_numpy() / cell).astype(np.int64)
+    cols = np.floor(points['longitude'].to_numpy() / cell).astype(np.int64)
+    codes, _ = pd.factorize(pd.MultiIndex.from_arrays([cols, rows]))
+    n_clusters = codes.max() + 1 if len(codes) else 0
+    
+    counts = np.bincount(codes, minlength=n_clusters)
+    clusters = pd.DataFrame({'jumlah_lokasi': counts})
+    for column in ['latitude', 'longitude'] + list(metrics):
+        clusters[column] = np.bincount(codes, weights=points[column].to_numpy(), minlength=n_clusters) / counts
+    
+    # Status dominan: seri dipecahkan dengan label terkecil secara alfabet
+    labels = sorted(STATUS_LABELS)
+    status_codes = pd.Index(labels).get_indexer(points['status_kemacetan'])
+    status_counts = np.bincount(
+        codes * len(labels) + status_codes, minlength=n_clusters * len(labels)
+    ).reshape(n_clusters, len(labels))
+    clusters['status_kemacetan'] = np.asarray(labels, dtype=object)[status_counts.argmax(axis=1)]
+    
+    first_names = points['lokasi'].to_numpy()[np.unique(codes, return_index=True)[1]]
+    clusters['lokasi'] = np.where(counts == 1, first_names, [f"{count} lokasi" for count in counts])
+    return clusters[['lokasi', 'latitude', 'longitude', 'jumlah_lokasi'] + list(metrics) + ['status_kemacetan']]
@@ -0,0 +1,199 @@
+"""
+Model kemacetan lalu lintas dalam bentuk tabel lookup
+Rentang tingkat kemacetan per (jam, weekend), status per tingkat dan nama hari
+dihitung sekali menjadi array; fungsi skalar dan fungsi array (per kolom)
+memakai tabel yang sama sehingga parameter model cukup diatur di satu tempat
+Author: Data Science Team
+Date: February 2026
+"""
+
+import json
+import random
+
+import numpy as np
+
+from penyimpanan_kemacetan import STATUS_LABELS, DAY_ORDER
+
+# Parameter model default; dapat ditimpa sebagian dari file JSON (load_model)
+DEFAULT_CONFIG = {
+    # Rentang tingkat kemacetan [min, max] per blok jam (inklusif)
+    'hour_bands': [
+        {'jam': [6, 9], 'weekday': [7, 10], 'weekend': [3, 5]},     # jam sibuk pagi
+        {'jam': [10, 16], 'weekday': [5, 7], 'weekend': [4, 7]},    # jam kerja
+        {'jam': [17, 20], 'weekday': [8, 10], 'weekend': [5, 8]}    # jam pulang kantor
+    ],
+    # Rentang untuk jam di luar blok di atas (jam malam)
+    'default_range': {'weekday': [3, 5], 'weekend': [4, 6]},
+    # Batas atas tingkat untuk setiap status pada STATUS_LABELS
+    'status_thresholds': [2, 4, 6, 8, 10],
+    # Kecepatan: pengurangan maksimal pada tingkat 10, variasi relatif dan batas bawah
+    'max_speed_reduction': 0.7,
+    'speed_variation': 0.1,
+    'min_speed': 5,
+    # Volume: kendaraan per tingkat, variasi absolut dan batas bawah
+    'volume_per_level': 300,
+    'volume_variation': 100,
+    'min_volume': 100
+}
+
+MAX_LEVEL = 10
+
+def build_model(config=None):
+    """
+    Bangun tabel lookup model dari konfigurasi (default: DEFAULT_CONFIG)
+    range_low/range_high berukuran (24 jam, 2) dengan kolom 0 = weekday dan
+    1 = weekend; status_codes memetakan tingkat 0-10 ke indeks STATUS_LABELS
+    Salinan berupa list Python (ranges, status_by_level) dipakai fungsi skalar
+    karena indexing list lebih cepat daripada indexing array per elemen
+    """
+    config = dict(DEFAULT_CONFIG, **(config or {}))
+    
+    range_low = np.empty((24, 2), dtype=np.int64)
+    range_high = np.empty((24, 2), dtype=np.int64)
+    for column, key in enumerate(('weekday', 'weekend')):
+        range_low[:, column], range_high[:, column] = config['default_range'][key]
+    for band in config['hour_bands']:
+        start, end = band['jam']
+        for column, key in enumerate(('weekday', 'weekend')):
+            range_low[start:end + 1, column], range_high[start:end + 1, column] = band[key]
+    if (range_low > range_high).any() or range_low.min() < 0 or range_high.max() > MAX_LEVEL:
+        raise ValueError("Rentang tingkat kemacetan harus 0 <= min <= max <= 10")
+    
+    thresholds = np.asarray(config['status_thresholds'], dtype=np.int64)
+    if len(thresholds) != len(STATUS_LABELS) or (np.diff(thresholds) < 0).any():
+        raise ValueError(f"status_thresholds harus berisi {len(STATUS_LABELS)} batas yang naik")
+    levels = np.arange(MAX_LEVEL + 1)
+    status_codes = np.minimum(np.searchsorted(thresholds, levels, side='left'), len(STATUS_LABELS) - 1)
+    
+    return {
+        'config': config,
+        'range_low': range_low,
+        'range_high': range_high,
+        'status_codes': status_codes,
+        'ranges': [list(zip(low, high)) for low, high in zip(range_low.tolist(), range_high.tolist())],
+        'status_by_level': [STATUS_LABELS[code] for code in status_codes],
+        'status_labels': np.array(STATUS_LABELS, dtype=object),
+        'day_names': np.array(DAY_ORDER, dtype=object)
+    }
+
+def load_model(path):
+    """
+    Muat model dari file JSON berisi sebagian atau seluruh kunci DEFAULT_CONFIG
+    """
+    with open(path, encoding='utf-8') as handle:
+        return build_model(json.load(handle))
+
+# Model aktif untuk fungsi-fungsi di bawah bila argumen model tidak diberikan
+DEFAULT_MODEL = build_model()
+
+def get_congestion_range(hour, weekday, model=None):
+    """
+    Rentang tingkat kemacetan (min, max) berdasarkan jam dan hari
+    """
+    return (model or DEFAULT_MODEL)['ranges'][hour % 24][weekday >= 5]
+
+def get_congestion_level(hour, weekday, model=None):
+    """
+    Tentukan tingkat kemacetan (1-10) berdasarkan jam dan hari
+    1 = Lancar, 10 = Sangat Macet
+    """
+    return random.randint(*get_congestion_range(hour, weekday, model))
+
+def calculate_speed(base_speed, congestion_level, model=None):
+    """
+    Hitung kecepatan rata-rata berdasarkan tingkat kemacetan
+    """
+    config = (model or DEFAULT_MODEL)['config']
+    # Semakin macet, semakin lambat
+    actual_speed = base_speed * (1 - (congestion_level / 10) * config['max_speed_reduction'])
+    
+    # Tambahkan sedikit variasi random
+    variation = random.uniform(-config['speed_variation'], config['speed_variation'])
+    return max(config['min_speed'], actual_speed * (1 + variation))
+
+def calculate_volume(congestion_level, model=None):
+    """
+    Hitung volume kendaraan per jam
+    """
+    config = (model or DEFAULT_MODEL)['config']
+    # Volume tinggi = kemacetan tinggi
+    variation = random.randint(-config['volume_variation'], config['volume_variation'])
+    return max(config['min_volume'], congestion_level * config['volume_per_level'] + variation)
+
+def calculate_travel_time_index(actual_speed, base_speed):
+    """
+    Hitung indeks waktu tempuh (1 = normal, 2 = 2x lebih lama)
+    """
+    return base_speed / actual_speed
+
+def get_status(congestion_level, model=None):
+    """
+    Konversi level numerik ke status deskriptif
+    """
+    level = min(max(int(congestion_level), 0), MAX_LEVEL)
+    return (model or DEFAULT_MODEL)['status_by_level'][level]
+
+def get_day_name(weekday, model=None):
+    """
+    Konversi nomor hari ke nama hari
+    """
+    return (model or DEFAULT_MODEL)['day_names'][weekday]
+
+def get_congestion_level_array(hours, weekdays, rng=None, model=None):
+    """
+    Versi array get_congestion_level: satu tingkat acak per pasangan (jam, hari)
+    rng adalah numpy.random.Generator (default: generator baru tanpa seed)
+    """
+    model = model or DEFAULT_MODEL
+    rng = rng if rng is not None else np.random.default_rng()
+    hours = np.asarray(hours) % 24
+    is_weekend = (np.asarray(weekdays) >= 5).astype(np.int64)
+    low = model['range_low'][hours, is_weekend]
+    high = model['range_high'][hours, is_weekend]
+    return rng.integers(low, high + 1)
+
+def calculate_speed_array(base_speed, congestion_level, rng=None, model=None):
+    """
+    Versi array calculate_speed
+    """
+    config = (model or DEFAULT_MODEL)['config']
+    rng = rng if rng is not None else np.random.default_rng()
+    actual_speed = np.asarray(base_speed) * (1 - (np.asarray(congestion_level) / 10) * config['max_speed_reduction'])
+    variation = rng.uniform(-config['speed_variation'], config['speed_variation'], np.shape(actual_speed))
+    return np.maximum(config['min_speed'], actual_speed * (1 + variation))
+
+def calculate_volume_array(congestion_level, rng=None, model=None):
+    """
+    Versi array calculate_volume
+    """
+    config = (model or DEFAULT_MODEL)['config']
+    rng = rng if rng is not None else np.random.default_rng()
+    congestion_level = np.asarray(congestion_level)
+    variation = rng.integers(-config['volume_variation'], config['volume_variation'] + 1, congestion_level.shape)
+    return np.maximum(config['min_volume'], congestion_level * config['volume_per_level'] + variation)
+
+def calculate_travel_time_index_array(actual_speed, base_speed):
+    """
+    Versi array calculate_travel_time_index
+    """
+    return np.asarray(base_speed) / np.asarray(actual_speed)
+
+def get_status_code_array(congestion_level, model=None):
+    """
+    Indeks STATUS_LABELS untuk setiap tingkat (untuk kolom categorical/take)
+    """
+    model = model or DEFAULT_MODEL
+    return model['status_codes'][np.clip(np.asarray(congestion_level), 0, MAX_LEVEL)]
+
+def get_status_array(congestion_level, model=None):
+    """
+    Versi array get_status (array object berisi label status)
+    """
+    model = model or DEFAULT_MODEL
+    return model['status_labels'][get_status_code_array(congestion_level, model)]
+
+def get_day_name_array(weekdays, model=None):
+    """
+    Versi array get_day_name
+    """
+    return (model or DEFAULT_MODEL)['day_names'][np.asarray(weekdays)]
@@ -0,0 +1,610 @@
+"""
+Penyimpanan dataset kemacetan lalu lintas dalam format kolumnar (Parquet)
+Dipakai bersama oleh script scraping dan dashboard Streamlit
+Author: Data Science Team
+Date: February 2026
+"""
+
+import glob
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Lokasi default dataset hasil scraping (direktori terpartisi per tanggal)
+DATA_PATH = 'kemacetan_dataset'
+
+# Skema eksplisit dataset kemacetan
+# Tanggal disimpan sebagai string ISO (YYYY-MM-DD) sehingga perbandingan
+# rentang tanggal tetap benar dan sama dengan format di dashboard
+SCHEMA = pa.schema([
+    ('tanggal', pa.string()),
+    ('hari', pa.string()),
+    ('jam', pa.string()),
+    ('lokasi', pa.string()),
+    ('latitude', pa.float64()),
+    ('longitude', pa.float64()),
+    ('tipe_jalan', pa.string()),
+    ('kecepatan_rata_rata_kmh', pa.float64()),
+    ('volume_kendaraan_per_jam', pa.int32()),
+    ('tingkat_kemacetan', pa.int8()),
+    ('indeks_waktu_tempuh', pa.float64()),
+    ('status_kemacetan', pa.string())
+])
+
+# Lokasi default rollup cube (agregat per tanggal, lokasi, jam)
+CUBE_PATH = 'kemacetan_cube'
+
+# Metrik numerik yang diringkas di rollup cube
+CUBE_METRICS = [
+    'kecepatan_rata_rata_kmh', 'volume_kendaraan_per_jam',
+    'tingkat_kemacetan', 'indeks_waktu_tempuh'
+]
+
+# Urutan status kemacetan dari paling lancar ke paling macet
+STATUS_LABELS = ['Sangat Lancar', 'Lancar', 'Ramai', 'Macet', 'Sangat Macet']
+
+# Urutan hari dalam seminggu
+DAY_ORDER = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu']
+
+# Skema ringkas untuk DataFrame di memori: kolom teks berkardinalitas
+# rendah menjadi categorical, angka memakai tipe terkecil yang cukup, dan
+# kolom teks tanggal + jam diganti satu kolom datetime64
+COMPACT_DTYPES = {
+    'hari': pd.CategoricalDtype(DAY_ORDER, ordered=True),
+    'lokasi': 'category',
+    'tipe_jalan': 'category',
+    'status_kemacetan': pd.CategoricalDtype(STATUS_LABELS, ordered=True),
+    'kecepatan_rata_rata_kmh': 'float32',
+    'volume_kendaraan_per_jam': 'int32',
+    'tingkat_kemacetan': 'int8',
+    'indeks_waktu_tempuh': 'float32'
+}
+
+def status_column(status):
+    """
+    Nama kolom jumlah baris per status di rollup cube
+    """
+    return 'status_' + status.lower().replace(' ', '_')
+
+# Skema rollup cube: grain (tanggal, lokasi, jam), atribut turunan (hari,
+# koordinat), jumlah baris, lalu sum/min/max per metrik dan jumlah per status
+CUBE_SCHEMA = pa.schema(
+    [
+        ('tanggal', pa.string()),
+        ('lokasi', pa.string()),
+        ('jam', pa.string()),
+        ('hari', pa.string()),
+        ('latitude', pa.float64()),
+        ('longitude', pa.float64()),
+        ('jumlah_data', pa.int64())
+    ]
+    + [
+        (f'{metric}_{agg}', pa.float64() if agg == 'sum' else SCHEMA.field(metric).type)
+        for metric in CUBE_METRICS
+        for agg in ('sum', 'min', 'max')
+    ]
+    + [(status_column(status), pa.int64()) for status in STATUS_LABELS]
+)
+
+# Lokasi default sketsa kuantil (bucket per sel tanggal, lokasi, jam)
+SKETCH_PATH = 'kemacetan_sketch'
+
+# Skema sketsa kuantil: satu baris per (sel cube, metrik, bucket) dengan
+# jumlah nilai di bucket tersebut (lihat kuantil_kemacetan)
+SKETCH_SCHEMA = pa.schema([
+    ('tanggal', pa.string()),
+    ('lokasi', pa.string()),
+    ('jam', pa.string()),
+    ('hari', pa.string()),
+    ('metrik', pa.string()),
+    ('bucket', pa.int16()),
+    ('jumlah', pa.int64())
+])
+
+# Partisi gaya Hive: satu direktori `tanggal=YYYY-MM-DD/` per hari
+PARTITIONING = ds.partitioning(pa.schema([('tanggal', pa.string())]), flavor='hive')
+
+def to_table(df, schema=SCHEMA):
+    """
+    Konversi DataFrame ke pyarrow.Table sesuai skema (default SCHEMA)
+    """
+    return pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+
+def clear_dataset(path=DATA_PATH):
+    """
+    Hapus dataset (direktori partisi atau file tunggal) jika ada
+    """
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+def write_partitions(df, path=DATA_PATH, shard_id=None, schema=SCHEMA):
+    """
+    Tulis DataFrame ke dataset terpartisi per tanggal
+    Tanpa shard_id, partisi tanggal yang sudah ada akan ditimpa dan partisi
+    lain tidak disentuh. Dengan shard_id, file diberi nama unik per shard dan
+    file shard lain di partisi yang sama dibiarkan, sehingga beberapa proses
+    dapat menulis ke tanggal yang sama
+    """
+    if shard_id is None:
+        behavior, basename = 'delete_matching', 'part-{i}.parquet'
+    else:
+        behavior, basename = 'overwrite_or_ignore', f'part-{shard_id}-{{i}}.parquet'
+    ds.write_dataset(
+        to_table(df, schema),
+        path,
+        format='parquet',
+        partitioning=PARTITIONING,
+        existing_data_behavior=behavior,
+        basename_template=basename,
+        file_options=ds.ParquetFileFormat().make_write_options(compression='zstd')
+    )
+
+def save_dataset(df, path=DATA_PATH):
+    """
+    Simpan DataFrame kemacetan sebagai dataset baru (isi lama dihapus)
+    """
+    clear_dataset(path)
+    write_partitions(df, path)
+
+def list_partitions(path=DATA_PATH):
+    """
+    Daftar tanggal partisi (string 'YYYY-MM-DD') yang ada di dataset, terurut
+    """
+    if not os.path.isdir(path):
+        return []
+    prefix = 'tanggal='
+    return sorted(
+        name[len(prefix):] for name in os.listdir(path)
+        if name.startswith(prefix) and os.path.isdir(os.path.join(path, name))
+    )
+
+def dataset_manifest(path=DATA_PATH):
+    """
+    Manifest dataset untuk kunci cache: {tanggal: ((nama_file, ukuran, mtime_ns), ...)}
+    Hanya metadata file yang dibaca (tanpa membuka Parquet). Dataset berupa
+    file tunggal dicatat dengan kunci None; dataset yang belum ada menghasilkan
+    manifest kosong
+    """
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return {None: ((os.path.basename(path), stat.st_size, stat.st_mtime_ns),)}
+    manifest = {}
+    for tanggal in list_partitions(path):
+        files = []
+        with os.scandir(os.path.join(path, f'tanggal={tanggal}')) as entries:
+            for entry in entries:
+                # File tersembunyi/metadata diabaikan, sama seperti pyarrow.dataset
+                if entry.is_file() and not entry.name.startswith(('.', '_')):
+                    stat = entry.stat()
+                    files.append((entry.name, stat.st_size, stat.st_mtime_ns))
+        manifest[tanggal] = tuple(sorted(files))
+    return manifest
+
+def manifest_version(manifest):
+    """
+    Versi ringkas (hash) dari manifest dataset
+    """
+    payload = json.dumps(sorted((str(tanggal), files) for tanggal, files in manifest.items()))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def read_watermark(path=DATA_PATH):
+    """
+    Watermark dataset: datetime data terbaru (tanggal + jam) atau None bila kosong
+    Hanya partisi tanggal terakhir yang dibaca sehingga biayanya konstan
+    """
+    partitions = list_partitions(path)
+    if not partitions:
+        return None
+    latest = partitions[-1]
+    jam = load_dataset(path, columns=['jam'], start_date=latest, end_date=latest)['jam']
+    if jam.empty:
+        return None
+    return pd.Timestamp(f"{latest} {jam.max()}")
+
+def read_hour_locations(path, timestamp):
+    """
+    Lokasi yang sudah memiliki baris untuk jam `timestamp` (tanggal + jam penuh)
+    Hanya partisi tanggal tersebut yang dibaca
+    """
+    tanggal = timestamp.strftime('%Y-%m-%d')
+    if tanggal not in list_partitions(path):
+        return set()
+    rows = load_dataset(path, columns=['jam', 'lokasi'], start_date=tanggal, end_date=tanggal)
+    return set(rows.loc[rows['jam'] == timestamp.strftime('%H:00'), 'lokasi'])
+
+def new_batch_id():
+    """
+    ID batch penulisan berbasis waktu (dipakai untuk nama direktori staging)
+    """
+    return pd.Timestamp.now().strftime('%Y%m%d%H%M%S%f')
+
+def staging_path(path, batch_id):
+    """
+    Direktori staging di samping dataset `path` untuk satu batch penulisan
+    """
+    return f"{path.rstrip(os.sep)}.staging-{batch_id}"
+
+def publish_dataset(staging, path):
+    """
+    Ganti dataset `path` dengan hasil staging setelah seluruhnya selesai ditulis
+    Dataset lama di-rename ke samping, staging di-rename ke `path` (keduanya
+    atomik), baru kemudian dataset lama dihapus; staging yang tidak ada (tidak
+    ada baris yang ditulis) menghasilkan dataset kosong seperti clear_dataset
+    """
+    old = f"{path.rstrip(os.sep)}.old-{os.getpid()}"
+    clear_dataset(old)
+    if os.path.lexists(path):
+        os.replace(path, old)
+    if os.path.exists(staging):
+        os.replace(staging, path)
+    clear_dataset(old)
+
+def append_partitions(df, path=DATA_PATH, batch_id=None, schema=SCHEMA):
+    """
+    Tambahkan baris baru ke dataset terpartisi secara atomik per file
+    Data ditulis dulu ke direktori staging di samping dataset lalu setiap
+    file dipindahkan dengan os.replace, sehingga pembaca tidak pernah melihat
+    file yang setengah jadi. File lama di partisi yang sama tidak disentuh
+    """
+    if df.empty:
+        return []
+    if batch_id is None:
+        batch_id = new_batch_id()
+    staging = staging_path(path, batch_id)
+    try:
+        write_partitions(df, staging, shard_id=f'append-{batch_id}', schema=schema)
+        moved = []
+        for partition in sorted(os.listdir(staging)):
+            target_dir = os.path.join(path, partition)
+            os.makedirs(target_dir, exist_ok=True)
+            for filename in sorted(os.listdir(os.path.join(staging, partition))):
+                target = os.path.join(target_dir, filename)
+                os.replace(os.path.join(staging, partition, filename), target)
+                moved.append(target)
+        return moved
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+def drop_partitions_before(path, cutoff_date):
+    """
+    Kebijakan retensi: hapus partisi dengan tanggal < cutoff_date
+    Partisi di-rename dulu (atomik) sebelum dihapus agar tidak terbaca setengah
+    """
+    cutoff = str(cutoff_date)
+    dropped = []
+    for tanggal in list_partitions(path):
+        if tanggal >= cutoff:
+            break
+        partition = os.path.join(path, f'tanggal={tanggal}')
+        trash = f"{path.rstrip(os.sep)}.trash-{tanggal}-{pd.Timestamp.now().strftime('%Y%m%d%H%M%S%f')}"
+        os.replace(partition, trash)
+        shutil.rmtree(trash, ignore_errors=True)
+        dropped.append(tanggal)
+    return dropped
+
+def build_filter(start_date=None, end_date=None, locations=None, partitions=None):
+    """
+    Bangun ekspresi filter pyarrow untuk predicate pushdown
+    start_date/end_date berupa string 'YYYY-MM-DD' atau objek date;
+    partitions adalah daftar tanggal partisi yang dibaca
+    """
+    expr = None
+    conditions = []
+    if start_date is not None:
+        conditions.append(ds.field('tanggal') >= str(start_date))
+    if end_date is not None:
+        conditions.append(ds.field('tanggal') <= str(end_date))
+    if locations is not None:
+        conditions.append(ds.field('lokasi').isin(list(locations)))
+    if partitions is not None:
+        conditions.append(ds.field('tanggal').isin([str(tanggal) for tanggal in partitions]))
+    for condition in conditions:
+        expr = condition if expr is None else expr & condition
+    return expr
+
+def load_dataset(path=DATA_PATH, columns=None, start_date=None, end_date=None, locations=None,
+                 partitions=None):
+    """
+    Baca dataset kemacetan dari Parquet (direktori terpartisi atau file tunggal)
+    Hanya kolom pada `columns` yang dibaca (column projection) dan filter
+    tanggal/lokasi diteruskan ke pembaca Parquet (predicate pushdown);
+    filter tanggal juga memangkas partisi yang tidak perlu dibuka
+    """
+    return _read_partitions(path, SCHEMA, columns, build_filter(start_date, end_date, locations, partitions))
+
+def load_cube(path=CUBE_PATH, columns=None, start_date=None, end_date=None, locations=None, partitions=None):
+    """
+    Baca rollup cube dari Parquet dengan projection dan filter yang sama
+    seperti load_dataset
+    """
+    return _read_partitions(path, CUBE_SCHEMA, columns, build_filter(start_date, end_date, locations, partitions))
+
+def load_sketch(path=SKETCH_PATH, columns=None, start_date=None, end_date=None, locations=None,
+                partitions=None):
+    """
+    Baca sketsa kuantil dari Parquet dengan projection dan filter yang sama
+    seperti load_dataset
+    """
+    return _read_partitions(path, SKETCH_SCHEMA, columns, build_filter(start_date, end_date, locations, partitions))
+
+def load_files(path, files, columns=None, schema=SCHEMA):
+    """
+    Baca file Parquet tertentu dari dataset terpartisi: files berisi pasangan
+    (tanggal, nama_file) seperti pada dataset_manifest; kolom tanggal tetap
+    diambil dari nama direktori partisi
+    """
+    paths = [os.path.join(path, f'tanggal={tanggal}', name) for tanggal, name in files]
+    dataset = ds.dataset(paths, schema=schema, format='parquet', partitioning=PARTITIONING,
+                         partition_base_dir=path)
+    return dataset.to_table(columns=list(columns) if columns is not None else schema.names).to_pandas()
+
+def _read_partitions(path, schema, columns, filter_expr):
+    dataset = ds.dataset(path, schema=schema, format='parquet', partitioning=PARTITIONING)
+    table = dataset.to_table(
+        columns=list(columns) if columns is not None else schema.names,
+        filter=filter_expr
+    )
+    return table.to_pandas()
+
+def combine_datetime(tanggal, jam):
+    """
+    Gabungkan kolom teks tanggal ('YYYY-MM-DD') dan jam ('HH:MM') menjadi datetime64
+    Hanya nilai unik yang di-parse dengan format tetap, lalu disebar ke seluruh baris
+    """
+    date_codes, date_values = pd.factorize(tanggal)
+    hour_codes, hour_values = pd.factorize(jam)
+    dates = pd.to_datetime(date_values, format='%Y-%m-%d').to_numpy()
+    hours = pd.to_timedelta([f'{value}:00' for value in hour_values]).to_numpy()
+    return pd.Series(dates[date_codes] + hours[hour_codes], index=tanggal.index, name='datetime')
+
+def compact_frame(df):
+    """
+    Konversi DataFrame kemacetan ke skema ringkas (COMPACT_DTYPES)
+    Kolom tanggal dan jam diganti satu kolom datetime64
+    """
+    datetime_column = df['datetime'] if 'datetime' in df else combine_datetime(df['tanggal'], df['jam'])
+    compact = df.drop(columns=['tanggal', 'jam', 'datetime'], errors='ignore')
+    compact = compact.astype({
+        column: dtype for column, dtype in COMPACT_DTYPES.items() if column in compact
+    })
+    compact.insert(0, 'datetime', datetime_column)
+    return compact
+
+def load_traffic_frame(path=DATA_PATH, columns=None, start_date=None, end_date=None, locations=None,
+                       compact=False, partitions=None):
+    """
+    Muat dataset sebagai frame siap pakai untuk dashboard: kolom datetime
+    ditambahkan, opsional skema ringkas, dan diurutkan per datetime + lokasi
+    """
+    df = load_dataset(
+        path, columns=columns, start_date=start_date, end_date=end_date, locations=locations,
+        partitions=partitions
+    )
+    df['datetime'] = combine_datetime(df['tanggal'], df['jam'])
+    if compact:
+        df = compact_frame(df)
+    return df.sort_values(['datetime', 'lokasi'], kind='stable', ignore_index=True)
+
+def partition_mask(frame, partitions):
+    """
+    Mask baris frame yang berasal dari partisi tanggal tertentu
+    (kolom teks tanggal, atau kolom datetime pada skema ringkas)
+    """
+    if 'tanggal' in frame:
+        return frame['tanggal'].isin([str(tanggal) for tanggal in partitions]).to_numpy()
+    days = frame['datetime'].to_numpy().astype('datetime64[D]')
+    return np.isin(days, np.array(list(partitions), dtype='datetime64[D]'))
+
+def concat_frames(head, tail):
+    """
+    Gabungkan dua frame berskema sama tanpa mengubah tipe kolom: kolom
+    categorical dengan kategori berbeda disatukan dulu (kategori terurut)
+    agar tidak berubah menjadi object
+    """
+    if tail.empty:
+        return head
+    if head.empty:
+        return tail
+    for column in head.columns:
+        head_dtype, tail_dtype = head[column].dtype, tail[column].dtype
+        if isinstance(head_dtype, pd.CategoricalDtype) and head_dtype != tail_dtype:
+            categories = head_dtype.categories.union(tail_dtype.categories)
+            head = head.assign(**{column: head[column].cat.set_categories(categories)})
+            tail = tail.assign(**{column: tail[column].cat.set_categories(categories)})
+    return pd.concat([head, tail], ignore_index=True)
+
+def refresh_frame(frame, old_manifest, manifest, read_partitions, sort_keys):
+    """
+    Perbarui frame hasil baca dataset mengikuti manifest terbaru
+    Hanya partisi yang baru atau berubah yang dibaca ulang melalui
+    read_partitions(daftar_tanggal); baris partisi yang berubah atau hilang
+    dibuang dari frame lama. read_partitions(None) membaca seluruh dataset
+    (frame belum ada atau dataset berupa file tunggal). Frame lama dan hasil
+    read_partitions sudah urut menurut sort_keys; pengurutan ulang hanya
+    dilakukan bila partisi baru tidak seluruhnya berada di akhir
+    """
+    if frame is None or old_manifest is None or None in manifest or None in old_manifest:
+        return read_partitions(None)
+    if manifest == old_manifest:
+        return frame
+    
+    changed = sorted(tanggal for tanggal, files in manifest.items() if old_manifest.get(tanggal) != files)
+    stale = [tanggal for tanggal, files in old_manifest.items() if manifest.get(tanggal) != files]
+    kept = frame[~partition_mask(frame, stale)] if stale else frame
+    if not changed:
+        return kept.reset_index(drop=True)
+    
+    merged = concat_frames(kept, read_partitions(changed))
+    remaining = [tanggal for tanggal in old_manifest if tanggal not in set(stale)]
+    if remaining and changed[0] <= max(remaining):
+        merged = merged.sort_values(sort_keys, kind='stable', ignore_index=True)
+    return merged
+
+def writer_tmp_path(path):
+    """
+    Path file sementara milik penulis ini (pid + thread): sesi atau proses lain
+    yang menulis path yang sama memakai file sementara sendiri, dan pemenang
+    os.replace terakhir selalu berupa file yang lengkap
+    """
+    return f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'
+
+def remove_quietly(path):
+    """
+    Hapus file bila masih ada (file bisa sudah dihapus penulis/pembersih lain)
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def shared_frame_path(shared_path, version):
+    """
+    File Arrow bersama untuk satu versi dataset
+    """
+    return f'{shared_path}-{version}.arrow'
+
+def write_shared_frame(df, path):
+    """
+    Tulis frame sebagai file Arrow IPC tanpa kompresi sehingga bisa di-memory-map
+    File sementara dipindahkan secara atomik agar pembaca lain tidak pernah
+    melihat file setengah jadi
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = writer_tmp_path(path)
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    return path
+
+def open_shared_frame(path):
+    """
+    Buka file Arrow bersama lewat memory map: kolom numerik, datetime dan kode
+    categorical menjadi array numpy read-only di atas page cache OS, sehingga
+    semua proses yang membuka versi yang sama berbagi memori fisik yang sama
+    """
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    return table.to_pandas(split_blocks=True, self_destruct=False)
+
+def share_frame(frame, shared_path, version):
+    """
+    Jadikan frame milik versi `version` sebagai frame bersama: tulis file Arrow
+    bila belum ada, buka lewat memory map dan hapus file versi lama
+    File ditulis utuh untuk setiap versi (biaya sebanding ukuran frame): file
+    per partisi atau batch yang ditambahkan akan menghasilkan kolom berpotongan
+    yang harus disalin saat diubah ke pandas, sehingga tidak lagi zero-copy
+    """
+    os.makedirs(os.path.dirname(shared_path) or '.', exist_ok=True)
+    path = shared_frame_path(shared_path, version)
+    if not os.path.exists(path):
+        write_shared_frame(frame, path)
+    try:
+        shared = open_shared_frame(path)
+    except FileNotFoundError:
+        # Dihapus proses lain yang sudah berpindah ke versi lain di antara
+        # pemeriksaan dan pembukaan: pakai frame di memori untuk versi ini
+        return frame
+    # File versi lama yang masih di-map proses lain tetap valid sampai ditutup
+    for old_path in glob.glob(shared_frame_path(glob.escape(shared_path), '*')):
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+    return shared
+
+def restore_text_columns(df):
+    """
+    Tambahkan kembali kolom teks tanggal dan jam dari kolom datetime
+    (untuk tampilan dan ekspor dari frame dengan skema ringkas)
+    """
+    if 'tanggal' in df and 'jam' in df:
+        return df
+    return df.assign(
+        tanggal=df['datetime'].dt.strftime('%Y-%m-%d'),
+        jam=df['datetime'].dt.strftime('%H:%M')
+    )
+
+def memory_report(before, after):
+    """
+    Laporan pemakaian memori (bytes) per kolom sebelum dan sesudah konversi
+    """
+    before_usage = before.memory_usage(index=False, deep=True)
+    after_usage = after.memory_usage(index=False, deep=True)
+    columns = list(before.columns) + [column for column in after.columns if column not in before.columns]
+    report = pd.DataFrame({'bytes_sebelum': before_usage, 'bytes_sesudah': after_usage}).reindex(columns)
+    report = report.fillna(0).astype('int64')
+    report.loc['TOTAL'] = report.sum()
+    report['rasio'] = (report['bytes_sesudah'] / report['bytes_sebelum'].where(report['bytes_sebelum'] > 0)).round(3)
+    report.index.name = 'kolom'
+    return report
+
+# Jumlah baris per potongan saat ekspor bertahap
+EXPORT_CHUNK_ROWS = 100_000
+
+def export_frame(df, path, fmt='csv', compress=False, columns=None, chunk_rows=EXPORT_CHUNK_ROWS,
+                 positions=None):
+    """
+    Ekspor DataFrame ke CSV (opsional gzip) atau Parquet secara bertahap
+    Data ditulis per potongan `chunk_rows` baris ke file sementara lalu
+    dipindahkan ke `path`, sehingga string CSV lengkap tidak pernah dibuat
+    di memori dan file yang belum selesai tidak pernah terlihat
+    positions (slice atau array posisi baris) membatasi baris yang diekspor
+    tanpa menyalin frame terfilter terlebih dahulu
+    """
+    if fmt not in ('csv', 'parquet'):
+        raise ValueError(f"Format ekspor tidak dikenal: {fmt}")
+    rows = np.arange(len(df))[positions] if positions is not None else None
+    n_rows = len(df) if rows is None else len(rows)
+    
+    def chunks():
+        # Minimal satu potongan agar header/skema tetap ditulis untuk data kosong
+        for start in range(0, max(n_rows, 1), chunk_rows):
+            part = slice(start, start + chunk_rows) if rows is None else rows[start:start + chunk_rows]
+            chunk = restore_text_columns(df.iloc[part])
+            yield chunk if columns is None else chunk[columns]
+    
+    tmp_path = writer_tmp_path(path)
+    try:
+        if fmt == 'csv':
+            opener = gzip.open if compress else open
+            with opener(tmp_path, 'wt', newline='', encoding='utf-8') as handle:
+                for i, chunk in enumerate(chunks()):
+                    chunk.to_csv(handle, index=False, header=(i == 0))
+        else:
+            writer = None
+            try:
+                for chunk in chunks():
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(tmp_path, table.schema, compression='zstd')
+                    writer.write_table(table)
+            finally:
+                if writer is not None:
+                    writer.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        remove_quietly(tmp_path)
+        raise
+    return path
+
+def export_excel(df, path):
+    """
+    Ekspor DataFrame kemacetan ke Excel (hanya untuk keperluan ekspor)
+    Excel dibatasi 1.048.576 baris per sheet
+    """
+    max_rows = 1_048_575
+    if len(df) > max_rows:
+        raise ValueError(f"Data ({len(df)} baris) melebihi batas baris Excel ({max_rows})")
+    df.to_excel(path, index=False)
@@ -0,0 +1,285 @@
+"""
+Precompute agregat dan figure dashboard kemacetan lalu lintas (tanpa browser)
+Dijalankan setelah scraping: hasil setiap tampilan untuk filter default dan
+preset filter yang sering dipakai disimpan ke cache disk (tabel sebagai
+Parquet, figure sebagai JSON Plotly), lalu dibaca dashboard sebelum menghitung
+Author: Data Science Team
+Date: February 2026
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Lokasi default cache disk hasil precompute (satu subdirektori per versi data)
+PRECOMPUTE_PATH = 'kemacetan_precompute'
+
+# Nama file deskripsi isi setiap entri cache
+ENTRY_MANIFEST = 'entry.json'
+
+def version_dir(cache_dir, version):
+    """
+    Direktori cache untuk satu versi data (tuple versi manifest data dan cube)
+    """
+    return os.path.join(cache_dir, 'v-' + '-'.join(str(part) for part in version))
+
+def entry_path(cache_dir, version, name, args):
+    """
+    Direktori satu entri cache: nama tampilan + hash argumennya
+    Argumen dinormalisasi lewat JSON (tuple menjadi list, tanggal menjadi string)
+    """
+    payload = json.dumps([name, args], default=str, sort_keys=True)
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+    return os.path.join(version_dir(cache_dir, version), f'{name}-{digest}')
+
+def _encode(value, directory, files):
+    """
+    Deskripsi JSON satu nilai hasil tampilan; figure, DataFrame dan array
+    ditulis ke file tersendiri di directory
+    """
+    if isinstance(value, go.Figure):
+        filename = f'{len(files)}.json'
+        with open(os.path.join(directory, filename), 'w', encoding='utf-8') as handle:
+            handle.write(value.to_json())
+        files.append(filename)
+        return {'type': 'figure', 'file': filename}
+    if isinstance(value, pd.DataFrame):
+        filename = f'{len(files)}.parquet'
+        value.to_parquet(os.path.join(directory, filename))
+        files.append(filename)
+        return {'type': 'table', 'file': filename}
+    if isinstance(value, np.ndarray):
+        filename = f'{len(files)}.npy'
+        np.save(os.path.join(directory, filename), value, allow_pickle=False)
+        files.append(filename)
+        return {'type': 'array', 'file': filename}
+    if isinstance(value, (tuple, list)):
+        return {
+            'type': 'tuple' if isinstance(value, tuple) else 'list',
+            'items': [_encode(item, directory, files) for item in value]
+        }
+    if isinstance(value, dict):
+        return {'type': 'dict', 'items': {key: _encode(item, directory, files) for key, item in value.items()}}
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is not None and not isinstance(value, (bool, int, float, str)):
+        raise TypeError(f"Tipe hasil tidak dapat disimpan ke cache: {type(value).__name__}")
+    return {'type': 'value', 'value': value}
+
+def _decode(spec, directory):
+    """
+    Kebalikan _encode
+    """
+    kind = spec['type']
+    if kind == 'figure':
+        with open(os.path.join(directory, spec['file']), encoding='utf-8') as handle:
+            return pio.from_json(handle.read())
+    if kind == 'table':
+        return pd.read_parquet(os.path.join(directory, spec['file']))
+    if kind == 'array':
+        return np.load(os.path.join(directory, spec['file']), allow_pickle=False)
+    if kind in ('tuple', 'list'):
+        items = [_decode(item, directory) for item in spec['items']]
+        return tuple(items) if kind == 'tuple' else items
+    if kind == 'dict':
+        return {key: _decode(item, directory) for key, item in spec['items'].items()}
+    return spec['value']
+
+def save_precomputed(cache_dir, version, name, args, result):
+    """
+    Simpan hasil satu tampilan ke cache disk
+    Entri ditulis ke direktori sementara lalu di-rename, sehingga dashboard
+    tidak pernah membaca entri yang setengah jadi
+    """
+    path = entry_path(cache_dir, version, name, args)
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    files = []
+    spec = _encode(result, tmp_path, files)
+    with open(os.path.join(tmp_path, ENTRY_MANIFEST), 'w', encoding='utf-8') as handle:
+        json.dump({'name': name, 'args': args, 'result': spec}, handle, default=str)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return path
+
+def load_precomputed(cache_dir, version, name, args):
+    """
+    Hasil tampilan dari cache disk, atau None bila belum di-precompute
+    (entri rusak juga dianggap tidak ada)
+    """
+    path = entry_path(cache_dir, version, name, args)
+    try:
+        with open(os.path.join(path, ENTRY_MANIFEST), encoding='utf-8') as handle:
+            spec = json.load(handle)['result']
+        return _decode(spec, path)
+    except (OSError, ValueError, KeyError):
+        return None
+
+def clear_precomputed(cache_dir=PRECOMPUTE_PATH, keep_version=None):
+    """
+    Hapus cache versi data lama (semua versi bila keep_version None)
+    """
+    if not os.path.isdir(cache_dir):
+        return []
+    keep = os.path.basename(version_dir(cache_dir, keep_version)) if keep_version is not None else None
+    removed = []
+    for name in sorted(os.listdir(cache_dir)):
+        if name != keep:
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+            removed.append(name)
+    return removed
+
+def load_presets(path):
+    """
+    Preset filter dari file JSON: list objek dengan kunci opsional
+    nama, tanggal ([awal, akhir]), hari_terakhir (N hari terakhir data),
+    lokasi dan hari; kunci yang tidak ada memakai filter default dashboard
+    """
+    with open(path, encoding='utf-8') as handle:
+        presets = json.load(handle)
+    if not isinstance(presets, list):
+        raise ValueError("File preset harus berisi list objek filter")
+    return presets
+
+def preset_filters(preset, default_range, default_locations, default_days):
+    """
+    Nilai filter (rentang tanggal, lokasi, hari) untuk satu preset, sesuai
+    pilihan widget dashboard (rentang dibatasi pada rentang data)
+    """
+    min_date, max_date = default_range
+    if 'hari_terakhir' in preset:
+        start, end = max_date - timedelta(days=int(preset['hari_terakhir']) - 1), max_date
+    elif 'tanggal' in preset:
+        start, end = (date.fromisoformat(str(value)) for value in preset['tanggal'])
+    else:
+        start, end = min_date, max_date
+    date_range = (min(max(start, min_date), max_date), max(min(end, max_date), min_date))
+    locations = [lokasi for lokasi in preset.get('lokasi', default_locations) if lokasi in default_locations]
+    days = [day for day in preset.get('hari', default_days) if day in default_days]
+    return date_range, locations, days
+
+def warm_views(app, key, cache_dir, all_locations=False):
+    """
+    Hitung setiap tampilan dashboard untuk satu kunci filter dengan pilihan
+    widget default, lalu simpan hasilnya. Mengembalikan [(nama, detik)]
+    """
+    version = key[0]
+    timings = []
+    
+    def warm(name, *args):
+        start = time.perf_counter()
+        result = getattr(app, name)(key, *args)
+        save_precomputed(cache_dir, version, name, (key,) + args, result)
+        timings.append((name, time.perf_counter() - start))
+        return result
+    
+    warm('temporal_view')
+    location_stats, _ = warm('map_locations')
+    warm('map_view', app.map_center(location_stats, app.MAP_ALL_LOCATIONS), app.DEFAULT_MAP_ZOOM)
+    locations = warm('available_locations')
+    percentile_metric = list(app.PERCENTILE_METRICS)[0]
+    for lokasi in (locations if all_locations else locations[:1]):
+        warm('location_view', lokasi)
+        if app.PERCENTILE_CHARTS:
+            warm('location_percentile_view', lokasi, percentile_metric, app.sketch_version())
+    warm('rush_hour_view')
+    if app.PERCENTILE_CHARTS:
+        warm('rush_hour_percentile_view', app.sketch_version())
+    warm('table_view_data', *app.DEFAULT_TABLE_VIEW)
+    return timings
+
+def dashboard_app(sql_backend=False, precomputed_views=False):
+    """
+    Modul dashboard dalam mode tanpa server Streamlit (log dibatasi error),
+    agar fungsi tampilan yang dipakai sama persis dengan dashboard
+    """
+    import streamlit.logger
+    from streamlit import config
+    config.set_option('logger.level', 'error')
+    streamlit.logger.set_log_level('error')
+    import app_visualisasi_dan_gis as app
+    app.PRECOMPUTED_VIEWS = precomputed_views
+    app.SQL_BACKEND = sql_backend
+    return app
+
+def dashboard_options(app):
+    """
+    Versi data (manifest data, cube) dan pilihan filter default dashboard:
+    (versi, (rentang tanggal, lokasi, hari))
+    """
+    if app.SQL_BACKEND:
+        version = app.sql_versions()
+        return version, app.sql_filter_options(version)
+    df, data_index, data_version = app.load_data()
+    cube, cube_index, cube_version = app.load_cube_data()
+    if df is None or cube is None:
+        raise SystemExit(f"Gagal memuat data dari '{app.DATA_PATH}' / '{app.CUBE_PATH}'")
+    return (data_version, cube_version), app.default_filters(data_index)
+
+def main(cache_dir=PRECOMPUTE_PATH, presets_path=None, all_locations=False, sql_backend=False):
+    """
+    Precompute seluruh tampilan untuk filter default dan preset filter
+    Cache versi data lama dihapus setelah versi baru selesai ditulis
+    sql_backend=True menghitung agregat lewat DuckDB tanpa memuat data ke memori
+    """
+    app = dashboard_app(sql_backend)
+    
+    print("=" * 60)
+    print("PRECOMPUTE DASHBOARD KEMACETAN")
+    print("=" * 60)
+    
+    version, options = dashboard_options(app)
+    data_version, cube_version = version
+    print(f"Versi Data: {data_version} (cube {cube_version})")
+    
+    default_range, default_locations, default_days = options
+    presets = [{'nama': 'Default'}] + (load_presets(presets_path) if presets_path else [])
+    
+    start = time.perf_counter()
+    n_entries = 0
+    for preset in presets:
+        date_range, locations, days = preset_filters(preset, default_range, default_locations, default_days)
+        key = app.filter_key(date_range, locations, days, version)
+        timings = warm_views(app, key, cache_dir, all_locations)
+        n_entries += len(timings)
+        print(f"  {preset.get('nama', 'Preset')}: {len(timings)} tampilan dalam "
+              f"{sum(seconds for _, seconds in timings):.2f} detik")
+    
+    removed = clear_precomputed(cache_dir, keep_version=version)
+    print(f"\n✓ {n_entries} entri cache ditulis ke: {version_dir(cache_dir, version)}")
+    print(f"✓ Total waktu: {time.perf_counter() - start:.2f} detik")
+    if removed:
+        print(f"✓ {len(removed)} versi cache lama dihapus")
+    return {'version': version, 'entries': n_entries, 'cache_dir': cache_dir}
+
+def parse_args(argv=None):
+    """
+    Argumen command line untuk job precompute
+    """
+    parser = argparse.ArgumentParser(description="Precompute agregat dan figure dashboard kemacetan")
+    parser.add_argument('--output', default=PRECOMPUTE_PATH, help="Direktori cache precompute")
+    parser.add_argument('--presets', default=None, help="File JSON berisi list preset filter")
+    parser.add_argument('--all-locations', action='store_true',
+                        help="Precompute tab Analisis Lokasi untuk setiap lokasi (default: lokasi pertama)")
+    parser.add_argument('--sql-backend', action='store_true',
+                        help="Hitung agregat dengan DuckDB langsung dari Parquet (membutuhkan duckdb)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(
+        cache_dir=args.output,
+        presets_path=args.presets,
+        all_locations=args.all_locations,
+        sql_backend=args.sql_backend
+    )
@@ -0,0 +1,168 @@
+"""
+Instrumentasi hot-path dashboard kemacetan lalu lintas
+Mencatat durasi, jumlah baris dan alokasi memori per tahap main() dan
+setiap tab, untuk ditampilkan di panel performa dan ditambahkan ke log JSON-lines
+tracemalloc berlaku untuk seluruh proses, sedangkan Streamlit menjalankan
+setiap sesi di thread sendiri: tracing dinyalakan oleh sesi pertama dan
+dimatikan oleh sesi terakhir (reference count), dan alokasi yang dilaporkan
+mencakup seluruh proses
+Author: Data Science Team
+Date: February 2026
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+# Lokasi default log profiling (satu baris JSON per tahap)
+PROFILE_LOG_PATH = 'kemacetan_profile.jsonl'
+
+# Log yang melewati ukuran ini dipindahkan ke '<log>.1' (satu generasi disimpan)
+PROFILE_LOG_MAX_BYTES = 10 * 2**20
+
+# State tracemalloc bersama semua sesi di proses ini (dijaga _tracing_lock):
+# jumlah sesi yang sedang melacak memori dan apakah tracing dinyalakan oleh
+# modul ini (tracing yang sudah aktif sebelumnya tidak dimatikan)
+_tracing_lock = threading.Lock()
+_tracing = {'users': 0, 'owner': False}
+
+# Penulisan log dari beberapa sesi (thread) sekaligus
+_log_lock = threading.Lock()
+
+def start_profile(enabled=True, trace_memory=True):
+    """
+    Mulai sesi profiling untuk satu kali rerun dashboard
+    Bila trace_memory aktif, sesi ikut memakai tracemalloc sampai finish_profile;
+    hanya sesi pertama yang menyalakannya
+    """
+    tracing = enabled and trace_memory
+    if tracing:
+        with _tracing_lock:
+            if _tracing['users'] == 0:
+                _tracing['owner'] = not tracemalloc.is_tracing()
+                if _tracing['owner']:
+                    tracemalloc.start()
+            _tracing['users'] += 1
+    return {
+        'enabled': enabled,
+        'run_id': uuid.uuid4().hex[:12],
+        'tracing': tracing,
+        'open_stages': [],
+        'records': []
+    }
+
+@contextmanager
+def profile_stage(profile, name, rows=None):
+    """
+    Ukur satu tahap: durasi, jumlah baris dan memori yang dialokasikan
+    Jumlah baris dapat diisi di dalam blok melalui stage['rows']
+    Alokasi dan puncak memori mencakup seluruh proses (termasuk sesi lain yang
+    berjalan bersamaan). Puncak hanya diukur bila sesi ini satu-satunya yang
+    melacak memori, karena tracemalloc.reset_peak() berlaku untuk semua sesi;
+    puncak yang sudah tercapai diteruskan ke tahap luar sebelum di-reset
+    """
+    stage = {'stage': name, 'rows': rows}
+    if profile is None or not profile['enabled']:
+        yield stage
+        return
+
+    memory = None
+    if profile['tracing']:
+        with _tracing_lock:
+            before, peak = tracemalloc.get_traced_memory()
+            exclusive = _tracing['users'] == 1
+            if exclusive:
+                for outer in profile['open_stages']:
+                    if outer['peak'] is not None:
+                        outer['peak'] = max(outer['peak'], peak)
+                tracemalloc.reset_peak()
+        memory = {'before': before, 'peak': before if exclusive else None}
+        profile['open_stages'].append(memory)
+    start = time.perf_counter()
+    try:
+        yield stage
+    finally:
+        stage['seconds'] = time.perf_counter() - start
+        if memory is not None:
+            profile['open_stages'].pop()
+            current, peak = tracemalloc.get_traced_memory()
+            stage['allocated_bytes'] = current - memory['before']
+            if memory['peak'] is not None:
+                stage['peak_bytes'] = max(memory['peak'], peak) - memory['before']
+        profile['records'].append(stage)
+
+def profile_call(profile, name, func, *args, rows=None, **kwargs):
+    """
+    Jalankan func(*args, **kwargs) sebagai satu tahap; jumlah baris diambil
+    dari len(hasil) bila rows tidak diberikan
+    """
+    with profile_stage(profile, name, rows) as stage:
+        result = func(*args, **kwargs)
+        if stage['rows'] is None and hasattr(result, '__len__'):
+            stage['rows'] = len(result)
+    return result
+
+def finish_profile(profile, log_path=PROFILE_LOG_PATH):
+    """
+    Akhiri sesi profiling: lepas tracemalloc (dimatikan oleh sesi terakhir),
+    tambahkan catatan ke log JSON-lines dan kembalikan ringkasan dalam bentuk DataFrame
+    """
+    if profile is None or not profile['enabled']:
+        return None
+    if profile['tracing']:
+        profile['tracing'] = False
+        with _tracing_lock:
+            _tracing['users'] -= 1
+            if _tracing['users'] == 0 and _tracing['owner']:
+                tracemalloc.stop()
+                _tracing['owner'] = False
+
+    timestamp = datetime.now().isoformat(timespec='seconds')
+    records = [
+        dict(record, run_id=profile['run_id'], timestamp=timestamp)
+        for record in profile['records']
+    ]
+    if log_path and records:
+        append_profile_log(records, log_path)
+    return profile_summary(records)
+
+def append_profile_log(records, log_path=PROFILE_LOG_PATH, max_bytes=PROFILE_LOG_MAX_BYTES):
+    """
+    Tambahkan catatan ke log JSON-lines; log yang sudah melewati max_bytes
+    dipindahkan ke '<log>.1' lebih dulu sehingga ukuran log tetap terbatas
+    """
+    lines = ''.join(json.dumps(record, default=str) + '\n' for record in records)
+    with _log_lock:
+        try:
+            if os.path.getsize(log_path) > max_bytes:
+                os.replace(log_path, f'{log_path}.1')
+        except FileNotFoundError:
+            pass
+        with open(log_path, 'a', encoding='utf-8') as handle:
+            handle.write(lines)
+
+def profile_summary(records):
+    """
+    Tabel ringkas catatan profiling, urut dari tahap paling lambat
+    """
+    columns = ['stage', 'seconds', 'rows', 'allocated_bytes', 'peak_bytes']
+    summary = pd.DataFrame(records).reindex(columns=columns)
+    summary['ms'] = (summary['seconds'] * 1000).round(2)
+    # Memori diukur untuk seluruh proses, bukan hanya sesi ini
+    summary['alokasi_proses_mib'] = (summary['allocated_bytes'] / 2**20).round(2)
+    summary['puncak_proses_mib'] = (summary['peak_bytes'] / 2**20).round(2)
+    summary = summary.sort_values('seconds', ascending=False)
+    return summary[['stage', 'ms', 'rows', 'alokasi_proses_mib', 'puncak_proses_mib']]
+
+def read_profile_log(log_path=PROFILE_LOG_PATH):
+    """
+    Baca log profiling JSON-lines sebagai DataFrame
+    """
+    return pd.read_json(log_path, lines=True)
@@ -6,111 +6,70 @@ Date: February 2026
 """
 
 import pandas as pd
+import numpy as np
 import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
-import json
 
-# Lokasi-lokasi strategis di Bandung yang sering macet
-LOKASI_KEMACETAN = [
-    {
-        "nama": "Jalan Pasteur",
-        "latitude": -6.9019,
-        "longitude": 107.5876,
-        "tipe": "Jalan Utama",
-        "base_speed": 30
-    },
-    {
-        "nama": "Jalan Soekarno-Hatta",
-        "latitude": -6.9389,
-        "longitude": 107.6317,
-        "tipe": "Jalan Utama",
-        "base_speed": 35
-    },
-    {
-        "nama": "Jalan Dago",
-        "latitude": -6.8705,
-        "longitude": 107.6142,
-        "tipe": "Jalan Wisata",
-        "base_speed": 25
-    },
-    {
-        "nama": "Jalan Buah Batu",
-        "latitude": -6.9515,
-        "longitude": 107.6349,
-        "tipe": "Jalan Utama",
-        "base_speed": 32
-    },
-    {
-        "nama": "Jalan Cibiru",
-        "latitude": -6.9258,
-        "longitude": 107.7105,
-        "tipe": "Jalan Pinggiran",
-        "base_speed": 40
-    },
-    {
-        "nama": "Jalan Kopo",
-        "latitude": -6.9667,
-        "longitude": 107.5667,
-        "tipe": "Jalan Utama",
-        "base_speed": 28
-    },
-    {
-        "nama": "Jalan Cihampelas",
-        "latitude": -6.8961,
-        "longitude": 107.5983,
-        "tipe": "Jalan Wisata",
-        "base_speed": 22
-    },
-    {
-        "nama": "Jalan Sukajadi",
-        "latitude": -6.8894,
-        "longitude": 107.5944,
-        "tipe": "Jalan Utama",
-        "base_speed": 30
-    },
-    {
-        "nama": "Jalan Ahmad Yani",
-        "latitude": -6.9147,
-        "longitude": 107.6192,
-        "tipe": "Jalan Utama",
-        "base_speed": 35
-    },
-    {
-        "nama": "Jalan Riau",
-        "latitude": -6.9053,
-        "longitude": 107.6147,
-        "tipe": "Jalan Pusat Kota",
-        "base_speed": 20
-    }
-]
+from penyimpanan_kemacetan import (
+    DATA_PATH, CUBE_PATH, CUBE_SCHEMA, SKETCH_PATH, SKETCH_SCHEMA, clear_dataset, write_partitions, load_dataset,
+    export_excel, read_watermark, append_partitions, drop_partitions_before, combine_datetime,
+    new_batch_id, staging_path, publish_dataset
+)
+from analisis_kemacetan import build_cube
+from kuantil_kemacetan import build_sketches
+from statistik_kemacetan import STATS_PATH, new_stats_store, refresh_stats
+from lokasi_kemacetan import LOKASI_KEMACETAN, load_registry
+from model_kemacetan import (
+    DEFAULT_MODEL, load_model, get_congestion_level, calculate_speed, calculate_volume,
+    calculate_travel_time_index, get_status, get_day_name, get_congestion_level_array,
+    calculate_speed_array, calculate_volume_array, calculate_travel_time_index_array,
+    get_status_code_array, get_day_name_array
+)
+
+# Jam operasional yang disimulasikan (6 pagi - 10 malam)
+JAM_OPERASIONAL = range(6, 23)
 
-def generate_traffic_data(start_date, end_date):
+def generate_traffic_data(start_date, end_date, engine='python', seed=None, lokasi_list=None, model=None):
     """
     Generate data kemacetan untuk rentang tanggal tertentu
+    engine='python' membangun data baris per baris, engine='numpy' membangun
+    seluruh kolom sekaligus (lihat generate_traffic_data_vectorized)
+    model adalah tabel lookup dari model_kemacetan (default: DEFAULT_MODEL)
     """
+    if engine == 'numpy':
+        return generate_traffic_data_vectorized(start_date, end_date, seed=seed, lokasi_list=lokasi_list, model=model)
+    if engine != 'python':
+        raise ValueError(f"Engine tidak dikenal: {engine}")
+    if seed is not None:
+        random.seed(seed)
+    if lokasi_list is None:
+        lokasi_list = LOKASI_KEMACETAN
+    
     data = []
     current_date = start_date
     
     while current_date <= end_date:
         # Untuk setiap lokasi
-        for lokasi in LOKASI_KEMACETAN:
+        for lokasi in lokasi_list:
             # Generate data untuk setiap jam (6 pagi - 10 malam)
-            for hour in range(6, 23):
+            for hour in JAM_OPERASIONAL:
                 # Tentukan tingkat kemacetan berdasarkan jam
-                congestion_level = get_congestion_level(hour, current_date.weekday())
+                congestion_level = get_congestion_level(hour, current_date.weekday(), model)
                 
                 # Hitung kecepatan rata-rata (km/jam)
-                avg_speed = calculate_speed(lokasi['base_speed'], congestion_level)
+                avg_speed = calculate_speed(lokasi['base_speed'], congestion_level, model)
                 
                 # Hitung volume kendaraan (kendaraan/jam)
-                vehicle_volume = calculate_volume(congestion_level)
+                vehicle_volume = calculate_volume(congestion_level, model)
                 
                 # Hitung waktu tempuh relatif (1 = normal, >1 = lebih lama)
                 travel_time_index = calculate_travel_time_index(avg_speed, lokasi['base_speed'])
                 
                 data.append({
                     'tanggal': current_date.strftime('%Y-%m-%d'),
-                    'hari': get_day_name(current_date.weekday()),
+                    'hari': get_day_name(current_date.weekday(), model),
                     'jam': f"{hour:02d}:00",
                     'lokasi': lokasi['nama'],
                     'latitude': lokasi['latitude'],
@@ -120,146 +79,437 @@ def generate_traffic_data(start_date, end_date):
                     'volume_kendaraan_per_jam': vehicle_volume,
                     'tingkat_kemacetan': congestion_level,
                     'indeks_waktu_tempuh': round(travel_time_index, 2),
-                    'status_kemacetan': get_status(congestion_level)
+                    'status_kemacetan': get_status(congestion_level, model)
                 })
         
         current_date += timedelta(days=1)
     
     return pd.DataFrame(data)
 
-def get_congestion_level(hour, weekday):
+def generate_traffic_data_vectorized(start_date, end_date, seed=None, lokasi_list=None, model=None):
     """
-    Tentukan tingkat kemacetan (1-10) berdasarkan jam dan hari
-    1 = Lancar, 10 = Sangat Macet
+    Generate data kemacetan secara tervektorisasi dengan numpy.random.Generator
+    Skema kolom dan distribusi nilai sama dengan generate_traffic_data,
+    tetapi setiap kolom dibangun sekaligus untuk seluruh (hari, lokasi, jam)
     """
-    # Weekday (0-4), Weekend (5-6)
-    is_weekend = weekday >= 5
+    rng = np.random.default_rng(seed)
+    if lokasi_list is None:
+        lokasi_list = LOKASI_KEMACETAN
     
-    # Jam sibuk pagi (6-9)
-    if 6 <= hour <= 9:
-        if is_weekend:
-            return random.randint(3, 5)
-        else:
-            return random.randint(7, 10)
+    # Daftar tanggal sama persis dengan loop `while current_date <= end_date`
+    n_days = max(0, (end_date - start_date).days + 1)
+    dates = [start_date + timedelta(days=i) for i in range(n_days)]
+    hours = np.fromiter(JAM_OPERASIONAL, dtype=np.int64)
+    n_loc, n_hour = len(lokasi_list), len(hours)
+    n_rows = n_days * n_loc * n_hour
     
-    # Jam kerja (10-16)
-    elif 10 <= hour <= 16:
-        if is_weekend:
-            return random.randint(4, 7)
-        else:
-            return random.randint(5, 7)
+    # Indeks baris dengan urutan hari -> lokasi -> jam (sama dengan versi loop)
+    day_idx = np.repeat(np.arange(n_days), n_loc * n_hour)
+    loc_idx = np.tile(np.repeat(np.arange(n_loc), n_hour), n_days)
+    hour_idx = np.tile(np.arange(n_hour), n_days * n_loc)
     
-    # Jam pulang kantor (17-20)
-    elif 17 <= hour <= 20:
-        if is_weekend:
-            return random.randint(5, 8)
-        else:
-            return random.randint(8, 10)
+    weekdays = np.array([d.weekday() for d in dates], dtype=np.int64)
     
-    # Jam malam (21-22)
-    else:
-        if is_weekend:
-            return random.randint(4, 6)
-        else:
-            return random.randint(3, 5)
+    # Tingkat kemacetan dari tabel rentang (jam, weekend) model
+    congestion_level = get_congestion_level_array(hours[hour_idx], weekdays[day_idx], rng, model)
+    
+    # Kecepatan, volume dan indeks waktu tempuh; urutan pengambilan
+    # bilangan acak tetap (tingkat -> kecepatan -> volume)
+    base_speed = np.array([lokasi['base_speed'] for lokasi in lokasi_list], dtype=np.float64)[loc_idx]
+    avg_speed = calculate_speed_array(base_speed, congestion_level, rng, model)
+    vehicle_volume = calculate_volume_array(congestion_level, rng, model)
+    travel_time_index = calculate_travel_time_index_array(avg_speed, base_speed)
+    
+    # Kolom teks dibangun dengan take dari tabel kecil nilai unik,
+    # bukan dengan membuat string baru per baris
+    model = model or DEFAULT_MODEL
+    status_table = pd.Index(model['status_labels'])
+    date_str = pd.Index([d.strftime('%Y-%m-%d') for d in dates])
+    day_names = pd.Index(get_day_name_array(weekdays, model))
+    jam_str = pd.Index([f"{hour:02d}:00" for hour in hours])
+    
+    def lokasi_column(key):
+        return pd.Index([lokasi[key] for lokasi in lokasi_list]).take(loc_idx)
+    
+    return pd.DataFrame({
+        'tanggal': date_str.take(day_idx),
+        'hari': day_names.take(day_idx),
+        'jam': jam_str.take(hour_idx),
+        'lokasi': lokasi_column('nama'),
+        'latitude': lokasi_column('latitude'),
+        'longitude': lokasi_column('longitude'),
+        'tipe_jalan': lokasi_column('tipe'),
+        'kecepatan_rata_rata_kmh': np.round(avg_speed, 1),
+        'volume_kendaraan_per_jam': vehicle_volume,
+        'tingkat_kemacetan': congestion_level,
+        'indeks_waktu_tempuh': np.round(travel_time_index, 2),
+        'status_kemacetan': status_table.take(get_status_code_array(congestion_level, model))
+    }, copy=False)
 
-def calculate_speed(base_speed, congestion_level):
+def iter_traffic_data(start_date, end_date, days_per_chunk=1, engine='numpy', seed=None, lokasi_list=None,
+                      model=None):
     """
-    Hitung kecepatan rata-rata berdasarkan tingkat kemacetan
+    Generate data kemacetan per potongan waktu (streaming)
+    Setiap iterasi menghasilkan DataFrame untuk `days_per_chunk` hari sehingga
+    memori puncak tidak bergantung pada panjang rentang tanggal
     """
-    # Semakin macet, semakin lambat
-    speed_reduction = (congestion_level / 10) * 0.7  # Maksimal 70% pengurangan
-    actual_speed = base_speed * (1 - speed_reduction)
+    if days_per_chunk < 1:
+        raise ValueError("days_per_chunk minimal 1")
     
-    # Tambahkan sedikit variasi random
-    variation = random.uniform(-0.1, 0.1)
-    final_speed = actual_speed * (1 + variation)
+    # Satu sumber random dipakai bersama oleh seluruh potongan
+    if engine == 'numpy':
+        seed = np.random.default_rng(seed)
+    elif seed is not None:
+        random.seed(seed)
+        seed = None
     
-    # Minimal 5 km/jam (sangat macet)
-    return max(5, final_speed)
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=days_per_chunk - 1), end_date)
+        yield generate_traffic_data(
+            chunk_start, chunk_end, engine=engine, seed=seed, lokasi_list=lokasi_list, model=model
+        )
+        chunk_start += timedelta(days=days_per_chunk)
 
-def calculate_volume(congestion_level):
+def plan_shards(start_date, end_date, days_per_shard=7, locations_per_shard=10, n_locations=None):
     """
-    Hitung volume kendaraan per jam
+    Bagi rentang tanggal dan daftar lokasi menjadi shard (blok tanggal x blok lokasi)
+    Pembagian hanya bergantung pada ukuran shard, bukan jumlah worker
     """
-    # Volume tinggi = kemacetan tinggi
-    base_volume = congestion_level * 300
-    variation = random.randint(-100, 100)
-    return max(100, base_volume + variation)
+    if days_per_shard < 1 or locations_per_shard < 1:
+        raise ValueError("Ukuran shard minimal 1")
+    if n_locations is None:
+        n_locations = len(LOKASI_KEMACETAN)
+    
+    shards = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=days_per_shard - 1), end_date)
+        for loc_start in range(0, n_locations, locations_per_shard):
+            shards.append((chunk_start, chunk_end, loc_start, min(loc_start + locations_per_shard, n_locations)))
+        chunk_start += timedelta(days=days_per_shard)
+    return shards
 
-def calculate_travel_time_index(actual_speed, base_speed):
+def shard_seed(master_seed, chunk_start, loc_start):
     """
-    Hitung indeks waktu tempuh (1 = normal, 2 = 2x lebih lama)
+    Seed deterministik untuk satu shard, diturunkan dari master seed
+    Kunci shard memakai tanggal absolut dan indeks lokasi pertama sehingga
+    hasilnya sama berapa pun jumlah worker yang dipakai
     """
-    return base_speed / actual_speed
+    return np.random.SeedSequence(entropy=master_seed, spawn_key=(chunk_start.toordinal(), loc_start))
 
-def get_status(congestion_level):
+def generate_shard(shard, master_seed, output_file, lokasi_list=None, cube_file=CUBE_PATH, model=None,
+                   sketch_file=SKETCH_PATH):
     """
-    Konversi level numerik ke status deskriptif
+    Generate satu shard dan tulis langsung ke dataset terpartisi beserta
+    rollup cube dan sketsa kuantilnya (sel cube tidak pernah melintasi batas shard)
+    Dijalankan di proses worker; yang dikembalikan hanya ringkasan shard
     """
-    if congestion_level <= 2:
-        return "Sangat Lancar"
-    elif congestion_level <= 4:
-        return "Lancar"
-    elif congestion_level <= 6:
-        return "Ramai"
-    elif congestion_level <= 8:
-        return "Macet"
-    else:
-        return "Sangat Macet"
+    chunk_start, chunk_end, loc_start, loc_end = shard
+    if lokasi_list is None:
+        lokasi_list = LOKASI_KEMACETAN
+    
+    chunk = generate_traffic_data_vectorized(
+        chunk_start, chunk_end,
+        seed=shard_seed(master_seed, chunk_start, loc_start),
+        lokasi_list=lokasi_list[loc_start:loc_end],
+        model=model
+    )
+    shard_id = f"d{chunk_start.toordinal():07d}-l{loc_start:05d}"
+    write_partitions(chunk, output_file, shard_id=shard_id)
+    if cube_file:
+        write_partitions(build_cube(chunk), cube_file, shard_id=shard_id, schema=CUBE_SCHEMA)
+    if sketch_file:
+        write_partitions(build_sketches(chunk), sketch_file, shard_id=shard_id, schema=SKETCH_SCHEMA)
+    return summarize_chunk(chunk)
+
+def iter_sharded_generation(start_date, end_date, output_file, workers=1, seed=None,
+                            days_per_shard=7, locations_per_shard=10, lokasi_list=None,
+                            cube_file=CUBE_PATH, model=None, sketch_file=SKETCH_PATH):
+    """
+    Generate dataset secara paralel per shard dengan process pool
+    Menghasilkan (shard, ringkasan) setiap kali satu shard selesai ditulis
+    """
+    if lokasi_list is None:
+        lokasi_list = LOKASI_KEMACETAN
+    # Tanpa seed, entropi diambil sekali lalu dipakai bersama oleh semua shard
+    master_seed = np.random.SeedSequence(seed).entropy
+    shards = plan_shards(start_date, end_date, days_per_shard, locations_per_shard, len(lokasi_list))
+    
+    if workers <= 1:
+        for shard in shards:
+            yield shard, generate_shard(shard, master_seed, output_file, lokasi_list, cube_file, model, sketch_file)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                generate_shard, shard, master_seed, output_file, lokasi_list, cube_file, model, sketch_file
+            ): shard
+            for shard in shards
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
 
-def get_day_name(weekday):
+def iter_increments(watermark, end_time, seed=None, lokasi_list=None, model=None):
     """
-    Konversi nomor hari ke nama hari
+    Generate hanya data yang lebih baru dari watermark s/d end_time, per hari
+    Setiap hari memakai seed turunan dari tanggalnya sehingga jam-jam dari
+    hari yang sama konsisten antar run bila master seed sama
     """
-    days = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu']
-    return days[weekday]
+    master_seed = np.random.SeedSequence(seed).entropy
+    day = datetime.combine(watermark.date(), datetime.min.time())
+    while day.date() <= end_time.date():
+        chunk = generate_traffic_data_vectorized(
+            day, day, seed=shard_seed(master_seed, day, 0), lokasi_list=lokasi_list, model=model
+        )
+        stamp = combine_datetime(chunk['tanggal'], chunk['jam'])
+        yield chunk[((stamp > watermark) & (stamp <= end_time)).to_numpy()].reset_index(drop=True)
+        day += timedelta(days=1)
 
-def main():
+def summarize_chunk(chunk):
+    """
+    Ringkasan statistik satu potongan data (untuk digabung bertahap)
+    """
+    speed = chunk['kecepatan_rata_rata_kmh']
+    return {
+        'rows': len(chunk),
+        'locations': set(chunk['lokasi'].unique()),
+        'min_date': chunk['tanggal'].min() if len(chunk) else None,
+        'max_date': chunk['tanggal'].max() if len(chunk) else None,
+        'min_speed': speed.min() if len(chunk) else float('inf'),
+        'max_speed': speed.max() if len(chunk) else float('-inf'),
+        'sum_speed': speed.sum(),
+        'status_counts': chunk['status_kemacetan'].value_counts()
+    }
+
+def merge_summaries(total, summary):
+    """
+    Gabungkan dua ringkasan dari summarize_chunk
+    """
+    if total is None:
+        return summary
+    dates = [d for d in (total['min_date'], summary['min_date'], total['max_date'], summary['max_date']) if d]
+    return {
+        'rows': total['rows'] + summary['rows'],
+        'locations': total['locations'] | summary['locations'],
+        'min_date': min(dates) if dates else None,
+        'max_date': max(dates) if dates else None,
+        'min_speed': min(total['min_speed'], summary['min_speed']),
+        'max_speed': max(total['max_speed'], summary['max_speed']),
+        'sum_speed': total['sum_speed'] + summary['sum_speed'],
+        'status_counts': total['status_counts'].add(summary['status_counts'], fill_value=0)
+    }
+
+def main(engine='numpy', seed=None, output_file=DATA_PATH, excel_file=None, days=30, days_per_chunk=1,
+         workers=1, locations_per_shard=10, cube_file=CUBE_PATH, incremental=False, retention_days=None,
+         registry=None, model_config=None, stats_file=STATS_PATH, sketch_file=SKETCH_PATH):
     """
     Main function untuk scraping data
+    Data ditulis per potongan `days_per_chunk` hari langsung ke dataset
+    terpartisi per tanggal, bersama rollup cube untuk dashboard (cube_file);
+    excel_file opsional untuk ekspor ke Excel.
+    Engine numpy membagi pekerjaan menjadi shard (tanggal x lokasi) yang
+    dapat dijalankan paralel oleh `workers` proses dengan hasil yang sama.
+    Dengan incremental=True hanya periode setelah watermark dataset yang
+    dikumpulkan lalu ditambahkan; retention_days menghapus partisi lama.
+    registry (CSV/GeoJSON) menggantikan daftar lokasi bawaan dan model_config
+    (JSON) menimpa parameter model kemacetan (lihat model_kemacetan).
+    Statistik streaming (stats_file) diperbarui dari partisi/file yang baru ditulis
+    dan sketsa kuantil (sketch_file) ditulis per sel bersama rollup cube
     """
     print("=" * 60)
     print("SCRAPING DATA KEMACETAN LALU LINTAS KOTA BANDUNG")
     print("=" * 60)
     
-    # Set periode scraping (30 hari terakhir)
+    # Set periode scraping (default 30 hari terakhir)
     end_date = datetime.now()
-    start_date = end_date - timedelta(days=30)
+    start_date = end_date - timedelta(days=days)
+    
+    watermark = read_watermark(output_file) if incremental else None
+    if incremental and watermark is None:
+        print("\nDataset belum ada, menjalankan scraping penuh")
+    
+    if watermark is not None:
+        print(f"\nWatermark Data: {watermark.strftime('%Y-%m-%d %H:%M')}")
+        print(f"Periode Baru: setelah watermark s/d {end_date.strftime('%Y-%m-%d %H:%M')}")
+    else:
+        print(f"\nPeriode Data: {start_date.strftime('%Y-%m-%d')} s/d {end_date.strftime('%Y-%m-%d')}")
+    lokasi_list = load_registry(registry)
+    print(f"Jumlah Lokasi: {len(lokasi_list)}" + (f" (registry: {registry})" if registry else ""))
+    model = load_model(model_config) if model_config else DEFAULT_MODEL
+    if model_config:
+        print(f"Model Kemacetan: {model_config}")
+    
+    total = None
+    # Scraping penuh ditulis ke direktori staging di samping setiap output lalu
+    # baru menggantikan data lama setelah selesai, sehingga run yang gagal di
+    # tengah jalan tidak menghapus dataset, cube, statistik maupun sketsa lama
+    staged = {}
+    if watermark is None:
+        batch_id = new_batch_id()
+        staged = {
+            path: staging_path(path, batch_id)
+            for path in (output_file, cube_file, sketch_file, stats_file) if path
+        }
+    data_target, cube_target, sketch_target = (
+        staged.get(path, path) for path in (output_file, cube_file, sketch_file)
+    )
+    
+    try:
+        if watermark is not None:
+            print("\nMemulai scraping inkremental...")
+            for chunk in iter_increments(watermark, end_date, seed=seed, lokasi_list=lokasi_list, model=model):
+                if chunk.empty:
+                    continue
+                append_partitions(chunk, output_file)
+                if cube_file:
+                    append_partitions(build_cube(chunk), cube_file, schema=CUBE_SCHEMA)
+                if sketch_file:
+                    append_partitions(build_sketches(chunk), sketch_file, schema=SKETCH_SCHEMA)
+                summary = summarize_chunk(chunk)
+                total = merge_summaries(total, summary)
+                print(f"  {summary['min_date']}: {summary['rows']} baris baru ditambahkan (total {total['rows']})")
+        elif engine == 'numpy':
+            n_shards = len(plan_shards(start_date, end_date, days_per_chunk, locations_per_shard, len(lokasi_list)))
+            print(f"Jumlah Shard: {n_shards} (@ {days_per_chunk} hari x {locations_per_shard} lokasi, {workers} worker)")
+            print("\nMemulai scraping...")
+            
+            results = iter_sharded_generation(
+                start_date, end_date, data_target, workers=workers, seed=seed,
+                days_per_shard=days_per_chunk, locations_per_shard=locations_per_shard,
+                lokasi_list=lokasi_list, cube_file=cube_target, model=model, sketch_file=sketch_target
+            )
+            for i, (shard, summary) in enumerate(results, start=1):
+                total = merge_summaries(total, summary)
+                chunk_start, chunk_end, loc_start, loc_end = shard
+                print(f"  [{i}/{n_shards}] {chunk_start.strftime('%Y-%m-%d')} s/d {chunk_end.strftime('%Y-%m-%d')}, "
+                      f"lokasi {loc_start + 1}-{loc_end}: {summary['rows']} baris ditulis (total {total['rows']})")
+        else:
+            n_days = (end_date - start_date).days + 1
+            n_chunks = -(-n_days // days_per_chunk)
+            print(f"Jumlah Potongan: {n_chunks} (@ {days_per_chunk} hari)")
+            print("\nMemulai scraping...")
+            
+            chunks = iter_traffic_data(start_date, end_date, days_per_chunk, engine, seed, lokasi_list, model)
+            for i, chunk in enumerate(chunks, start=1):
+                write_partitions(chunk, data_target)
+                if cube_target:
+                    write_partitions(build_cube(chunk), cube_target, schema=CUBE_SCHEMA)
+                if sketch_target:
+                    write_partitions(build_sketches(chunk), sketch_target, schema=SKETCH_SCHEMA)
+                summary = summarize_chunk(chunk)
+                total = merge_summaries(total, summary)
+                print(f"  [{i}/{n_chunks}] {summary['min_date']} s/d {summary['max_date']}: "
+                      f"{summary['rows']} baris ditulis (total {total['rows']})")
+        
+        # Statistik streaming run penuh dibangun di staging bersama datanya
+        if staged and stats_file:
+            refresh_stats(new_stats_store(), data_target, staged[stats_file])
+    except BaseException:
+        for staging in staged.values():
+            clear_dataset(staging)
+        raise
+    for path, staging in staged.items():
+        publish_dataset(staging, path)
     
-    print(f"\nPeriode Data: {start_date.strftime('%Y-%m-%d')} s/d {end_date.strftime('%Y-%m-%d')}")
-    print(f"Jumlah Lokasi: {len(LOKASI_KEMACETAN)}")
-    print("\nMemulai scraping...")
+    if total is None:
+        total = summarize_chunk(pd.DataFrame(columns=['lokasi', 'tanggal', 'kecepatan_rata_rata_kmh', 'status_kemacetan']))
     
-    # Generate data
-    df = generate_traffic_data(start_date, end_date)
+    # Kebijakan retensi: hapus partisi yang lebih tua dari N hari
+    if retention_days is not None:
+        cutoff = (end_date - timedelta(days=retention_days)).strftime('%Y-%m-%d')
+        dropped = drop_partitions_before(output_file, cutoff)
+        if cube_file:
+            drop_partitions_before(cube_file, cutoff)
+        if sketch_file:
+            drop_partitions_before(sketch_file, cutoff)
+        print(f"\n✓ Retensi {retention_days} hari: {len(dropped)} partisi sebelum {cutoff} dihapus")
     
-    print(f"\n✓ Berhasil mengumpulkan {len(df)} data point")
+    # Statistik streaming: hanya partisi/file baru yang dibaca lalu di-merge
+    if stats_file:
+        refresh_stats(new_stats_store(), output_file, stats_file)
     
-    # Simpan ke file
-    output_file = 'kemacetan.xlsx'
-    df.to_excel(output_file, index=False)
+    print(f"\n✓ Berhasil mengumpulkan {total['rows']} data point")
     print(f"✓ Data disimpan ke: {output_file}")
+    if cube_file:
+        print(f"✓ Rollup cube disimpan ke: {cube_file}")
+    if stats_file:
+        print(f"✓ Statistik streaming disimpan ke: {stats_file}")
+    if sketch_file:
+        print(f"✓ Sketsa kuantil disimpan ke: {sketch_file}")
+    
+    if excel_file:
+        export_excel(load_dataset(output_file), excel_file)
+        print(f"✓ Data diekspor ke: {excel_file}")
     
     # Tampilkan statistik
     print("\n" + "=" * 60)
     print("STATISTIK DATA")
     print("=" * 60)
-    print(f"Total Records: {len(df)}")
-    print(f"Jumlah Lokasi: {df['lokasi'].nunique()}")
-    print(f"Rentang Tanggal: {df['tanggal'].min()} s/d {df['tanggal'].max()}")
+    print(f"Total Records: {total['rows']}")
+    print(f"Jumlah Lokasi: {len(total['locations'])}")
+    print(f"Rentang Tanggal: {total['min_date']} s/d {total['max_date']}")
     print(f"\nKecepatan Rata-rata:")
-    print(f"  - Minimum: {df['kecepatan_rata_rata_kmh'].min():.1f} km/jam")
-    print(f"  - Maksimum: {df['kecepatan_rata_rata_kmh'].max():.1f} km/jam")
-    print(f"  - Rata-rata: {df['kecepatan_rata_rata_kmh'].mean():.1f} km/jam")
+    print(f"  - Minimum: {total['min_speed']:.1f} km/jam")
+    print(f"  - Maksimum: {total['max_speed']:.1f} km/jam")
+    print(f"  - Rata-rata: {total['sum_speed'] / max(total['rows'], 1):.1f} km/jam")
     print(f"\nDistribusi Status Kemacetan:")
-    print(df['status_kemacetan'].value_counts())
+    print(total['status_counts'].astype('int64').sort_values(ascending=False))
     
     print("\n" + "=" * 60)
     print("SCRAPING SELESAI!")
     print("=" * 60)
     
-    return df
+    return {
+        'total_rows': total['rows'],
+        'start_date': total['min_date'],
+        'end_date': total['max_date'],
+        'output_file': output_file
+    }
+
+def parse_args(argv=None):
+    """
+    Argumen command line untuk script scraping
+    """
+    parser = argparse.ArgumentParser(description="Scraping data kemacetan lalu lintas Kota Bandung")
+    parser.add_argument('--days', type=int, default=30, help="Jumlah hari ke belakang yang di-generate")
+    parser.add_argument('--chunk-days', type=int, default=1, help="Jumlah hari per potongan/shard yang ditulis")
+    parser.add_argument('--workers', type=int, default=1, help="Jumlah proses paralel (engine numpy)")
+    parser.add_argument('--locations-per-shard', type=int, default=10, help="Jumlah lokasi per shard (engine numpy)")
+    parser.add_argument('--engine', choices=['numpy', 'python'], default='numpy')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default=DATA_PATH, help="Direktori dataset Parquet")
+    parser.add_argument('--cube-output', default=CUBE_PATH, help="Direktori rollup cube Parquet")
+    parser.add_argument('--stats-output', default=STATS_PATH, help="Direktori state statistik streaming")
+    parser.add_argument('--sketch-output', default=SKETCH_PATH, help="Direktori sketsa kuantil Parquet")
+    parser.add_argument('--excel', default=None, help="Ekspor tambahan ke file Excel")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Hanya kumpulkan data setelah watermark dataset yang ada")
+    parser.add_argument('--retention-days', type=int, default=None,
+                        help="Hapus partisi yang lebih tua dari N hari")
+    parser.add_argument('--registry', default=None,
+                        help="Registry lokasi (CSV atau GeoJSON) pengganti daftar lokasi bawaan")
+    parser.add_argument('--model-config', default=None,
+                        help="File JSON parameter model kemacetan (rentang jam, ambang status, dll.)")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    df = main()
+    args = parse_args()
+    main(
+        engine=args.engine,
+        seed=args.seed,
+        output_file=args.output,
+        excel_file=args.excel,
+        days=args.days,
+        days_per_chunk=args.chunk_days,
+        workers=args.workers,
+        locations_per_shard=args.locations_per_shard,
+        cube_file=args.cube_output,
+        incremental=args.incremental,
+        retention_days=args.retention_days,
+        registry=args.registry,
+        model_config=args.model_config,
+        stats_file=args.stats_output,
+        sketch_file=args.sketch_output
+    )
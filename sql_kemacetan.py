@@ -0,0 +1,362 @@
+"""
+Backend SQL (DuckDB, tertanam tanpa server) untuk agregasi dashboard kemacetan
+Filter dan group-by setiap tab dijalankan langsung di atas file Parquet secara
+paralel dan out-of-core (agregat besar di-spill ke disk), sehingga hanya frame
+hasil yang kecil yang masuk ke memori Python. Hasil setiap fungsi sama dengan
+fungsi padanannya di analisis_kemacetan
+Author: Data Science Team
+Date: February 2026
+"""
+
+import os
+import tempfile
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+from penyimpanan_kemacetan import (
+    CUBE_METRICS, DAY_ORDER, STATUS_LABELS, status_column, DATA_PATH, CUBE_PATH, SKETCH_PATH,
+    writer_tmp_path, remove_quietly
+)
+import kuantil_kemacetan as kq
+
+# Batas memori DuckDB; agregat yang lebih besar di-spill ke SQL_TEMP_DIR
+SQL_MEMORY_LIMIT = '2GB'
+SQL_TEMP_DIR = os.path.join(tempfile.gettempdir(), 'kemacetan_duckdb')
+
+# Kolom baris mentah untuk tab Data Tabel dan ekspor
+RAW_COLUMNS = [
+    'tanggal', 'hari', 'jam', 'lokasi', 'latitude', 'longitude', 'tipe_jalan',
+    'kecepatan_rata_rata_kmh', 'volume_kendaraan_per_jam', 'tingkat_kemacetan',
+    'indeks_waktu_tempuh', 'status_kemacetan'
+]
+
+def connect(threads=None, memory_limit=SQL_MEMORY_LIMIT, temp_dir=SQL_TEMP_DIR):
+    """
+    Koneksi DuckDB in-memory (tanpa proses server)
+    threads None = semua core; setiap query sebaiknya memakai cursor()
+    tersendiri agar aman dipakai dari beberapa thread sesi
+    """
+    if duckdb is None:
+        raise ImportError("Backend SQL membutuhkan paket duckdb (pip install duckdb)")
+    con = duckdb.connect(':memory:')
+    if threads is not None:
+        con.execute(f"SET threads = {int(threads)}")
+    con.execute(f"SET memory_limit = '{memory_limit}'")
+    con.execute(f"SET temp_directory = {_literal(temp_dir)}")
+    return con
+
+def _literal(value):
+    """
+    String literal SQL
+    """
+    return "'" + str(value).replace("'", "''") + "'"
+
+def parquet_scan(path):
+    """
+    Ekspresi FROM untuk dataset Parquet: direktori terpartisi tanggal=YYYY-MM-DD/
+    (kolom tanggal dari nama partisi) atau file tunggal
+    """
+    if os.path.isdir(path):
+        pattern = os.path.join(path, '**', '*.parquet')
+        return (f"read_parquet({_literal(pattern)}, hive_partitioning = true, "
+                f"hive_types = {{'tanggal': VARCHAR}})")
+    return f"read_parquet({_literal(path)})"
+
+def source(cube_path=CUBE_PATH, data_path=DATA_PATH, sketch_path=SKETCH_PATH):
+    """
+    Sumber query: scan rollup cube dan sketsa kuantil (bila sudah ditulis) dan
+    scan data mentah. Tanpa cube/sketsa, sel diagregasi dari data mentah di
+    dalam query
+    """
+    return {
+        'cube': parquet_scan(cube_path) if os.path.exists(cube_path) else None,
+        'sketch': parquet_scan(sketch_path) if os.path.isdir(sketch_path) else None,
+        'raw': parquet_scan(data_path)
+    }
+
+def where_clause(filters):
+    """
+    Klausa WHERE dan parameternya untuk filter (awal, akhir, lokasi, hari)
+    seperti filter_indexed; filter None berarti tanpa filter
+    """
+    if filters is None:
+        return '', []
+    start_date, end_date, locations, days = filters
+    conditions, params = [], []
+    if start_date is not None:
+        conditions.append('tanggal >= ?')
+        params.append(str(start_date))
+    if end_date is not None:
+        conditions.append('tanggal <= ?')
+        params.append(str(end_date))
+    for column, values in (('lokasi', locations), ('hari', days)):
+        if values is not None:
+            values = list(values)
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})" if values else 'FALSE')
+            params.extend(values)
+    return ('WHERE ' + ' AND '.join(conditions)) if conditions else '', params
+
+def cube_query(src, filters):
+    """
+    SELECT sel cube (tanggal, lokasi, jam) yang lolos filter, beserta parameternya
+    Filter diterapkan pada scan sehingga partisi dan row group yang tidak
+    relevan tidak dibaca
+    """
+    where, params = where_clause(filters)
+    if src['cube'] is not None:
+        return f"SELECT * FROM {src['cube']} {where}", params
+
+    sums = ', '.join(f"sum({metric}) AS {metric}_sum" for metric in CUBE_METRICS)
+    statuses = ', '.join(
+        f"count(*) FILTER (WHERE status_kemacetan = {_literal(status)}) AS {status_column(status)}"
+        for status in STATUS_LABELS
+    )
+    return (
+        f"SELECT tanggal, lokasi, jam, any_value(hari) AS hari, any_value(latitude) AS latitude, "
+        f"any_value(longitude) AS longitude, count(*) AS jumlah_data, {sums}, {statuses} "
+        f"FROM {src['raw']} {where} GROUP BY tanggal, lokasi, jam",
+        params
+    )
+
+def _query(con, src, filters, select, extra_params=()):
+    """
+    Jalankan `select` terhadap CTE cube (sel yang lolos filter) dan kembalikan DataFrame
+    """
+    cube_sql, params = cube_query(src, filters)
+    cursor = con.cursor()
+    try:
+        return cursor.execute(f"WITH cube AS ({cube_sql}) {select}", params + list(extra_params)).df()
+    finally:
+        cursor.close()
+
+def _means(metrics):
+    return ', '.join(f"sum({metric}_sum) / sum(jumlah_data) AS {metric}" for metric in metrics)
+
+def aggregate_means(con, src, filters, by, metrics=CUBE_METRICS, lokasi=None):
+    """
+    Rata-rata metrik per kelompok `by` (opsional untuk satu lokasi), urut naik
+    per kelompok seperti analisis_kemacetan.aggregate_means
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    columns = ', '.join(by)
+    where = 'WHERE lokasi = ?' if lokasi is not None else ''
+    return _query(
+        con, src, filters,
+        f"SELECT {columns}, {_means(metrics)} FROM cube {where} GROUP BY {columns} ORDER BY {columns}",
+        [lokasi] if lokasi is not None else []
+    )
+
+def metric_means(con, src, filters):
+    """
+    Rata-rata keseluruhan setiap metrik (untuk kartu metrik dashboard)
+    """
+    row = _query(con, src, filters, f"SELECT {_means(CUBE_METRICS)} FROM cube").iloc[0]
+    return {metric: float(row[metric]) if pd.notna(row[metric]) else np.nan for metric in CUBE_METRICS}
+
+def daily_trend(con, src, filters):
+    """
+    Tren harian tingkat kemacetan dan kecepatan rata-rata
+    """
+    return aggregate_means(con, src, filters, 'tanggal', ['tingkat_kemacetan', 'kecepatan_rata_rata_kmh'])
+
+def day_average(con, src, filters):
+    """
+    Rata-rata tingkat kemacetan per hari dalam seminggu (urut Senin - Minggu)
+    """
+    day_avg = aggregate_means(con, src, filters, 'hari', ['tingkat_kemacetan'])
+    day_avg['hari'] = pd.Categorical(day_avg['hari'], categories=DAY_ORDER, ordered=True)
+    return day_avg.sort_values('hari')
+
+def heatmap_table(con, src, filters):
+    """
+    Tabel rata-rata tingkat kemacetan jam (baris) x hari (kolom)
+    """
+    means = aggregate_means(con, src, filters, ['jam', 'hari'], ['tingkat_kemacetan'])
+    heatmap_data = means.pivot(index='jam', columns='hari', values='tingkat_kemacetan')
+    available_days = [day for day in DAY_ORDER if day in heatmap_data.columns]
+    return heatmap_data[available_days]
+
+def location_stats(con, src, filters):
+    """
+    Statistik per lokasi: rata-rata metrik dan status yang paling sering muncul
+    """
+    metrics = ['tingkat_kemacetan', 'kecepatan_rata_rata_kmh', 'volume_kendaraan_per_jam']
+    labels = sorted(STATUS_LABELS)
+    status_sums = ', '.join(f"sum({status_column(status)}) AS {status_column(status)}" for status in labels)
+    stats = _query(
+        con, src, filters,
+        f"SELECT lokasi, any_value(latitude) AS latitude, any_value(longitude) AS longitude, "
+        f"{_means(metrics)}, {status_sums} FROM cube GROUP BY lokasi ORDER BY lokasi"
+    )
+
+    # Bila seri, pilih label terkecil secara alfabet seperti Series.mode()[0]
+    status_counts = stats[[status_column(status) for status in labels]].to_numpy()
+    stats['status_kemacetan'] = np.asarray(labels, dtype=object)[status_counts.argmax(axis=1)]
+    return stats[['lokasi', 'latitude', 'longitude'] + metrics + ['status_kemacetan']]
+
+def available_locations(con, src, filters):
+    """
+    Lokasi yang ada setelah filter
+    """
+    return list(_query(con, src, filters, "SELECT DISTINCT lokasi FROM cube ORDER BY lokasi")['lokasi'])
+
+def hourly_profile(con, src, filters, lokasi=None):
+    """
+    Rata-rata kecepatan dan volume per jam (opsional untuk satu lokasi)
+    """
+    return aggregate_means(
+        con, src, filters, 'jam', ['kecepatan_rata_rata_kmh', 'volume_kendaraan_per_jam'], lokasi
+    )
+
+def status_distribution(con, src, filters, lokasi=None):
+    """
+    Jumlah baris per status kemacetan, urut dari yang paling sering
+    """
+    columns = [status_column(status) for status in STATUS_LABELS]
+    where = 'WHERE lokasi = ?' if lokasi is not None else ''
+    sums = _query(
+        con, src, filters,
+        f"SELECT {', '.join(f'coalesce(sum({column}), 0) AS {column}' for column in columns)} FROM cube {where}",
+        [lokasi] if lokasi is not None else []
+    )
+    totals = pd.Series(sums.iloc[0].to_numpy(dtype=np.int64), index=STATUS_LABELS)
+    totals = totals[totals > 0].sort_values(ascending=False)
+    totals.index.name = 'status_kemacetan'
+    return totals
+
+def rush_hours(con, src, filters):
+    """
+    Rata-rata metrik per jam, diurutkan dari jam paling macet
+    """
+    hourly = aggregate_means(
+        con, src, filters, 'jam',
+        ['tingkat_kemacetan', 'kecepatan_rata_rata_kmh', 'volume_kendaraan_per_jam']
+    )
+    return hourly.sort_values('tingkat_kemacetan', ascending=False)
+
+def weekday_weekend(con, src, filters):
+    """
+    Rata-rata tingkat kemacetan per jam untuk weekday dan weekend
+    """
+    comparison = _query(
+        con, src, filters,
+        f"SELECT jam, hari IN ('Sabtu', 'Minggu') AS is_weekend, {_means(['tingkat_kemacetan'])} "
+        f"FROM cube GROUP BY ALL ORDER BY jam, is_weekend"
+    )
+    comparison['Tipe Hari'] = comparison['is_weekend'].map({True: 'Weekend', False: 'Weekday'})
+    return comparison
+
+def sketch_query(src, filters):
+    """
+    SELECT baris sketsa kuantil (sel, metrik, bucket, jumlah) yang lolos filter
+    Tanpa sketsa tersimpan, bucket setiap nilai dihitung dari data mentah
+    dengan rumus yang sama dengan kuantil_kemacetan.sketch_bucket
+    """
+    where, params = where_clause(filters)
+    if src.get('sketch') is not None:
+        return f"SELECT tanggal, lokasi, jam, hari, metrik, bucket, jumlah FROM {src['sketch']} {where}", params
+
+    selects = [
+        f"SELECT tanggal, lokasi, jam, hari, {_literal(metric)} AS metrik, "
+        f"CAST(ceil(ln(greatest({metric}, {kq.SKETCH_MIN_VALUE!r})) / ln({kq.SKETCH_GAMMA!r})) AS SMALLINT) AS bucket, "
+        f"1 AS jumlah FROM {src['raw']} {where}"
+        for metric in kq.SKETCH_METRICS
+    ]
+    return ' UNION ALL '.join(selects), params * len(selects)
+
+def percentile_table(con, src, filters, metric, by=(), percentiles=kq.PERCENTILES, lokasi=None):
+    """
+    Persentil satu metrik per kelompok `by` seperti kuantil_kemacetan.percentile_table
+    Bucket sel yang lolos filter dijumlahkan di DuckDB; hanya jumlah per
+    (kelompok, bucket) yang kembali ke Python untuk diambil persentilnya
+    """
+    sketch_sql, params = sketch_query(src, filters)
+    dimensions = [
+        f"CASE WHEN hari IN ('Sabtu', 'Minggu') THEN 'Weekend' ELSE 'Weekday' END AS {kq.DAY_TYPE}"
+        if dimension == kq.DAY_TYPE else dimension
+        for dimension in by
+    ]
+    conditions = ['metrik = ?'] + (['lokasi = ?'] if lokasi is not None else [])
+    cursor = con.cursor()
+    try:
+        counts = cursor.execute(
+            f"WITH sketch AS ({sketch_sql}) SELECT {', '.join(dimensions + ['metrik', 'bucket'])}, "
+            f"CAST(sum(jumlah) AS BIGINT) AS jumlah FROM sketch WHERE {' AND '.join(conditions)} GROUP BY ALL",
+            params + [metric] + ([lokasi] if lokasi is not None else [])
+        ).df()
+    finally:
+        cursor.close()
+    return kq.percentile_table(counts, metric, by, percentiles)
+
+def filter_options(con, src):
+    """
+    Pilihan filter sidebar tanpa memuat data: (rentang tanggal, lokasi, hari)
+    """
+    bounds = _query(con, src, None, "SELECT min(tanggal) AS awal, max(tanggal) AS akhir FROM cube").iloc[0]
+    locations = available_locations(con, src, None)
+    present = set(_query(con, src, None, "SELECT DISTINCT hari FROM cube")['hari'])
+    date_range = (date.fromisoformat(bounds['awal']), date.fromisoformat(bounds['akhir']))
+    return date_range, locations, [day for day in DAY_ORDER if day in present]
+
+def raw_query(src, filters, columns=RAW_COLUMNS, order_by=None, limit=None):
+    """
+    SELECT baris mentah yang lolos filter (ditambah kolom datetime), beserta parameternya
+    """
+    where, params = where_clause(filters)
+    select = ', '.join(columns) + ", strptime(tanggal || ' ' || jam, '%Y-%m-%d %H:%M') AS datetime"
+    sql = f"SELECT {select} FROM {src['raw']} {where}"
+    if order_by is not None:
+        sql += f" ORDER BY {order_by}"
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+    return sql, params
+
+def table_view(con, src, filters, sort_by, ascending=True, n_records=100):
+    """
+    Baris mentah untuk tab Data Tabel: hanya n_records teratas yang dibaca (top-N di DuckDB)
+    """
+    if sort_by not in RAW_COLUMNS:
+        raise ValueError(f"Kolom urutan tidak dikenal: {sort_by}")
+    direction = 'ASC' if ascending else 'DESC'
+    if sort_by == 'tanggal':
+        order_by = f"tanggal {direction}, jam {direction}, lokasi"
+    else:
+        order_by = f"{sort_by} {direction}, tanggal, jam, lokasi"
+    sql, params = raw_query(src, filters, order_by=order_by, limit=n_records)
+    cursor = con.cursor()
+    try:
+        return cursor.execute(sql, params).df()
+    finally:
+        cursor.close()
+
+def export_rows(con, src, filters, path, fmt='csv', compress=False):
+    """
+    Ekspor baris mentah hasil filter langsung dari Parquet ke CSV (opsional
+    gzip) atau Parquet dengan COPY, tanpa memuat data ke memori Python
+    File ditulis ke path sementara lalu dipindahkan seperti export_frame
+    """
+    if fmt not in ('csv', 'parquet'):
+        raise ValueError(f"Format ekspor tidak dikenal: {fmt}")
+    options = 'FORMAT parquet, COMPRESSION zstd' if fmt == 'parquet' else 'FORMAT csv, HEADER'
+    if fmt == 'csv' and compress:
+        options += ', COMPRESSION gzip'
+    sql, params = raw_query(src, filters)
+    tmp_path = writer_tmp_path(path)
+    cursor = con.cursor()
+    try:
+        cursor.execute(f"COPY ({sql}) TO {_literal(tmp_path)} ({options})", params)
+        rows = cursor.fetchone()[0]
+        os.replace(tmp_path, path)
+    except BaseException:
+        remove_quietly(tmp_path)
+        raise
+    finally:
+        cursor.close()
+    return rows
@@ -0,0 +1,357 @@
+"""
+Statistik streaming (online) dataset kemacetan lalu lintas
+Jumlah, rata-rata, varians (M2 Welford), min dan max setiap metrik disimpan
+per lokasi, per jam dan per hari, satu state per partisi tanggal. State dapat
+digabung (rumus paralel Chan) sehingga batch baru, shard dan partisi cukup
+di-merge tanpa membaca ulang baris lama, dan disimpan ke disk di samping dataset
+Author: Data Science Team
+Date: February 2026
+"""
+
+import argparse
+import json
+import os
+import shutil
+import threading
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from penyimpanan_kemacetan import (
+    CUBE_METRICS, DATA_PATH, dataset_manifest, manifest_version, load_dataset, load_files
+)
+
+# Lokasi default state statistik (satu file .npz per partisi tanggal + total)
+STATS_PATH = 'kemacetan_stats'
+
+# Dimensi pengelompokan; 'total' adalah satu kelompok untuk seluruh data
+STATS_DIMENSIONS = ['lokasi', 'jam', 'hari']
+TOTAL = 'total'
+
+# Jumlah partisi yang dibaca sekaligus saat state dibangun dari awal
+STATS_BATCH_PARTITIONS = 31
+
+STATS_MANIFEST = 'manifest.json'
+
+def _empty_group(n_metrics):
+    return {
+        'keys': np.array([], dtype=str),
+        'count': np.zeros(0, dtype=np.int64),
+        'mean': np.zeros((0, n_metrics)),
+        'm2': np.zeros((0, n_metrics)),
+        'min': np.zeros((0, n_metrics)),
+        'max': np.zeros((0, n_metrics))
+    }
+
+def empty_stats(metrics=CUBE_METRICS):
+    """
+    State statistik tanpa data
+    """
+    state = {'metrics': list(metrics)}
+    for dimension in [TOTAL] + STATS_DIMENSIONS:
+        state[dimension] = _empty_group(len(metrics))
+    return state
+
+def compute_stats(df, metrics=CUBE_METRICS):
+    """
+    State statistik untuk satu batch baris (kolom lokasi, jam, hari dan metrics)
+    Varians dihitung dua tahap per kelompok (rata-rata lalu jumlah kuadrat deviasi)
+    """
+    if df.empty:
+        return empty_stats(metrics)
+    frame = df[list(metrics)].astype(np.float64)
+    state = {'metrics': list(metrics)}
+    for dimension in [TOTAL] + STATS_DIMENSIONS:
+        keys = np.zeros(len(df), dtype=np.int8) if dimension == TOTAL else df[dimension].astype(str).to_numpy()
+        grouped = frame.groupby(keys, sort=True)
+        count = grouped.size()
+        state[dimension] = {
+            'keys': np.array([''] if dimension == TOTAL else count.index.astype(str), dtype=str),
+            'count': count.to_numpy(dtype=np.int64),
+            'mean': grouped.mean().to_numpy(),
+            'm2': (grouped.var(ddof=0).to_numpy() * count.to_numpy()[:, None]),
+            'min': grouped.min().to_numpy(),
+            'max': grouped.max().to_numpy()
+        }
+    return state
+
+def _align(group, keys):
+    """
+    Sebar kelompok ke urutan keys (kelompok yang tidak ada berjumlah 0)
+    """
+    n_metrics = group['mean'].shape[1]
+    aligned = {
+        'count': np.zeros(len(keys), dtype=np.int64),
+        'mean': np.zeros((len(keys), n_metrics)),
+        'm2': np.zeros((len(keys), n_metrics)),
+        'min': np.full((len(keys), n_metrics), np.inf),
+        'max': np.full((len(keys), n_metrics), -np.inf)
+    }
+    positions = np.searchsorted(keys, group['keys'])
+    for field in aligned:
+        aligned[field][positions] = group[field]
+    return aligned
+
+def _merge_group(a, b):
+    """
+    Gabungkan dua kelompok dengan rumus paralel Chan et al.
+    """
+    keys = np.union1d(a['keys'], b['keys'])
+    a, b = _align(a, keys), _align(b, keys)
+    count = a['count'] + b['count']
+    n = np.maximum(count, 1)[:, None]
+    delta = b['mean'] - a['mean']
+    return {
+        'keys': keys,
+        'count': count,
+        'mean': a['mean'] + delta * (b['count'][:, None] / n),
+        'm2': a['m2'] + b['m2'] + delta ** 2 * (a['count'][:, None] * b['count'][:, None] / n),
+        'min': np.minimum(a['min'], b['min']),
+        'max': np.maximum(a['max'], b['max'])
+    }
+
+def merge_stats(a, b):
+    """
+    Gabungkan dua state statistik (batch, shard atau partisi berbeda)
+    Hasilnya sama dengan compute_stats atas gabungan barisnya
+    """
+    if a['metrics'] != b['metrics']:
+        raise ValueError("State statistik dengan metrik berbeda tidak dapat digabung")
+    merged = {'metrics': a['metrics']}
+    for dimension in [TOTAL] + STATS_DIMENSIONS:
+        merged[dimension] = _merge_group(a[dimension], b[dimension])
+    return merged
+
+def merge_all(states, metrics=CUBE_METRICS):
+    """
+    Gabungkan banyak state secara berpasangan (pohon) agar galat pembulatan kecil
+    """
+    states = list(states)
+    if not states:
+        return empty_stats(metrics)
+    while len(states) > 1:
+        states = [merge_stats(*states[i:i + 2]) if i + 1 < len(states) else states[i]
+                  for i in range(0, len(states), 2)]
+    return states[0]
+
+def summarize(state, dimension=TOTAL, keys=None):
+    """
+    Ringkasan per metrik (jumlah, rata_rata, std, min, max) untuk gabungan
+    kelompok `keys` pada satu dimensi (None = semua kelompok)
+    Biayanya sebanding dengan jumlah kelompok, bukan jumlah baris
+    """
+    group = state[dimension]
+    if keys is not None:
+        group = {
+            field: values[np.isin(group['keys'], [str(key) for key in keys])]
+            for field, values in group.items()
+        }
+    count = group['count'].sum()
+    if count == 0:
+        nan = np.full(len(state['metrics']), np.nan)
+        return pd.DataFrame(
+            {'jumlah': 0, 'rata_rata': nan, 'std': nan, 'min': nan, 'max': nan}, index=state['metrics']
+        )
+    weights = group['count'][:, None]
+    mean = (weights * group['mean']).sum(axis=0) / count
+    m2 = group['m2'].sum(axis=0) + (weights * (group['mean'] - mean) ** 2).sum(axis=0)
+    return pd.DataFrame({
+        'jumlah': int(count),
+        'rata_rata': mean,
+        'std': np.sqrt(m2 / count),
+        'min': group['min'].min(axis=0),
+        'max': group['max'].max(axis=0)
+    }, index=state['metrics'])
+
+def summary_means(state, dimension=TOTAL, keys=None):
+    """
+    Rata-rata per metrik dalam bentuk dict seperti analisis_kemacetan.metric_means
+    """
+    return summarize(state, dimension, keys)['rata_rata'].to_dict()
+
+def save_state(state, path):
+    """
+    Simpan state ke file .npz (tanpa pickle), ditulis atomik
+    """
+    arrays = {'metrics': np.array(state['metrics'], dtype=str)}
+    for dimension in [TOTAL] + STATS_DIMENSIONS:
+        for field, values in state[dimension].items():
+            arrays[f'{dimension}.{field}'] = values
+    tmp_path = f'{path}.tmp.npz'
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+def load_state(path):
+    """
+    Muat state dari file .npz hasil save_state
+    """
+    with np.load(path, allow_pickle=False) as data:
+        state = {'metrics': [str(metric) for metric in data['metrics']]}
+        for dimension in [TOTAL] + STATS_DIMENSIONS:
+            state[dimension] = {
+                field: data[f'{dimension}.{field}'] for field in ('keys', 'count', 'mean', 'm2', 'min', 'max')
+            }
+    return state
+
+def new_stats_store():
+    """
+    State statistik yang di-cache dan diperbarui di tempat oleh refresh_stats:
+    manifest dataset, state per partisi, total dan versinya
+    """
+    return {'manifest': None, 'partitions': {}, 'total': None, 'version': None, 'lock': threading.Lock()}
+
+def _partition_file(stats_path, tanggal):
+    return os.path.join(stats_path, f'tanggal={tanggal}.npz')
+
+def _read_store(store, stats_path):
+    """
+    Isi store dari disk (manifest dan state partisi terakhir yang disimpan)
+    """
+    try:
+        with open(os.path.join(stats_path, STATS_MANIFEST), encoding='utf-8') as handle:
+            saved = json.load(handle)
+        manifest = {tanggal: tuple(tuple(entry) for entry in files) for tanggal, files in saved['manifest']}
+        partitions = {tanggal: load_state(_partition_file(stats_path, tanggal)) for tanggal in manifest}
+        total = load_state(os.path.join(stats_path, f'{TOTAL}.npz'))
+    except (OSError, ValueError, KeyError):
+        return
+    store.update(manifest=manifest, partitions=partitions, total=total, version=manifest_version(manifest))
+
+def _write_store(store, stats_path, changed, removed):
+    """
+    Simpan state partisi yang berubah, total dan manifest (manifest terakhir
+    agar state di disk tidak pernah lebih baru dari manifest yang dicatat)
+    """
+    os.makedirs(stats_path, exist_ok=True)
+    for tanggal in changed:
+        save_state(store['partitions'][tanggal], _partition_file(stats_path, tanggal))
+    for tanggal in removed:
+        if os.path.exists(_partition_file(stats_path, tanggal)):
+            os.remove(_partition_file(stats_path, tanggal))
+    save_state(store['total'], os.path.join(stats_path, f'{TOTAL}.npz'))
+    tmp_path = os.path.join(stats_path, f'{STATS_MANIFEST}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as handle:
+        json.dump({'manifest': sorted(store['manifest'].items(), key=lambda item: str(item[0]))}, handle)
+    os.replace(tmp_path, os.path.join(stats_path, STATS_MANIFEST))
+
+def _batch_stats(df, metrics):
+    """
+    State statistik per partisi tanggal untuk satu frame
+    """
+    if df.empty:
+        return {}
+    return {tanggal: compute_stats(rows, metrics) for tanggal, rows in df.groupby('tanggal', sort=True)}
+
+def refresh_stats(store, data_path=DATA_PATH, stats_path=STATS_PATH, manifest=None, metrics=CUBE_METRICS):
+    """
+    Sinkronkan state statistik dengan manifest dataset dan kembalikan (total, versi)
+    - partisi yang hanya mendapat file baru (append kolektor/scraper
+      incremental): hanya file barunya yang dibaca lalu di-merge ke state
+      partisi dan ke total
+    - partisi baru: dibaca per batch STATS_BATCH_PARTITIONS partisi
+    - partisi yang ditulis ulang atau dihapus: state partisinya dihitung
+      ulang/dibuang lalu total digabung ulang dari state per partisi
+      (tanpa membaca baris partisi lain)
+    stats_path None = state hanya di memori
+    """
+    columns = ['tanggal'] + STATS_DIMENSIONS + list(metrics)
+    with store['lock']:
+        if manifest is None:
+            manifest = dataset_manifest(data_path)
+        if store['manifest'] is None and stats_path is not None:
+            _read_store(store, stats_path)
+        old_manifest = store['manifest'] or {}
+        if store['total'] is not None and old_manifest == manifest:
+            return store['total'], store['version']
+
+        # Dataset file tunggal: dibaca utuh, state hanya disimpan di memori
+        if None in manifest or None in old_manifest:
+            total = compute_stats(load_dataset(data_path, columns=columns), metrics) if manifest else empty_stats(metrics)
+            store.update(partitions={}, total=total, manifest=manifest, version=manifest_version(manifest))
+            return store['total'], store['version']
+
+        partitions = store['partitions']
+        removed = [tanggal for tanggal in old_manifest if tanggal not in manifest]
+        appended, rewritten = {}, []
+        for tanggal, files in manifest.items():
+            old_files = old_manifest.get(tanggal)
+            if old_files == files:
+                continue
+            if old_files is not None and tanggal in partitions and set(old_files) <= set(files):
+                appended[tanggal] = sorted(set(files) - set(old_files))
+            else:
+                rewritten.append(tanggal)
+
+        # File baru di partisi yang sudah ada: merge batch ke state partisi
+        deltas = []
+        if appended:
+            new_files = [(tanggal, entry[0]) for tanggal, entries in appended.items() for entry in entries]
+            for tanggal, delta in _batch_stats(load_files(data_path, new_files, columns), metrics).items():
+                partitions[tanggal] = merge_stats(partitions[tanggal], delta)
+                deltas.append(delta)
+
+        # Partisi baru atau ditulis ulang: dihitung dari seluruh isi partisinya
+        rebuild = bool(removed) or any(tanggal in partitions for tanggal in rewritten)
+        for start in range(0, len(rewritten), STATS_BATCH_PARTITIONS):
+            batch = rewritten[start:start + STATS_BATCH_PARTITIONS]
+            computed = _batch_stats(load_dataset(data_path, columns=columns, partitions=batch), metrics)
+            for tanggal in batch:
+                partitions[tanggal] = computed.get(tanggal, empty_stats(metrics))
+                deltas.append(partitions[tanggal])
+        for tanggal in removed:
+            partitions.pop(tanggal, None)
+
+        if rebuild or store['total'] is None:
+            total = merge_all((partitions[tanggal] for tanggal in sorted(partitions)), metrics)
+        else:
+            total = reduce(merge_stats, deltas, store['total'])
+        store.update(total=total, manifest=manifest, version=manifest_version(manifest))
+        if stats_path is not None:
+            _write_store(store, stats_path, list(appended) + rewritten, removed)
+        return store['total'], store['version']
+
+def stats_table(state, dimension, metric):
+    """
+    Tabel per kelompok satu dimensi untuk satu metrik: jumlah, rata_rata, std, min, max
+    """
+    group = state[dimension]
+    column = state['metrics'].index(metric)
+    count = group['count']
+    return pd.DataFrame({
+        dimension: group['keys'],
+        'jumlah': count,
+        'rata_rata': group['mean'][:, column],
+        'std': np.sqrt(group['m2'][:, column] / np.maximum(count, 1)),
+        'min': group['min'][:, column],
+        'max': group['max'][:, column]
+    })
+
+def main(data_path=DATA_PATH, stats_path=STATS_PATH, rebuild=False):
+    """
+    Bangun atau perbarui state statistik dari dataset lalu tampilkan ringkasannya
+    """
+    if rebuild:
+        shutil.rmtree(stats_path, ignore_errors=True)
+    total, version = refresh_stats(new_stats_store(), data_path, stats_path)
+    print("=" * 60)
+    print("STATISTIK STREAMING KEMACETAN")
+    print("=" * 60)
+    print(f"Versi Data: {version}")
+    print(summarize(total).round(3).to_string())
+    print(f"\n✓ State statistik disimpan ke: {stats_path}")
+    return total
+
+def parse_args(argv=None):
+    """
+    Argumen command line untuk membangun state statistik
+    """
+    parser = argparse.ArgumentParser(description="Bangun/perbarui statistik streaming dataset kemacetan")
+    parser.add_argument('--data', default=DATA_PATH, help="Dataset Parquet")
+    parser.add_argument('--output', default=STATS_PATH, help="Direktori state statistik")
+    parser.add_argument('--rebuild', action='store_true', help="Hitung ulang seluruh state dari awal")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(data_path=args.data, stats_path=args.output, rebuild=args.rebuild)